@@ -2,6 +2,10 @@
 ASGI config for VideoSummarizer project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run it with a single worker process, since the task queue lives in-process:
+
+    uvicorn VideoSummarizer.asgi:application --host 0.0.0.0 --port 18000
+    gunicorn VideoSummarizer.asgi:application -k uvicorn.workers.UvicornWorker -w 1 -b 0.0.0.0:18000
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -11,5 +15,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VideoSummarizer.settings')
+# Route the hot read endpoints to their async views (settings.ASGI_MODE)
+os.environ['VIDEOSUMMARIZER_ASGI'] = '1'
 
 application = get_asgi_application()
+
+# Only server processes clean up after a crash and expire old uploads
+from app.services import AudioSummarizer  # noqa: E402
+
+AudioSummarizer().start_housekeeping()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -23,7 +24,8 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 SECRET_KEY = 'django-insecure-yk)habrcmc4-_=#65mn$ptzp9!z9l0tx6lh6=&vg9&1!cjepvk'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# DJANGO_DEBUG=0 for production: hashed static file names, no debug pages
+DEBUG = os.environ.get('DJANGO_DEBUG', '1') == '1'
 
 ALLOWED_HOSTS = ['*']
 
@@ -46,6 +48,8 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Before anything that reads or rewrites the body, so it compresses last
+    'app.middleware.ThresholdGZipMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -120,6 +124,17 @@ USE_TZ = True
 # https://docs.djangoproject.com/en/5.2/howto/static-files/
 
 STATIC_URL = 'static/'
+# collectstatic writes content-hashed copies here (style.<hash>.css) and a manifest
+STATIC_ROOT = BASE_DIR / 'staticfiles'
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.ManifestStaticFilesStorage'},
+}
+# Hashed names change with their content, so browsers may keep them for a year
+STATIC_HASHED_MAX_AGE = 365 * 24 * 3600
+
+# Responses smaller than this are sent uncompressed (app/middleware.py)
+GZIP_MIN_BYTES = 1024
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
@@ -149,3 +164,75 @@ SECURE_BROWSER_XSS_FILTER = True
 X_FRAME_OPTIONS = 'DENY'
 
 # CSP removed - simplified configuration
+
+# Task queue scheduling: shortest-job-first with aging
+TASK_QUEUE_DEFAULT_DURATION = 600  # seconds assumed while a task's duration is unknown
+TASK_QUEUE_AGING_RATE = 4.0  # score credit (seconds) earned per second spent waiting
+TASK_QUEUE_PRIORITY_WEIGHT = 600  # score credit (seconds) per explicit priority point
+TASK_QUEUE_MAX_PRIORITY = 100  # explicit priorities are accepted from -this to this
+DURATION_PROBE_WORKERS = 2  # background threads probing durations at enqueue time
+
+# Admission control (app/admission.py): submissions beyond these get 429 with a Retry-After; None disables a limit
+ADMISSION_MAX_QUEUE_DEPTH = 200  # tasks waiting in the queue
+ADMISSION_MAX_QUEUED_SECONDS = 12 * 3600  # audio waiting in the queue, unknown durations at TASK_QUEUE_DEFAULT_DURATION
+ADMISSION_MAX_TASKS_PER_CLIENT = 50  # queued or running tasks submitted from one client address
+ADMISSION_CLIENT_HEADER = None  # e.g. 'HTTP_X_FORWARDED_FOR' behind a trusted proxy, else REMOTE_ADDR identifies clients
+ADMISSION_THROUGHPUT_WINDOW = 20  # Retry-After uses the audio seconds per wall second of the last this many tasks
+ADMISSION_DEFAULT_THROUGHPUT = 2.0  # assumed until a task has been transcribed
+ADMISSION_MIN_RETRY_AFTER = 5
+ADMISSION_MAX_RETRY_AFTER = 3600
+
+# Transcription runs in windows of this many seconds, streamed from ffmpeg (app/audio.py);
+# cancellation is checked between windows and decode memory is bounded by one window
+TRANSCRIBE_WINDOW_SECONDS = 300
+
+# CPU execution profiles (app/execution.py): torch thread counts and core pinning.
+# 'intra_op_threads' is a count, 'auto' (the worker's cores less 'reserve_cores') or None for torch's default
+CPU_PROFILES = {
+    'default': {},
+    # Leaves a core for yt-dlp, ffmpeg, the LLM client and the web server
+    'shared': {'intra_op_threads': 'auto', 'reserve_cores': 1, 'inter_op_threads': 1, 'pin': True},
+    'dedicated': {'intra_op_threads': 'auto', 'inter_op_threads': 1, 'pin': True},
+}
+CPU_PROFILE = os.environ.get('VIDEOSUMMARIZER_CPU_PROFILE', 'shared')
+# Instances sharing a host each take their own slice of the cores
+CPU_WORKER_INDEX = int(os.environ.get('VIDEOSUMMARIZER_WORKER_INDEX', 0))
+CPU_WORKER_COUNT = int(os.environ.get('VIDEOSUMMARIZER_WORKER_COUNT', 1))
+
+# Silence trimming before Whisper (app/vad.py), toggled by UserSettings.vad_enabled
+VAD_THRESHOLD_DB = 12  # frames this far above the noise floor count as speech
+VAD_SPEECH_DB = -40  # frames louder than this (dBFS) count as speech whatever the noise floor
+VAD_MIN_SILENCE_SECONDS = 1.0  # shorter pauses are kept
+VAD_PAD_SECONDS = 0.25  # audio kept on each side of a cut
+
+# Maximum number of tasks a single batch/playlist submission may create
+BATCH_MAX_TASKS = 500
+
+# Per-task download workspaces live under MEDIA_ROOT/temp
+TEMP_QUOTA_MB = 5120  # downloads wait while media/temp holds more than this
+TEMP_MIN_FREE_MB = 1024  # free space kept on the media volume; uploads are refused below it
+TEMP_SPACE_WAIT_SECONDS = 600  # how long a task waits for space before failing
+TEMP_ORPHAN_MAX_AGE_HOURS = 24  # leftovers older than this are swept even for active tasks
+
+# Retention of uploaded media (media/uploads), applied once a file task has its transcript
+UPLOAD_DELETE_AFTER_TRANSCRIPT = False  # delete the upload as soon as the transcript is saved
+UPLOAD_TRANSCODE_OPUS = False  # otherwise keep it as mono Opus (needs ffmpeg with libopus)
+UPLOAD_OPUS_BITRATE = '32k'
+UPLOAD_MAX_AGE_DAYS = 30  # uploads of finished tasks older than this are deleted; None keeps them
+UPLOAD_ORPHAN_GRACE_MINUTES = 60  # reconcile_uploads leaves unreferenced files this young alone
+
+# Chunked uploads (/api/uploads/): suggested chunk size and how long an unfinished upload is kept
+UPLOAD_CHUNK_SIZE_MB = 8
+UPLOAD_SESSION_MAX_AGE_HOURS = 24
+
+# Automatic retries of failed stages (app/retries.py); only transient errors are retried
+TASK_RETRY_LIMITS = {'download': 3, 'summarize': 5}  # retries per stage before the task fails
+TASK_RETRY_BACKOFF_SECONDS = {'download': 30, 'summarize': 10}  # first delay, doubled on every retry
+TASK_RETRY_MAX_DELAY_SECONDS = 900
+
+# Task change feed (/api/tasks/changes/, app/changes.py)
+TASK_CHANGES_OVERLAP_SECONDS = 5  # each poll reaches back this far for rows committed late
+TASK_TOMBSTONE_MAX_AGE_HOURS = 24  # older cursors get a full snapshot instead of a delta
+
+# Set by asgi.py: serve the hot read endpoints with async views
+ASGI_MODE = os.environ.get('VIDEOSUMMARIZER_ASGI') == '1'
@@ -15,16 +15,26 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, include, re_path
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib.staticfiles.urls import staticfiles_urlpatterns
 from django.views.generic import TemplateView
+from app.views import healthz, metrics_view, readyz, serve_static
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('app.urls')),
+    path('metrics', metrics_view, name='metrics'),
+    path('healthz', healthz, name='healthz'),
+    path('readyz', readyz, name='readyz'),
     path('', TemplateView.as_view(template_name='index.html'), name='home'),
 ]
 
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    # runserver serves static files itself; uvicorn/gunicorn need the URL patterns
+    urlpatterns += staticfiles_urlpatterns()
+else:
+    # Without DEBUG nothing serves static files; serve the collectstatic output
+    urlpatterns += [re_path(r'^static/(?P<path>.+)$', serve_static, name='static')]
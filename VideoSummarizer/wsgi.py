@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VideoSummarizer.settings')
 
 application = get_wsgi_application()
+
+# Only server processes clean up after a crash and expire old uploads
+from app.services import AudioSummarizer  # noqa: E402
+
+AudioSummarizer().start_housekeeping()
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserSettings, VideoTask
+from .models import SummaryVersion, UploadSession, UserSettings, VideoTask
 
 
 @admin.register(UserSettings)
@@ -20,16 +20,16 @@ class UserSettingsAdmin(admin.ModelAdmin):
 
 @admin.register(VideoTask)
 class VideoTaskAdmin(admin.ModelAdmin):
-    list_display = ['id', 'title', 'task_type', 'status', 'progress', 'created_at']
+    list_display = ['id', 'title', 'task_type', 'status', 'progress', 'priority', 'duration', 'created_at']
     list_filter = ['status', 'task_type', 'created_at']
     search_fields = ['title', 'url']
     readonly_fields = ['created_at', 'updated_at', 'completed_at']
     fieldsets = (
         ('基本信息', {
-            'fields': ('title', 'task_type', 'url', 'file_path')
+            'fields': ('title', 'task_type', 'url', 'canonical_url', 'file_path', 'content_hash', 'primary_task')
         }),
         ('处理状态', {
-            'fields': ('status', 'progress', 'error_message')
+            'fields': ('status', 'progress', 'priority', 'duration', 'error_message')
         }),
         ('结果', {
             'fields': ('original_text', 'summary')
@@ -37,4 +37,18 @@ class VideoTaskAdmin(admin.ModelAdmin):
         ('时间信息', {
             'fields': ('created_at', 'updated_at', 'completed_at')
         }),
-    )
\ No newline at end of file
+    )
+
+@admin.register(SummaryVersion)
+class SummaryVersionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'task', 'model', 'status', 'created_at', 'completed_at']
+    list_filter = ['status', 'model']
+    readonly_fields = ['created_at', 'completed_at']
+
+
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'filename', 'size', 'received', 'status', 'task', 'updated_at']
+    list_filter = ['status']
+    search_fields = ['filename', 'sha256']
+    readonly_fields = ['created_at', 'updated_at']
@@ -0,0 +1,158 @@
+"""Admission control: refuse new work the queue cannot get through in reasonable time.
+
+Without limits a spike queues hours of audio, and users only find out once
+their task has been accepted. New submissions are checked against the
+number of waiting tasks, the audio they add up to and the tasks each client
+already has in flight (settings.ADMISSION_*). Beyond a limit the API answers
+429 with a Retry-After estimated from the throughput the worker actually
+achieved over its last tasks; /readyz reports the same saturation so a load
+balancer can send new work to other instances.
+"""
+import math
+import threading
+from collections import deque
+
+from django.conf import settings
+
+from app import metrics
+from app.models import VideoTask
+
+
+class AdmissionRejected(Exception):
+    """New work refused; ``retry_after`` is the estimated seconds until it would be admitted"""
+
+    def __init__(self, reason, message, retry_after):
+        super().__init__(message)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Throughput:
+    """Audio seconds the worker gets through per wall-clock second, over its last tasks"""
+
+    def __init__(self, window):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, audio_seconds, wall_seconds):
+        with self._lock:
+            self._samples.append((audio_seconds, wall_seconds))
+
+    def rate(self):
+        """The measured rate, or settings.ADMISSION_DEFAULT_THROUGHPUT until there is one"""
+        with self._lock:
+            audio_seconds = sum(sample[0] for sample in self._samples)
+            wall_seconds = sum(sample[1] for sample in self._samples)
+        if audio_seconds <= 0 or wall_seconds <= 0:
+            return settings.ADMISSION_DEFAULT_THROUGHPUT
+        return audio_seconds / wall_seconds
+
+
+def client_address(request):
+    """The submitting client: REMOTE_ADDR, or the first hop of ADMISSION_CLIENT_HEADER behind a proxy"""
+    if settings.ADMISSION_CLIENT_HEADER:
+        forwarded = request.META.get(settings.ADMISSION_CLIENT_HEADER, '').split(',')[0].strip()
+        if forwarded:
+            return forwarded[:64]
+    return request.META.get('REMOTE_ADDR', '')[:64]
+
+
+def retry_after(audio_seconds, rate):
+    """Seconds the worker needs for ``audio_seconds`` at ``rate``, clamped to the configured range"""
+    seconds = math.ceil(audio_seconds / rate) if rate > 0 else settings.ADMISSION_MAX_RETRY_AFTER
+    return min(max(seconds, settings.ADMISSION_MIN_RETRY_AFTER), settings.ADMISSION_MAX_RETRY_AFTER)
+
+
+def saturation(summarizer):
+    """Load of the queue against the admission limits, as reported by /readyz"""
+    backlog = summarizer.task_queue.backlog()
+    queued_seconds = sum(duration for _, duration in backlog)
+    rate = summarizer.throughput.rate()
+    depth_limit = settings.ADMISSION_MAX_QUEUE_DEPTH
+    seconds_limit = settings.ADMISSION_MAX_QUEUED_SECONDS
+    try:
+        _check_queue(backlog, rate)
+        wait = None
+    except AdmissionRejected as e:
+        wait = e.retry_after
+    return {
+        'queue_depth': len(backlog),
+        'max_queue_depth': depth_limit,
+        'queued_seconds': queued_seconds,
+        'max_queued_seconds': seconds_limit,
+        'throughput': round(rate, 3),
+        'estimated_wait_seconds': math.ceil(queued_seconds / rate) if rate > 0 else None,
+        # 1 or more means new work is being refused
+        'saturation': round(max(
+            len(backlog) / depth_limit if depth_limit else 0,
+            queued_seconds / seconds_limit if seconds_limit else 0,
+        ), 3),
+        'retry_after': wait,
+    }
+
+
+def max_submission():
+    """Most tasks one submission can ever be admitted with, whatever the load"""
+    limits = [settings.ADMISSION_MAX_QUEUE_DEPTH, settings.ADMISSION_MAX_TASKS_PER_CLIENT]
+    return min((limit for limit in limits if limit is not None), default=None)
+
+
+def admit(summarizer, client, count=1):
+    """Raise AdmissionRejected unless ``count`` new tasks fit within the queue and ``client`` limits"""
+    try:
+        _check(summarizer, client, count)
+    except AdmissionRejected as e:
+        metrics.ADMISSION_REJECTED.inc(reason=e.reason)
+        raise
+
+
+def _check(summarizer, client, count):
+    backlog = summarizer.task_queue.backlog()
+    rate = summarizer.throughput.rate()
+    _check_queue(backlog, rate, count)
+    _check_client(summarizer, client, backlog, rate, count)
+
+
+def _check_queue(backlog, rate, count=1):
+    depth_limit = settings.ADMISSION_MAX_QUEUE_DEPTH
+    if depth_limit is not None and len(backlog) + count > depth_limit:
+        # Served shortest first, so the tasks that must finish are the head of the backlog
+        excess = len(backlog) + count - depth_limit
+        raise AdmissionRejected(
+            'queue_depth', f'队列已满 ({len(backlog)} 个任务排队中)，请稍后再试',
+            retry_after(sum(duration for _, duration in backlog[:excess]), rate)
+        )
+
+    seconds_limit = settings.ADMISSION_MAX_QUEUED_SECONDS
+    queued_seconds = sum(duration for _, duration in backlog)
+    if seconds_limit is not None and queued_seconds >= seconds_limit:
+        raise AdmissionRejected(
+            'queued_seconds', f'排队音频已达 {queued_seconds // 60} 分钟，请稍后再试',
+            retry_after(queued_seconds - seconds_limit, rate)
+        )
+
+
+def _check_client(summarizer, client, backlog, rate, count=1):
+    client_limit = settings.ADMISSION_MAX_TASKS_PER_CLIENT
+    if client_limit is None or not client:
+        return
+    # Followers of a duplicate submission cost no work of their own
+    active = set(VideoTask.objects.filter(
+        client_address=client, status__in=VideoTask.ACTIVE_STATUSES, primary_task__isnull=True
+    ).values_list('id', flat=True))
+    needed = len(active) + count - client_limit
+    if needed > 0:
+        # Slots free as the client's waiting tasks are served, in backlog order
+        ahead = 0
+        for task_id, duration in backlog:
+            ahead += duration
+            if task_id in active:
+                needed -= 1
+                if needed == 0:
+                    break
+        # The rest are running or waiting out a retry backoff
+        ahead += needed * summarizer.task_queue.default_duration
+        raise AdmissionRejected(
+            'client', f'进行中的任务已达上限 ({client_limit} 个)，请等待已提交的任务完成',
+            retry_after(ahead, rate)
+        )
@@ -4,4 +4,8 @@ from django.apps import AppConfig
 class AppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app'
-    verbose_name = '视频总结器'
\ No newline at end of file
+    verbose_name = '视频总结器'
+
+    def ready(self):
+        # Registers the change feed signal handlers
+        from app import signals  # noqa: F401
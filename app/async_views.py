@@ -0,0 +1,119 @@
+"""Async versions of the hot read endpoints, routed in place of the DRF views under ASGI.
+
+They use the async ORM, so the many dashboards polling these endpoints
+wait on the event loop instead of each holding a thread. Responses are
+rendered with DRF's encoder and settings so they are byte-for-byte what
+the synchronous views return.
+"""
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.utils.encoders import JSONEncoder
+
+from app import changes, conditional
+from app.models import UserSettings, VideoTask
+from app.services import AudioSummarizer
+from app.views import _serialize_task
+
+
+def _json(data, status=200):
+    # Same output as DRF's JSONRenderer: compact, UTF-8, microsecond timestamps
+    return JsonResponse(
+        data, status=status, safe=False, encoder=JSONEncoder,
+        json_dumps_params={'ensure_ascii': False, 'separators': (',', ':')}
+    )
+
+
+async def _summarizer():
+    return AudioSummarizer()
+
+
+@require_GET
+async def get_tasks(request):
+    positions = (await _summarizer()).get_queue_positions()
+    data = []
+    async for task in VideoTask.objects.all():
+        item = _serialize_task(task)
+        if task.id in positions:
+            item['queue_position'] = positions[task.id]
+        data.append(item)
+    return _json(data)
+
+
+@require_GET
+async def get_task_changes(request):
+    try:
+        since = changes.parse_cursor(request.GET.get('since'))
+    except ValueError:
+        return _json({'error': '无效的 since 参数'}, status=400)
+    
+    reset = since is None or changes.is_expired(since)
+    if reset:
+        # A snapshot is complete as of now, however long ago the last change was
+        since = timezone.now()
+    tasks = [task async for task in (VideoTask.objects.all() if reset else changes.changed_tasks(since))]
+    tombstones = [] if reset else [tombstone async for tombstone in changes.deleted_tasks(since)]
+    return _json({
+        'cursor': changes.next_cursor(since, tasks, tombstones),
+        'reset': reset,
+        'tasks': [_serialize_task(task) for task in tasks],
+        'deleted': [tombstone.task_id for tombstone in tombstones],
+        'queue_positions': (await _summarizer()).get_queue_positions(),
+    })
+
+
+@require_GET
+async def get_task_detail(request, task_id):
+    updated_at = await VideoTask.objects.filter(id=task_id).values_list('updated_at', flat=True).afirst()
+    if updated_at is not None:
+        response = conditional.not_modified(request, conditional.make_etag('task', task_id, updated_at), updated_at)
+        if response is not None:
+            return response
+    try:
+        task = await VideoTask.objects.aget(id=task_id)
+    except VideoTask.DoesNotExist:
+        return _json({'error': '任务不存在'}, status=404)
+    return conditional.set_validators(
+        _json(_serialize_task(task)), conditional.make_etag('task', task.id, task.updated_at), task.updated_at
+    )
+
+
+@require_GET
+async def get_model_status(request):
+    """Get current Whisper model status"""
+    audio_summarizer = await _summarizer()
+    user_settings, _ = await UserSettings.objects.aget_or_create(pk=1)
+    etag = conditional.make_etag('model', audio_summarizer.status_version(), user_settings.updated_at)
+    response = conditional.not_modified(request, etag)
+    if response is not None:
+        return response
+    # The first check imports torch; later calls return the cached answer
+    cuda_available = await sync_to_async(audio_summarizer._check_cuda_availability)()
+    queue_status = audio_summarizer.get_queue_status()
+
+    return conditional.set_validators(_json({
+        'status': audio_summarizer.get_model_status(),
+        'cuda_available': cuda_available,
+        'loaded': audio_summarizer.whisper_model is not None,
+        'device': audio_summarizer.device,
+        'auto_load_enabled': user_settings.auto_load_model,
+        'queue_size': queue_status['queue_size'],
+        'is_processing': queue_status['is_processing']
+    }), etag)
+
+
+@require_GET
+async def get_queue_status(request):
+    """Get current processing queue status"""
+    audio_summarizer = await _summarizer()
+    etag = conditional.make_etag('queue', audio_summarizer.status_version())
+    response = conditional.not_modified(request, etag)
+    if response is not None:
+        return response
+    queue_status = audio_summarizer.get_queue_status()
+    return conditional.set_validators(_json({
+        'queue_size': queue_status['queue_size'],
+        'is_processing': queue_status['is_processing'],
+        'current_task': queue_status['current_task']
+    }), etag)
@@ -0,0 +1,75 @@
+"""Streaming audio decoding in fixed-size windows.
+
+``whisper.load_audio`` decodes a whole file into one float32 array, which
+for a multi-hour recording is gigabytes before inference starts. Here
+ffmpeg writes 16 kHz mono s16le PCM to a pipe and windows are read off it
+one at a time, so peak memory depends on the window size, not the input
+length. While a window is transcribed the pipe fills up and ffmpeg simply
+blocks.
+"""
+import subprocess
+import tempfile
+
+import numpy as np
+
+# Whisper's input sample rate
+SAMPLE_RATE = 16000
+BYTES_PER_SAMPLE = 2
+
+
+def _ffmpeg_command(path, sample_rate):
+    return [
+        'ffmpeg', '-nostdin', '-v', 'error', '-threads', '0', '-i', str(path),
+        '-f', 's16le', '-ac', '1', '-acodec', 'pcm_s16le', '-ar', str(sample_rate), '-',
+    ]
+
+
+def _read_full(stream, buffer):
+    """Fill ``buffer`` from ``stream`` unless it ends first, returns the bytes read"""
+    view = memoryview(buffer)
+    filled = 0
+    while filled < len(buffer):
+        count = stream.readinto(view[filled:])
+        if not count:
+            break
+        filled += count
+    return filled
+
+
+def iter_windows(path, window_samples, sample_rate=SAMPLE_RATE):
+    """Yield consecutive float32 windows of ``window_samples`` samples (the last may be shorter).
+
+    Stopping early (e.g. on cancellation) kills ffmpeg; a decoding error
+    raises RuntimeError with ffmpeg's message once the output ends.
+    """
+    # A file rather than a pipe: nobody reads stderr until stdout ends, and a
+    # full stderr pipe would block ffmpeg (and so us) on a noisy, corrupt input
+    errors_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        _ffmpeg_command(path, sample_rate), stdout=subprocess.PIPE, stderr=errors_file
+    )
+    buffer = bytearray(window_samples * BYTES_PER_SAMPLE)
+    try:
+        while True:
+            filled = _read_full(process.stdout, buffer)
+            filled -= filled % BYTES_PER_SAMPLE
+            if not filled:
+                break
+            pcm = np.frombuffer(buffer, dtype=np.int16, count=filled // BYTES_PER_SAMPLE)
+            # astype copies, so the buffer can be refilled while the window is in use
+            samples = pcm.astype(np.float32)
+            samples /= 32768.0
+            yield samples
+            if filled < len(buffer):
+                break
+        if process.wait() != 0:
+            errors_file.seek(0)
+            # The last lines say why it stopped; the rest can be megabytes of per-frame noise
+            errors = errors_file.read().decode('utf-8', 'replace').strip()[-2000:]
+            raise RuntimeError(f"音频解码失败: {errors}")
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        errors_file.close()
@@ -0,0 +1,33 @@
+import threading
+
+
+class TaskCancelled(Exception):
+    """Raised inside the pipeline once a task's cancellation token has fired"""
+
+
+class CancellationToken:
+    """Cooperative cancellation flag shared between the API and the worker.
+
+    The worker polls it between stages, from yt-dlp progress hooks and
+    between transcription windows; nothing is interrupted preemptively.
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+        self.reason = None
+
+    def cancel(self, reason='cancelled'):
+        self.reason = reason
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def wait(self, timeout=None):
+        """Sleep up to ``timeout`` seconds, waking early on cancellation"""
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise TaskCancelled(self.reason)
@@ -0,0 +1,67 @@
+"""Change feed of the task list for clients that poll it (``/api/tasks/changes/``).
+
+A client keeps the cursor of each answer and sends it back as ``since``. It
+gets the tasks whose ``updated_at`` moved past the cursor and the ids of
+tasks deleted since (from TaskTombstone), so a poll costs in proportion to
+what changed rather than to the length of the history. ``updated_at`` is
+taken before a write commits, so a row can show up with a time a little
+older than a cursor already handed out; every query reaches back
+TASK_CHANGES_OVERLAP_SECONDS for those, and clients skip rows they already
+have. A cursor older than the tombstones kept gets a full snapshot.
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.utils import timezone
+
+from app.models import TaskTombstone, VideoTask
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(moment):
+    return str((moment - _EPOCH) // _MICROSECOND)
+
+
+def parse_cursor(value):
+    """The moment a ``since`` parameter stands for; None if it is missing, ValueError if malformed"""
+    if value in (None, ''):
+        return None
+    try:
+        return _EPOCH + int(value) * _MICROSECOND
+    except OverflowError:
+        raise ValueError(value)
+
+
+def is_expired(since):
+    """Whether deletions after ``since`` may already have been forgotten"""
+    return since < timezone.now() - timedelta(hours=settings.TASK_TOMBSTONE_MAX_AGE_HOURS)
+
+
+def _window_start(since):
+    return since - timedelta(seconds=settings.TASK_CHANGES_OVERLAP_SECONDS)
+
+
+def changed_tasks(since):
+    """Tasks updated after ``since`` (and within the overlap before it), oldest change first"""
+    return VideoTask.objects.filter(updated_at__gt=_window_start(since)).order_by('updated_at')
+
+
+def deleted_tasks(since):
+    return TaskTombstone.objects.filter(deleted_at__gt=_window_start(since))
+
+
+def next_cursor(since, tasks, tombstones):
+    """Cursor for the next poll: the latest change seen, or ``since`` if that is later"""
+    moments = [task.updated_at for task in tasks] + [tombstone.deleted_at for tombstone in tombstones]
+    return encode_cursor(max(moments + [since]))
+
+
+def record_deletion(task_id):
+    """Leave a tombstone for ``task_id`` and drop those too old to be asked about"""
+    now = timezone.now()
+    TaskTombstone.objects.create(task_id=task_id, deleted_at=now)
+    TaskTombstone.objects.filter(
+        deleted_at__lt=now - timedelta(hours=settings.TASK_TOMBSTONE_MAX_AGE_HOURS)
+    ).delete()
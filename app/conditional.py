@@ -0,0 +1,37 @@
+"""Validators (ETag / Last-Modified) for the read endpoints the dashboard keeps polling.
+
+Most of those answers repeat the previous one byte for byte. Each endpoint
+derives a strong ETag from something cheap (a task's ``updated_at``, the
+worker's status version) before it builds the body, and a client sending
+the tag back in If-None-Match gets an empty 304 instead of the body.
+"""
+from datetime import datetime
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+
+def make_etag(*parts):
+    """Strong ETag from ``parts``; datetimes count to the microsecond"""
+    values = [f'{part.timestamp():.6f}' if isinstance(part, datetime) else str(part) for part in parts]
+    return '"{}"'.format('-'.join(values))
+
+
+def set_validators(response, etag, last_modified=None):
+    response.headers['ETag'] = etag
+    if last_modified is not None:
+        response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    # Stored copies must be revalidated, never reused on heuristic freshness
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def not_modified(request, etag, last_modified=None):
+    """The 304 (or 412) answer if the client's preconditions settle the request, else None"""
+    response = get_conditional_response(
+        request, etag=etag,
+        last_modified=int(last_modified.timestamp()) if last_modified is not None else None
+    )
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
@@ -0,0 +1,99 @@
+"""CPU execution profiles: torch thread counts and core pinning for transcription.
+
+By default torch runs one intra-op thread per core. Next to yt-dlp, ffmpeg,
+the LLM client and the web server, or with several instances on one host,
+that oversubscribes the cores and throughput collapses. A profile
+(settings.CPU_PROFILES) caps the threads, and with several instances each
+is pinned to its own contiguous slice of the cores, chosen by
+VIDEOSUMMARIZER_WORKER_INDEX out of VIDEOSUMMARIZER_WORKER_COUNT.
+``python -m benchmarks.cpu_profiles`` finds the best split for a machine.
+"""
+import os
+
+from django.conf import settings
+
+# Native thread pools read these once, when their library is first loaded
+THREAD_ENV_VARS = ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS')
+
+
+class ExecutionPlan:
+    """The cores one worker runs on and the torch thread counts to use there"""
+
+    def __init__(self, cores, intra_op_threads=None, inter_op_threads=None, pin=False):
+        self.cores = cores
+        self.intra_op_threads = intra_op_threads  # None leaves torch's default
+        self.inter_op_threads = inter_op_threads
+        self.pin = pin
+
+    def __repr__(self):
+        return (f"ExecutionPlan(cores={self.cores}, intra_op_threads={self.intra_op_threads}, "
+                f"inter_op_threads={self.inter_op_threads}, pin={self.pin})")
+
+
+def available_cores():
+    """Cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def partition(cores, index, count):
+    """Slice ``index`` of ``cores`` split into ``count`` contiguous, near-equal parts"""
+    count = max(1, min(count, len(cores)))
+    index %= count
+    size, extra = divmod(len(cores), count)
+    start = index * size + min(index, extra)
+    return cores[start:start + size + (index < extra)]
+
+
+def make_plan(profile, worker_index=0, worker_count=1, cores=None):
+    """ExecutionPlan for worker ``worker_index`` of ``worker_count`` under ``profile``"""
+    cores = available_cores() if cores is None else list(cores)
+    if worker_count > 1:
+        cores = partition(cores, worker_index, worker_count)
+    intra_op_threads = profile.get('intra_op_threads')
+    if intra_op_threads == 'auto':
+        intra_op_threads = max(1, len(cores) - profile.get('reserve_cores', 0))
+    return ExecutionPlan(
+        cores, intra_op_threads, profile.get('inter_op_threads'), profile.get('pin', False)
+    )
+
+
+def current_plan():
+    """ExecutionPlan of this process from settings"""
+    profile = settings.CPU_PROFILES.get(settings.CPU_PROFILE)
+    if profile is None:
+        print(f"未知的 CPU 执行配置 {settings.CPU_PROFILE!r}，使用 default")
+        profile = settings.CPU_PROFILES['default']
+    return make_plan(profile, settings.CPU_WORKER_INDEX, settings.CPU_WORKER_COUNT)
+
+
+def apply_process(plan):
+    """Pin every thread of this process to the plan's cores and cap thread pools not loaded yet"""
+    if plan.intra_op_threads:
+        for name in THREAD_ENV_VARS:
+            # An explicit environment setting wins
+            os.environ.setdefault(name, str(plan.intra_op_threads))
+    if not plan.pin or not hasattr(os, 'sched_setaffinity'):
+        return
+    # On Linux affinity is per thread, so existing threads are pinned one by one
+    try:
+        thread_ids = [int(name) for name in os.listdir('/proc/self/task')]
+    except OSError:
+        thread_ids = [0]
+    for thread_id in thread_ids:
+        try:
+            os.sched_setaffinity(thread_id, plan.cores)
+        except OSError:
+            pass  # The thread has exited meanwhile
+
+
+def apply_torch(plan, torch):
+    """Set torch's intra- and inter-op thread counts from the plan"""
+    if plan.intra_op_threads:
+        torch.set_num_threads(plan.intra_op_threads)
+    if plan.inter_op_threads:
+        try:
+            torch.set_num_interop_threads(plan.inter_op_threads)
+        except RuntimeError:
+            pass  # Only settable once, before any inter-op work has started
@@ -0,0 +1,100 @@
+"""Streaming export of task results as NDJSON or as a ZIP of Markdown files.
+
+Both formats are produced incrementally from ``QuerySet.iterator()`` so
+memory stays flat however many tasks are exported. Under ASGI the chunks
+go through ``async_chunks``, since Django 4.2 collects a sync iterator into
+a list before sending any of it.
+"""
+import json
+import re
+import time
+import zipfile
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+
+EXPORT_FIELDS = (
+    'id', 'title', 'url', 'task_type', 'status', 'duration', 'video_id',
+    'original_text', 'summary', 'error_message', 'created_at', 'completed_at',
+)
+# Transcripts can be large; keep the rows fetched per round trip small
+ITERATOR_CHUNK_SIZE = 50
+
+
+def ndjson_lines(queryset):
+    """One JSON object per task, newline-delimited"""
+    for task in queryset.values(*EXPORT_FIELDS).iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+        yield json.dumps(task, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+
+
+def markdown_filename(task):
+    slug = re.sub(r'[\\/:*?"<>|\s]+', '_', task['title'] or '').strip('_.')[:80]
+    return f"{task['id']:06d}-{slug or 'task'}.md"
+
+
+def render_markdown(task):
+    lines = [f"# {task['title']}", '']
+    if task['url']:
+        lines.append(f"- 链接: {task['url']}")
+    lines.append(f"- 状态: {task['status']}")
+    lines.append(f"- 创建时间: {task['created_at'].isoformat()}")
+    if task['completed_at']:
+        lines.append(f"- 完成时间: {task['completed_at'].isoformat()}")
+    if task['duration']:
+        lines.append(f"- 时长: {task['duration']} 秒")
+    if task['error_message']:
+        lines.extend(['', f"> 错误: {task['error_message']}"])
+    lines.extend(['', '## 总结', '', task['summary'] or '', '', '## 原始文本', '', task['original_text'] or '', ''])
+    return '\n'.join(lines)
+
+
+class _StreamBuffer:
+    """Unseekable file object that collects what zipfile writes until it is drained"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_chunks(queryset):
+    """A ZIP archive with one Markdown file per task, yielded as it is built.
+
+    zipfile writes data descriptors when the target cannot seek, so each
+    entry can be sent as soon as it is compressed.
+    """
+    buffer = _StreamBuffer()
+    timestamp = time.localtime()[:6]
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for task in queryset.values(*EXPORT_FIELDS).iterator(chunk_size=ITERATOR_CHUNK_SIZE):
+            info = zipfile.ZipInfo(markdown_filename(task), date_time=timestamp)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            archive.writestr(info, render_markdown(task))
+            yield buffer.drain()
+    # Closing the archive writes the central directory
+    yield buffer.drain()
+
+
+async def async_chunks(chunks):
+    """Pull ``chunks`` one at a time on the sync thread, so an ASGI response streams them"""
+    chunks = iter(chunks)
+    done = object()
+    try:
+        while True:
+            # Thread-sensitive, so the queryset cursor stays on the thread that opened it
+            chunk = await sync_to_async(next)(chunks, done)
+            if chunk is done:
+                break
+            yield chunk
+    finally:
+        await sync_to_async(chunks.close)()
@@ -0,0 +1,43 @@
+"""Spoken-language hints passed to Whisper.
+
+Without a language Whisper spends a pass detecting it, and a music or
+silent intro can make it guess wrong and decode slowly into garbage. The
+language is resolved before transcription instead, first match wins: the
+task's own language (a per-task override, or what an earlier attempt
+resolved), yt-dlp metadata, the original-language caption track and the
+user's default. Detection on a short clip is only the fallback.
+"""
+import re
+
+_CODE = re.compile(r'^[a-z]{2,3}$')
+# yt-dlp lists YouTube's auto captions in the spoken language under '<code>-orig'
+ORIGINAL_CAPTION_SUFFIX = '-orig'
+
+
+def normalize(value):
+    """'en-US', 'zh-Hans', 'EN' -> 'en', 'zh', 'en'; None if it is not a language code"""
+    if not value:
+        return None
+    code = re.split(r'[-_]', str(value).strip().lower(), maxsplit=1)[0]
+    return code if _CODE.match(code) else None
+
+
+def caption_language(automatic_captions, subtitles):
+    """Spoken language implied by a video's caption tracks, if they show it"""
+    for key in automatic_captions or {}:
+        if key.endswith(ORIGINAL_CAPTION_SUFFIX):
+            return normalize(key[:-len(ORIGINAL_CAPTION_SUFFIX)])
+    # Several manual tracks are usually translations; a single one is telling
+    manual = [key for key in subtitles or {} if key != 'live_chat']
+    if len(manual) == 1:
+        return normalize(manual[0])
+    return None
+
+
+def resolve(*candidates):
+    """The first candidate that is a usable language code, or None"""
+    for candidate in candidates:
+        code = normalize(candidate)
+        if code:
+            return code
+    return None
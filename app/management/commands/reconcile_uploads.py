@@ -0,0 +1,90 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app import retention
+from app.models import UploadSession, VideoTask
+
+
+def _scan_files(directory):
+    """Yield ``os.DirEntry`` objects for every file below ``directory``"""
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                yield from _scan_files(entry.path)
+            elif entry.is_file(follow_symlinks=False):
+                yield entry
+
+
+class Command(BaseCommand):
+    help = '核对 media/uploads 与 VideoTask.file_path：删除无任务引用的文件、清除指向缺失文件的记录、清理过期的分片上传并执行保留策略'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只报告，不删除也不修改数据库')
+        parser.add_argument(
+            '--grace-minutes', type=int, default=settings.UPLOAD_ORPHAN_GRACE_MINUTES,
+            help='比这更新的未引用文件可能仍在上传中，不会删除'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        root = retention.uploads_root()
+
+        files, freed = retention.expire_uploads(dry_run=dry_run)
+        self.stdout.write(f'过期上传文件: {files} 个, {freed / 1024 / 1024:.1f} MB')
+
+        sessions = retention.expire_upload_sessions(dry_run=dry_run)
+        self.stdout.write(f'过期的未完成分片上传: {sessions} 个')
+
+        referenced = set(
+            VideoTask.objects.filter(file_path__isnull=False).values_list('file_path', flat=True).iterator()
+        )
+        # Files of chunked uploads still in progress belong to their session
+        referenced.update(
+            UploadSession.objects.filter(status='uploading').values_list('file_path', flat=True).iterator()
+        )
+        referenced = {os.path.realpath(path) for path in referenced}
+
+        orphans = orphan_bytes = 0
+        on_disk = set()
+        cutoff = time.time() - options['grace_minutes'] * 60
+        if root.exists():
+            for entry in _scan_files(root):
+                path = os.path.realpath(entry.path)
+                on_disk.add(path)
+                if path in referenced:
+                    continue
+                stat = entry.stat(follow_symlinks=False)
+                if stat.st_mtime > cutoff:
+                    continue
+                orphans += 1
+                orphan_bytes += stat.st_size
+                if not dry_run:
+                    os.remove(entry.path)
+        self.stdout.write(f'无任务引用的文件: {orphans} 个, {orphan_bytes / 1024 / 1024:.1f} MB')
+
+        missing = []
+        for task_id, path, task_status in VideoTask.objects.filter(
+            file_path__isnull=False
+        ).values_list('id', 'file_path', 'status').iterator():
+            real_path = os.path.realpath(path)
+            # Only the uploads directory was scanned; check anything else directly
+            exists = real_path in on_disk if retention.is_upload(path) else os.path.exists(path)
+            if exists:
+                continue
+            missing.append(task_id)
+            if task_status in VideoTask.ACTIVE_STATUSES:
+                self.stdout.write(self.style.WARNING(f'进行中的任务 {task_id} 的文件不存在: {path}'))
+        if missing and not dry_run:
+            VideoTask.objects.filter(id__in=missing).exclude(
+                status__in=VideoTask.ACTIVE_STATUSES
+            ).update(file_path=None, updated_at=timezone.now())
+        self.stdout.write(f'指向缺失文件的任务: {len(missing)} 个')
+
+        if dry_run:
+            self.stdout.write(self.style.WARNING('dry-run: 未做任何修改'))
+        else:
+            self.stdout.write(self.style.SUCCESS('核对完成'))
@@ -0,0 +1,246 @@
+"""Process-local pipeline metrics rendered in the Prometheus text format.
+
+Kept dependency-free on purpose: the worker runs in the web process, so a
+single in-memory registry scraped from ``/metrics`` is all we need.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'{self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(labels[name] for name in self.labelnames)
+
+    def render(self):
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} {self.type_name}',
+        ]
+        lines.extend(self._samples())
+        return '\n'.join(lines)
+
+    def _samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [
+            f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+            for key, value in items
+        ]
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function):
+        """Compute the (unlabelled) value at scrape time instead of storing it"""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            try:
+                return [f'{self.name} {_format_value(self._function())}']
+            except Exception:
+                return []
+        return super()._samples()
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the ``with`` block"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def totals(self):
+        """Map label values to ``(count, sum)`` of the observations made so far"""
+        with self._lock:
+            return {key: (counts[-1], total) for key, (counts, total) in self._values.items()}
+
+    def _samples(self):
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            for bound, count in zip(self.buckets, counts):
+                labels = _format_labels(self.labelnames, key, f'le="{_format_value(bound)}"')
+                lines.append(f'{self.name}_bucket{labels} {count}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {counts[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+STAGE_DURATION = REGISTRY.register(Histogram(
+    'videosummarizer_stage_duration_seconds',
+    'Wall-clock duration of each pipeline stage',
+    ['stage'],
+))
+AUDIO_SECONDS_TRANSCRIBED = REGISTRY.register(Counter(
+    'videosummarizer_audio_seconds_transcribed_total',
+    'Seconds of audio fed through Whisper',
+))
+AUDIO_SECONDS_TRIMMED = REGISTRY.register(Counter(
+    'videosummarizer_audio_seconds_trimmed_total',
+    'Seconds of silence cut by voice activity detection before Whisper',
+))
+TRANSCRIBE_WALL_SECONDS = REGISTRY.register(Counter(
+    'videosummarizer_transcribe_wall_seconds_total',
+    'Wall-clock seconds spent transcribing',
+))
+TRANSCRIBE_LANGUAGE = REGISTRY.register(Counter(
+    'videosummarizer_transcriptions_total',
+    'Transcriptions, by the language passed to Whisper',
+    ['language'],
+))
+TRANSCRIBE_SPEED = REGISTRY.register(Gauge(
+    'videosummarizer_transcribe_realtime_factor',
+    'Audio seconds transcribed per wall-clock second for the last transcription',
+))
+QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'videosummarizer_queue_depth',
+    'Tasks waiting in the processing queue',
+))
+QUEUE_WAIT = REGISTRY.register(Histogram(
+    'videosummarizer_queue_wait_seconds',
+    'Time tasks spent queued before the worker picked them up',
+))
+QUEUED_AUDIO_SECONDS = REGISTRY.register(Gauge(
+    'videosummarizer_queued_audio_seconds',
+    'Audio seconds waiting in the processing queue, unknown durations at the default',
+))
+PIPELINE_THROUGHPUT = REGISTRY.register(Gauge(
+    'videosummarizer_pipeline_throughput',
+    'Audio seconds processed per worker wall-clock second over the last tasks, used for Retry-After',
+))
+ADMISSION_REJECTED = REGISTRY.register(Counter(
+    'videosummarizer_admission_rejected_total',
+    'Submissions refused by admission control, by the limit reached',
+    ['reason'],
+))
+TASKS_FINISHED = REGISTRY.register(Counter(
+    'videosummarizer_tasks_finished_total',
+    'Tasks that left the worker, by type and outcome',
+    ['type', 'outcome'],
+))
+TASK_RETRIES = REGISTRY.register(Counter(
+    'videosummarizer_task_retries_total',
+    'Automatic retries scheduled after a transient failure, by stage',
+    ['stage'],
+))
+TASKS_COALESCED = REGISTRY.register(Counter(
+    'videosummarizer_tasks_coalesced_total',
+    'Duplicate submissions coalesced onto an in-flight task',
+))
+MODEL_LOADS = REGISTRY.register(Counter(
+    'videosummarizer_model_loads_total',
+    'Whisper model loads, by model and device',
+    ['model', 'device'],
+))
+MODEL_LOAD_DURATION = REGISTRY.register(Histogram(
+    'videosummarizer_model_load_duration_seconds',
+    'Time spent loading a Whisper model',
+))
+MODEL_UNLOADS = REGISTRY.register(Counter(
+    'videosummarizer_model_unloads_total',
+    'Whisper model unloads',
+))
+MODEL_UNLOAD_DURATION = REGISTRY.register(Histogram(
+    'videosummarizer_model_unload_duration_seconds',
+    'Time spent unloading a Whisper model and freeing memory',
+))
+LLM_REQUESTS = REGISTRY.register(Counter(
+    'videosummarizer_llm_requests_total',
+    'Chat completion requests, by model and outcome',
+    ['model', 'outcome'],
+))
+LLM_LATENCY = REGISTRY.register(Histogram(
+    'videosummarizer_llm_latency_seconds',
+    'Chat completion request latency',
+    ['model'],
+))
+LLM_TOKENS = REGISTRY.register(Counter(
+    'videosummarizer_llm_tokens_total',
+    'Tokens reported by the LLM API, by model and kind (prompt/completion)',
+    ['model', 'kind'],
+))
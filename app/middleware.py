@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+# Besides text/*: what the API, export and static files send that compresses well
+COMPRESSIBLE_TYPES = {
+    'application/json',
+    'application/javascript',
+    'application/x-ndjson',
+    'image/svg+xml',
+}
+
+
+class ThresholdGZipMiddleware(GZipMiddleware):
+    """GZip compressible responses of at least GZIP_MIN_BYTES.
+
+    Small bodies are not worth a compressor run, and archives such as the
+    ZIP export are already compressed. Streaming bodies are compressed on
+    the fly whatever their length.
+    """
+
+    def process_response(self, request, response):
+        if not response.streaming and len(response.content) < settings.GZIP_MIN_BYTES:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith('text/') and content_type not in COMPRESSIBLE_TYPES:
+            return response
+        return super().process_response(request, response)
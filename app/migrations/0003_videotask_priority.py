@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0002_alter_usersettings_url_summary_prompt_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="priority",
+            field=models.IntegerField(default=0),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0003_videotask_priority"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="videotask",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("pending", "排队中"),
+                    ("downloading", "下载中"),
+                    ("transcribing", "转录中"),
+                    ("summarizing", "总结中"),
+                    ("completed", "已完成"),
+                    ("failed", "失败"),
+                    ("cancelled", "已取消"),
+                ],
+                default="pending",
+                max_length=20,
+            ),
+        ),
+    ]
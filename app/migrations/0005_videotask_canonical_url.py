@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:06
+
+from django.db import migrations, models
+
+from app.url_utils import canonicalize_url
+
+
+def backfill_canonical_urls(apps, schema_editor):
+    VideoTask = apps.get_model("app", "VideoTask")
+    tasks = VideoTask.objects.exclude(url__isnull=True).exclude(url="")
+    for task in tasks.only("id", "url").iterator():
+        task.canonical_url = canonicalize_url(task.url)
+        task.save(update_fields=["canonical_url"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0004_alter_videotask_status_cancelled"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="canonical_url",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=500
+            ),
+        ),
+        migrations.RunPython(backfill_canonical_urls, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0005_videotask_canonical_url"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="primary_task",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="followers",
+                to="app.videotask",
+            ),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:17
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0006_videotask_primary_task"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="content_hash",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+        migrations.CreateModel(
+            name="UploadSession",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("filename", models.CharField(max_length=255)),
+                ("file_path", models.CharField(max_length=500)),
+                ("size", models.BigIntegerField()),
+                ("received", models.BigIntegerField(default=0)),
+                ("sha256", models.CharField(blank=True, max_length=64)),
+                ("priority", models.IntegerField(default=0)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("uploading", "上传中"), ("completed", "已完成")],
+                        default="uploading",
+                        max_length=20,
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                (
+                    "task",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="+",
+                        to="app.videotask",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "上传会话",
+                "verbose_name_plural": "上传会话",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:20
+
+import sqlite3
+
+from django.db import OperationalError, migrations
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    # The trigram tokenizer (SQLite 3.34+) matches Chinese without word segmentation
+    tokenizer = "trigram" if sqlite3.sqlite_version_info >= (3, 34, 0) else "unicode61"
+    try:
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS app_videotask_fts "
+            f"USING fts5(title, original_text, summary, tokenize='{tokenizer}')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to icontains
+        return
+    schema_editor.execute(
+        "INSERT INTO app_videotask_fts (rowid, title, original_text, summary) "
+        "SELECT id, title, original_text, summary FROM app_videotask"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS app_videotask_fts")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0007_upload_sessions"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
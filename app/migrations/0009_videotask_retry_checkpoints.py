@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0008_videotask_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="download_path",
+            field=models.CharField(blank=True, default="", max_length=500),
+        ),
+        migrations.AddField(
+            model_name="videotask",
+            name="retry_count",
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="videotask",
+            name="retry_stage",
+            field=models.CharField(blank=True, default="", max_length=20),
+        ),
+    ]
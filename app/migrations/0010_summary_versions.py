@@ -0,0 +1,60 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:28
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0009_videotask_retry_checkpoints"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SummaryVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("prompt", models.TextField(blank=True)),
+                ("model", models.CharField(blank=True, max_length=100)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "排队中"),
+                            ("summarizing", "总结中"),
+                            ("completed", "已完成"),
+                            ("failed", "失败"),
+                        ],
+                        default="pending",
+                        max_length=20,
+                    ),
+                ),
+                ("summary", models.TextField(blank=True)),
+                ("error_message", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("completed_at", models.DateTimeField(blank=True, null=True)),
+                (
+                    "task",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="summary_versions",
+                        to="app.videotask",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "总结版本",
+                "verbose_name_plural": "总结版本",
+                "ordering": ["-created_at"],
+            },
+        ),
+    ]
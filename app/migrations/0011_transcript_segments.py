@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:29
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0010_summary_versions"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TranscriptSegments",
+            fields=[
+                (
+                    "task",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="segments",
+                        serialize=False,
+                        to="app.videotask",
+                    ),
+                ),
+                ("count", models.IntegerField(default=0)),
+                ("starts", models.BinaryField()),
+                ("ends", models.BinaryField()),
+                ("text_offsets", models.BinaryField()),
+                ("text", models.BinaryField()),
+            ],
+            options={
+                "verbose_name": "转录分段",
+                "verbose_name_plural": "转录分段",
+            },
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0011_transcript_segments"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="uploadsession",
+            name="language",
+            field=models.CharField(blank=True, max_length=16),
+        ),
+        migrations.AddField(
+            model_name="usersettings",
+            name="default_language",
+            field=models.CharField(
+                blank=True,
+                help_text="视频元数据和字幕都无法确定语言时使用的语言代码 (如 zh、en)，留空则自动检测",
+                max_length=16,
+            ),
+        ),
+        migrations.AddField(
+            model_name="videotask",
+            name="language",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=16
+            ),
+        ),
+    ]
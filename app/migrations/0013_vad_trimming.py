@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0012_language_hints"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="usersettings",
+            name="vad_enabled",
+            field=models.BooleanField(
+                default=True,
+                help_text="转录前去除静音片段，减少转录时间和静音处的幻觉文本",
+            ),
+        ),
+        migrations.AddField(
+            model_name="videotask",
+            name="trimmed_ratio",
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
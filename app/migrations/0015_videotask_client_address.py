@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0014_task_change_feed"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="videotask",
+            name="client_address",
+            field=models.CharField(
+                blank=True, db_index=True, default="", max_length=64
+            ),
+        ),
+    ]
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:02
+
+import sqlite3
+
+from django.db import OperationalError, migrations
+
+INDEXED = "title, original_text, summary"
+OLD_VALUES = "old.title, old.original_text, old.summary"
+NEW_VALUES = "new.title, new.original_text, new.summary"
+
+
+def _tokenizer():
+    # The trigram tokenizer (SQLite 3.34+) matches Chinese without word segmentation
+    return "trigram" if sqlite3.sqlite_version_info >= (3, 34, 0) else "unicode61"
+
+
+def use_external_content(apps, schema_editor):
+    """Index app_videotask in place instead of keeping a second copy of every transcript.
+
+    Triggers keep the index in step with every write, including bulk and
+    queryset updates, and only reindex a row when an indexed column changed,
+    not on every progress save.
+    """
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    schema_editor.execute("DROP TABLE IF EXISTS app_videotask_fts")
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE app_videotask_fts USING fts5({INDEXED}, "
+            f"content='app_videotask', content_rowid='id', tokenize='{_tokenizer()}')"
+        )
+    except OperationalError:
+        # SQLite built without FTS5: search falls back to icontains
+        return
+    schema_editor.execute(
+        "CREATE TRIGGER app_videotask_fts_insert AFTER INSERT ON app_videotask BEGIN "
+        f"INSERT INTO app_videotask_fts (rowid, {INDEXED}) VALUES (new.id, {NEW_VALUES}); END"
+    )
+    schema_editor.execute(
+        "CREATE TRIGGER app_videotask_fts_delete AFTER DELETE ON app_videotask BEGIN "
+        f"INSERT INTO app_videotask_fts (app_videotask_fts, rowid, {INDEXED}) "
+        f"VALUES ('delete', old.id, {OLD_VALUES}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER app_videotask_fts_update AFTER UPDATE OF {INDEXED} ON app_videotask "
+        "WHEN old.title IS NOT new.title OR old.original_text IS NOT new.original_text "
+        "OR old.summary IS NOT new.summary BEGIN "
+        f"INSERT INTO app_videotask_fts (app_videotask_fts, rowid, {INDEXED}) "
+        f"VALUES ('delete', old.id, {OLD_VALUES}); "
+        f"INSERT INTO app_videotask_fts (rowid, {INDEXED}) VALUES (new.id, {NEW_VALUES}); END"
+    )
+    schema_editor.execute("INSERT INTO app_videotask_fts (app_videotask_fts) VALUES ('rebuild')")
+
+
+def use_copied_content(apps, schema_editor):
+    if schema_editor.connection.vendor != "sqlite":
+        return
+    for trigger in ("insert", "delete", "update"):
+        schema_editor.execute(f"DROP TRIGGER IF EXISTS app_videotask_fts_{trigger}")
+    schema_editor.execute("DROP TABLE IF EXISTS app_videotask_fts")
+    try:
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE app_videotask_fts USING fts5({INDEXED}, tokenize='{_tokenizer()}')"
+        )
+    except OperationalError:
+        return
+    schema_editor.execute(
+        f"INSERT INTO app_videotask_fts (rowid, {INDEXED}) SELECT id, {INDEXED} FROM app_videotask"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0015_videotask_client_address"),
+    ]
+
+    operations = [
+        migrations.RunPython(use_external_content, use_copied_content),
+    ]
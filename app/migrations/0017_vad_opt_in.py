@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:10
+
+from django.db import migrations, models
+
+
+def disable_vad(apps, schema_editor):
+    # Everyone had it on through 0013's default, not by choice
+    UserSettings = apps.get_model("app", "UserSettings")
+    UserSettings.objects.update(vad_enabled=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("app", "0016_external_content_search_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="usersettings",
+            name="vad_enabled",
+            field=models.BooleanField(
+                default=False,
+                help_text="转录前去除静音片段，减少转录时间和静音处的幻觉文本",
+            ),
+        ),
+        migrations.RunPython(disable_vad, migrations.RunPython.noop),
+    ]
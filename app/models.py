@@ -1,7 +1,10 @@
+import uuid
+
 from django.db import models
 from django.utils import timezone
 
 
+
 class UserSettings(models.Model):
     DEVICE_CHOICES = [
         ('auto', '自动选择'),
@@ -15,6 +18,14 @@ class UserSettings(models.Model):
     openai_model = models.CharField(max_length=100, default='gpt-3.5-turbo')
     whisper_model = models.CharField(max_length=50, default='base')
     whisper_device = models.CharField(max_length=10, choices=DEVICE_CHOICES, default='auto')
+    default_language = models.CharField(
+        max_length=16, blank=True,
+        help_text='视频元数据和字幕都无法确定语言时使用的语言代码 (如 zh、en)，留空则自动检测'
+    )
+    vad_enabled = models.BooleanField(
+        default=False,
+        help_text='转录前去除静音片段，减少转录时间和静音处的幻觉文本'
+    )
     auto_load_model = models.BooleanField(
         default=False,
         help_text='启用后，有任务时自动加载模型，任务完成后自动卸载模型以节省显存'
@@ -46,8 +57,12 @@ class VideoTask(models.Model):
         ('summarizing', '总结中'),
         ('completed', '已完成'),
         ('failed', '失败'),
+        ('cancelled', '已取消'),
     ]
 
+    # Statuses of tasks that are queued or being worked on
+    ACTIVE_STATUSES = ['pending', 'downloading', 'transcribing', 'summarizing']
+
     TYPE_CHOICES = [
         ('url', 'URL视频'),
         ('file', '上传文件'),
@@ -55,10 +70,14 @@ class VideoTask(models.Model):
 
     title = models.CharField(max_length=500)
     url = models.URLField(blank=True, null=True)
+    canonical_url = models.CharField(max_length=500, blank=True, default='', db_index=True)
     file_path = models.CharField(max_length=500, blank=True, null=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='', db_index=True)  # sha256 of the upload
     task_type = models.CharField(max_length=10, choices=TYPE_CHOICES)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     progress = models.IntegerField(default=0)  # 0-100
+    priority = models.IntegerField(default=0)  # higher runs sooner
+    client_address = models.CharField(max_length=64, blank=True, default='', db_index=True)  # submitter, for per-client admission limits
 
     # Results
     original_text = models.TextField(blank=True)
@@ -68,11 +87,23 @@ class VideoTask(models.Model):
     # Metadata
     video_id = models.CharField(max_length=100, blank=True, null=True, default='')
     duration = models.IntegerField(null=True, blank=True)  # in seconds
+    language = models.CharField(max_length=16, blank=True, default='', db_index=True)  # override, then the language used
+    trimmed_ratio = models.FloatField(null=True, blank=True)  # fraction of the audio cut as silence before transcription
+
+    # Retry checkpoints: media downloaded into the task workspace and the stage being retried
+    download_path = models.CharField(max_length=500, blank=True, default='')
+    retry_stage = models.CharField(max_length=20, blank=True, default='')
+    retry_count = models.IntegerField(default=0)  # automatic retries of retry_stage so far
 
     created_at = models.DateTimeField(auto_now_add=True)
-    updated_at = models.DateTimeField(auto_now=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)  # the /api/tasks/changes/ cursor
     completed_at = models.DateTimeField(null=True, blank=True)
 
+    # Duplicate submissions follow the in-flight task for the same URL
+    primary_task = models.ForeignKey(
+        'self', null=True, blank=True, on_delete=models.SET_NULL, related_name='followers'
+    )
+
     class Meta:
         ordering = ['-created_at']
         verbose_name = "视频任务"
@@ -81,9 +112,53 @@ class VideoTask(models.Model):
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
 
+    # Followers are re-synced when one of these changes, not on every progress save
+    FOLLOWER_SYNC_FIELDS = ('title', 'status', 'original_text', 'summary')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._synced_state = instance._follower_state()
+        return instance
+
+    def _follower_state(self):
+        # __dict__, so deferred fields are not loaded just to be compared
+        return tuple(self.__dict__.get(name) for name in self.FOLLOWER_SYNC_FIELDS)
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and not set(update_fields) & set(self.FOLLOWER_SYNC_FIELDS):
+            return
+        state = self._follower_state()
+        changed = state != getattr(self, '_synced_state', None)
+        self._synced_state = state
+        if changed and self.primary_task_id is None:
+            self.sync_followers()
+
+    def sync_followers(self):
+        """Mirror this task's state and results onto submissions coalesced into it"""
+        follower_ids = list(self.followers.values_list('id', flat=True))
+        if not follower_ids:
+            return 0
+        updated = VideoTask.objects.filter(id__in=follower_ids).update(
+            title=self.title,
+            status=self.status,
+            progress=self.progress,
+            original_text=self.original_text,
+            summary=self.summary,
+            error_message=self.error_message,
+            video_id=self.video_id,
+            duration=self.duration,
+            completed_at=self.completed_at,
+            updated_at=timezone.now(),
+        )
+        return updated
+
     def mark_completed(self):
         self.status = 'completed'
         self.progress = 100
+        self.error_message = ''  # left over from a retried attempt
         self.completed_at = timezone.now()
         self.save()
 
@@ -91,3 +166,94 @@ class VideoTask(models.Model):
         self.status = 'failed'
         self.error_message = error_msg
         self.save()
+
+
+class TaskTombstone(models.Model):
+    """A deleted task, kept for a while so clients polling for changes learn of the deletion"""
+    task_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        verbose_name = "已删除任务"
+        verbose_name_plural = "已删除任务"
+
+    def __str__(self):
+        return f"{self.task_id} ({self.deleted_at})"
+
+
+class TranscriptSegments(models.Model):
+    """Timestamped segments of a task's transcript, packed by app.segments.SegmentTable"""
+    task = models.OneToOneField(VideoTask, on_delete=models.CASCADE, primary_key=True, related_name='segments')
+    count = models.IntegerField(default=0)
+    starts = models.BinaryField()  # uint32 little-endian milliseconds
+    ends = models.BinaryField()
+    text_offsets = models.BinaryField()  # count + 1 uint32 byte offsets into text
+    text = models.BinaryField()  # UTF-8 segment texts, concatenated
+
+    class Meta:
+        verbose_name = "转录分段"
+        verbose_name_plural = "转录分段"
+
+    def __str__(self):
+        return f"{self.task_id} ({self.count} 段)"
+
+
+class SummaryVersion(models.Model):
+    """One summary of a task's transcript; re-summarizing adds a version instead of replacing it"""
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('summarizing', '总结中'),
+        ('completed', '已完成'),
+        ('failed', '失败'),
+    ]
+
+    # Statuses of versions that are queued or being generated
+    ACTIVE_STATUSES = ['pending', 'summarizing']
+
+    task = models.ForeignKey(VideoTask, on_delete=models.CASCADE, related_name='summary_versions')
+    prompt = models.TextField(blank=True)  # system prompt used; empty for the pipeline's original summary
+    model = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    summary = models.TextField(blank=True)
+    error_message = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "总结版本"
+        verbose_name_plural = "总结版本"
+
+    def __str__(self):
+        return f"{self.task_id} #{self.id} ({self.get_status_display()})"
+
+
+class UploadSession(models.Model):
+    """A resumable chunked upload written straight into media/uploads"""
+    STATUS_CHOICES = [
+        ('uploading', '上传中'),
+        ('completed', '已完成'),
+    ]
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    filename = models.CharField(max_length=255)
+    file_path = models.CharField(max_length=500)
+    size = models.BigIntegerField()  # declared total size in bytes
+    received = models.BigIntegerField(default=0)  # bytes written so far; the next chunk's offset
+    sha256 = models.CharField(max_length=64, blank=True)  # optional, supplied by the client
+    priority = models.IntegerField(default=0)
+    language = models.CharField(max_length=16, blank=True)  # passed on to the task
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='uploading')
+    task = models.ForeignKey(VideoTask, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = "上传会话"
+        verbose_name_plural = "上传会话"
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
@@ -0,0 +1,151 @@
+"""Retention of uploaded source media under ``media/uploads``.
+
+Once a file task has its transcript the upload is either deleted or kept as
+compact mono Opus; anything still kept is deleted after UPLOAD_MAX_AGE_DAYS.
+Only files inside the uploads directory are ever removed.
+"""
+import os
+import subprocess
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from app import uploads
+from app.models import UploadSession, VideoTask
+
+
+def uploads_root():
+    return Path(default_storage.location) / 'uploads'
+
+
+def is_upload(path):
+    """Whether ``path`` lies inside the uploads directory"""
+    try:
+        return Path(path).resolve().is_relative_to(uploads_root().resolve())
+    except (OSError, ValueError):
+        return False
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _forget_upload(task_id, file_path=None):
+    VideoTask.objects.filter(id=task_id).update(file_path=file_path, updated_at=timezone.now())
+
+
+def delete_upload(path, exclude_task_id=None):
+    """Delete an upload unless another task still points at it, returns the bytes freed"""
+    if not path or not is_upload(path):
+        return 0
+    if VideoTask.objects.filter(file_path=path).exclude(id=exclude_task_id).exists():
+        return 0
+    size = _file_size(path)
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return 0
+    except OSError as e:
+        print(f"删除上传文件失败: {e}")
+        return 0
+    return size
+
+
+def transcode_to_opus(path):
+    """Re-encode media as mono Opus next to the original, returns the new path or None"""
+    target = Path(path).with_suffix('.opus')
+    if target == Path(path):
+        return None
+    result = subprocess.run(
+        [
+            'ffmpeg', '-nostdin', '-v', 'error', '-y', '-i', str(path),
+            '-vn', '-ac', '1', '-c:a', 'libopus', '-b:a', settings.UPLOAD_OPUS_BITRATE,
+            str(target),
+        ],
+        capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        print(f"转码 Opus 失败: {result.stderr.strip()}")
+        target.unlink(missing_ok=True)
+        return None
+    return str(target)
+
+
+def release_upload(task):
+    """Apply the retention policy to a file task whose transcript has been saved"""
+    _release_follower_uploads(task)
+    path = task.file_path
+    if not path or not is_upload(path):
+        return
+    if settings.UPLOAD_DELETE_AFTER_TRANSCRIPT:
+        delete_upload(path, exclude_task_id=task.id)
+        task.file_path = None
+        _forget_upload(task.id)
+    elif settings.UPLOAD_TRANSCODE_OPUS and not path.endswith('.opus'):
+        opus_path = transcode_to_opus(path)
+        if opus_path:
+            original_size = _file_size(path)
+            delete_upload(path, exclude_task_id=task.id)
+            task.file_path = opus_path
+            _forget_upload(task.id, opus_path)
+            print(f"上传文件已转码为 Opus: {original_size / 1024 / 1024:.1f} MB -> "
+                  f"{_file_size(opus_path) / 1024 / 1024:.1f} MB")
+
+
+def _release_follower_uploads(task):
+    """Delete the copies duplicate uploads coalesced into ``task`` kept for a takeover.
+
+    Followers have the transcript synced by now, so a follower promoted
+    after a cancellation goes straight to summarizing without its copy.
+    """
+    followers = VideoTask.objects.filter(primary_task_id=task.id).exclude(file_path=None).exclude(file_path='')
+    for follower_id, path in followers.values_list('id', 'file_path'):
+        if is_upload(path):
+            delete_upload(path, exclude_task_id=follower_id)
+            _forget_upload(follower_id)
+
+
+def expire_uploads(dry_run=False):
+    """Delete uploads of finished tasks older than UPLOAD_MAX_AGE_DAYS.
+
+    Returns ``(files, bytes)`` deleted (or that would be, with ``dry_run``).
+    """
+    if settings.UPLOAD_MAX_AGE_DAYS is None:
+        return 0, 0
+    cutoff = timezone.now() - timedelta(days=settings.UPLOAD_MAX_AGE_DAYS)
+    expired = VideoTask.objects.filter(
+        task_type='file', file_path__isnull=False, created_at__lt=cutoff
+    ).exclude(status__in=VideoTask.ACTIVE_STATUSES).values_list('id', 'file_path')
+
+    files = freed = 0
+    for task_id, path in expired.iterator():
+        if not is_upload(path):
+            continue
+        files += 1
+        if dry_run:
+            freed += _file_size(path)
+            continue
+        freed += delete_upload(path, exclude_task_id=task_id)
+        _forget_upload(task_id)
+    return files, freed
+
+
+def expire_upload_sessions(dry_run=False):
+    """Discard chunked uploads left unfinished for UPLOAD_SESSION_MAX_AGE_HOURS, returns how many"""
+    cutoff = timezone.now() - timedelta(hours=settings.UPLOAD_SESSION_MAX_AGE_HOURS)
+    stale = UploadSession.objects.filter(status='uploading', updated_at__lt=cutoff)
+    if dry_run:
+        return stale.count()
+    count = 0
+    for session in stale.iterator():
+        uploads.discard_session(session)
+        count += 1
+    # Completed sessions only make complete idempotent for retrying clients
+    UploadSession.objects.filter(status='completed', updated_at__lt=cutoff).delete()
+    return count
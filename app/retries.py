@@ -0,0 +1,75 @@
+"""Automatic retries of failed pipeline stages with per-stage exponential backoff.
+
+Only errors that look temporary are retried: network trouble, timeouts,
+rate limits and 5xx responses from the download sites or the LLM API.
+Stage outputs are checkpointed on the task, so a retry (automatic or from
+the retry endpoint) resumes where the failed attempt stopped: a saved
+transcript skips straight to summarizing, and media already downloaded into
+the task workspace skips the download.
+"""
+import random
+import sys
+
+from django.conf import settings
+
+# HTTP statuses worth retrying: timeouts, rate limits and server errors
+TRANSIENT_STATUSES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class StageFailed(Exception):
+    """A pipeline stage failed; ``transient`` failures may be retried"""
+
+    def __init__(self, stage, message, transient=False):
+        super().__init__(message)
+        self.stage = stage
+        self.transient = transient
+
+
+def _causes(error):
+    """``error`` followed by the exceptions it wraps (yt-dlp keeps them in exc_info / cause)"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        exc_info = getattr(error, 'exc_info', None)
+        error = (
+            (exc_info[1] if exc_info else None)
+            or getattr(error, 'cause', None)
+            or error.__cause__
+            or error.__context__
+        )
+
+
+def is_transient(error):
+    """Whether ``error`` is likely to go away if the same request is made again later"""
+    # Errors of a library that was never imported cannot occur, so it is not imported here
+    openai = sys.modules.get('openai')
+    download_errors = sys.modules.get('yt_dlp.networking.exceptions')
+    for cause in _causes(error):
+        if openai is not None:
+            if isinstance(cause, (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)):
+                return True
+            if isinstance(cause, openai.APIStatusError):
+                return cause.status_code in TRANSIENT_STATUSES
+        if download_errors is not None:
+            if isinstance(cause, download_errors.HTTPError):
+                return cause.status in TRANSIENT_STATUSES
+            if isinstance(cause, download_errors.TransportError):
+                return True
+        if isinstance(cause, (ConnectionError, TimeoutError)):
+            return True
+    return False
+
+
+def retry_limit(stage):
+    return settings.TASK_RETRY_LIMITS.get(stage, 0)
+
+
+def backoff_seconds(stage, attempt):
+    """Delay before retry number ``attempt`` (1-based) of ``stage``"""
+    delay = min(
+        settings.TASK_RETRY_BACKOFF_SECONDS.get(stage, 30) * 2 ** (attempt - 1),
+        settings.TASK_RETRY_MAX_DELAY_SECONDS,
+    )
+    # Jitter spreads out tasks that failed together, e.g. during an API outage
+    return delay / 2 + random.uniform(0, delay / 2)
@@ -0,0 +1,122 @@
+import threading
+import time
+from queue import Empty
+
+
+def job_key(task_data):
+    """Queue key of a job: summary-only jobs by their version, so they never displace their task's own job"""
+    if task_data['type'] == 'summary':
+        return ('summary', task_data['version_id'])
+    return ('task', task_data['task_id'])
+
+
+class PriorityTaskQueue:
+    """Shortest-job-first task queue with aging.
+
+    Exposes the subset of the ``queue.Queue`` interface the worker relies on
+    (``put``/``get``/``task_done``/``qsize``). Every waiting task gets a score
+
+        score = duration - aging_rate * waited_seconds - priority * priority_weight
+
+    and the lowest score is served first, so short jobs jump ahead while long
+    jobs keep gaining credit until they can no longer be starved.
+    """
+
+    def __init__(self, default_duration=600, aging_rate=4.0, priority_weight=600):
+        self.default_duration = default_duration
+        self.aging_rate = aging_rate
+        self.priority_weight = priority_weight
+
+        self._entries = {}  # job_key() -> task_data
+        self._sequence = 0
+        self._unfinished = 0
+        self._cond = threading.Condition()
+        self.version = 0  # bumped whenever a task enters or leaves the queue
+
+    def _duration(self, task_data):
+        duration = task_data.get('duration')
+        return self.default_duration if duration is None else duration
+
+    def _score(self, task_data, now):
+        duration = self._duration(task_data)
+        waited = now - task_data['enqueued_at']
+        return (
+            duration
+            - self.aging_rate * waited
+            - task_data.get('priority', 0) * self.priority_weight
+        )
+
+    def _ordered(self, now):
+        return sorted(
+            self._entries.values(),
+            key=lambda data: (self._score(data, now), data['sequence'])
+        )
+
+    def put(self, task_data):
+        with self._cond:
+            task_data.setdefault('enqueued_at', time.monotonic())
+            task_data['sequence'] = self._sequence
+            self._sequence += 1
+            key = job_key(task_data)
+            if key not in self._entries:
+                self._unfinished += 1
+            self._entries[key] = task_data
+            self.version += 1
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Pop the best-scored task, raising queue.Empty after ``timeout``"""
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._entries, timeout=timeout):
+                raise Empty
+            best = self._ordered(time.monotonic())[0]
+            self.version += 1
+            return self._entries.pop(job_key(best))
+
+    def task_done(self):
+        with self._cond:
+            if self._unfinished <= 0:
+                raise ValueError('task_done() called too many times')
+            self._unfinished -= 1
+
+    def qsize(self):
+        with self._cond:
+            return len(self._entries)
+
+    def update(self, task_id, **fields):
+        """Update a waiting task (e.g. once its duration has been probed)"""
+        with self._cond:
+            task_data = self._entries.get(('task', task_id))
+            if task_data is None:
+                return False
+            task_data.update(fields)
+            return True
+
+    def remove(self, task_id):
+        """Drop a waiting task's own job (e.g. on cancellation), returning its data or None"""
+        with self._cond:
+            task_data = self._entries.pop(('task', task_id), None)
+            if task_data is not None:
+                self._unfinished -= 1
+                self.version += 1
+            return task_data
+
+    def positions(self):
+        """Map every waiting task id to the 1-based position it would be served at"""
+        with self._cond:
+            ordered = self._ordered(time.monotonic())
+        positions = {}
+        for index, task_data in enumerate(ordered):
+            # A task with several jobs waiting reports the earliest
+            positions.setdefault(task_data['task_id'], index + 1)
+        return positions
+
+    def backlog(self):
+        """``(task_id, duration)`` of every waiting task in serve order, unknown durations at the default"""
+        with self._cond:
+            ordered = self._ordered(time.monotonic())
+            return [(task_data['task_id'], self._duration(task_data)) for task_data in ordered]
+
+    def position(self, task_id):
+        """1-based position a waiting task would currently be served at"""
+        return self.positions().get(task_id)
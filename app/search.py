@@ -0,0 +1,155 @@
+"""Full-text search over task titles, transcripts and summaries.
+
+On SQLite the task table is indexed by an external-content FTS5 table
+(migration 0016) keyed by task id, with the trigram tokenizer where
+available so Chinese text matches without word segmentation. Triggers on
+the task table keep it current on every write, reindexing a row only when
+an indexed column changed, and the text itself is read back from the task
+table. Other databases, or an SQLite without FTS5, fall back to unranked
+``icontains`` filtering.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+FTS_TABLE = 'app_videotask_fts'
+
+# The trigram tokenizer cannot match terms shorter than three characters
+MIN_MATCH_LENGTH = 3
+SNIPPET_TOKENS = 24
+SNIPPET_CHARS = 60
+_MARK_START = '\x02'
+_MARK_END = '\x03'
+
+_available = None
+
+
+def is_available():
+    """Whether the FTS5 mirror table exists in the current database"""
+    global _available
+    if _available is None:
+        if connection.vendor != 'sqlite':
+            _available = False
+        else:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [FTS_TABLE]
+                )
+                _available = cursor.fetchone() is not None
+    return _available
+
+
+def parse_query(query):
+    """Split a query into terms; "double quoted" text stays one (phrase) term"""
+    terms = []
+    for quoted, bare in re.findall(r'"([^"]*)"|(\S+)', query):
+        term = (quoted or bare).strip()
+        if term:
+            terms.append(term)
+    return terms
+
+
+def _fts_string(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _highlight(text):
+    """HTML-escape a snippet and turn the match markers into <mark> tags"""
+    return html.escape(text).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def _python_snippet(values, terms):
+    """Snippet around the first occurrence of any term, for matches FTS5 did not rank"""
+    lowered_terms = [term.lower() for term in terms]
+    for text in values:
+        if not text:
+            continue
+        lowered = text.lower()
+        hits = [(lowered.find(term), term) for term in lowered_terms if term in lowered]
+        if not hits:
+            continue
+        position, term = min(hits)
+        start = max(0, position - SNIPPET_CHARS // 2)
+        end = min(len(text), position + len(term) + SNIPPET_CHARS // 2)
+        fragment = (
+            text[start:position] + _MARK_START + text[position:position + len(term)] + _MARK_END
+            + text[position + len(term):end]
+        )
+        return _highlight(('…' if start else '') + fragment + ('…' if end < len(text) else ''))
+    return ''
+
+
+def search(query, page=1, page_size=20):
+    """Return ``(total, hits)`` for one page of results, best matches first.
+
+    Each hit is ``{'id', 'snippet', 'score'}``; ``snippet`` is HTML-escaped
+    with the matches wrapped in ``<mark>``. All terms must match.
+    """
+    terms = parse_query(query)
+    if not terms:
+        return 0, []
+    offset = (page - 1) * page_size
+    if not is_available():
+        return _search_fallback(terms, offset, page_size)
+
+    long_terms = [term for term in terms if len(term) >= MIN_MATCH_LENGTH]
+    short_terms = [term for term in terms if len(term) < MIN_MATCH_LENGTH]
+
+    conditions = []
+    params = []
+    if long_terms:
+        conditions.append(f'{FTS_TABLE} MATCH %s')
+        params.append(' '.join(_fts_string(term) for term in long_terms))
+    for term in short_terms:
+        # Too short for the index; scan the mirror instead
+        escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        conditions.append(
+            "(title LIKE %s ESCAPE '\\' OR original_text LIKE %s ESCAPE '\\' OR summary LIKE %s ESCAPE '\\')"
+        )
+        params.extend([f'%{escaped}%'] * 3)
+    where = ' AND '.join(conditions)
+
+    if long_terms:
+        # Title hits weigh most, then the summary, then the transcript
+        select = (
+            f"rowid, snippet({FTS_TABLE}, -1, '{_MARK_START}', '{_MARK_END}', '…', {SNIPPET_TOKENS}), "
+            f"bm25({FTS_TABLE}, 10.0, 1.0, 3.0)"
+        )
+        order = 'ORDER BY 3'
+    else:
+        select = 'rowid, summary, original_text, title'
+        order = 'ORDER BY rowid DESC'
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT count(*) FROM {FTS_TABLE} WHERE {where}', params)
+        total = cursor.fetchone()[0]
+        cursor.execute(
+            f'SELECT {select} FROM {FTS_TABLE} WHERE {where} {order} LIMIT %s OFFSET %s',
+            params + [page_size, offset]
+        )
+        rows = cursor.fetchall()
+
+    if long_terms:
+        hits = [{'id': row[0], 'snippet': _highlight(row[1]), 'score': -row[2]} for row in rows]
+    else:
+        hits = [{'id': row[0], 'snippet': _python_snippet(row[1:], terms), 'score': None} for row in rows]
+    return total, hits
+
+
+def _search_fallback(terms, offset, limit):
+    from app.models import VideoTask
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(original_text__icontains=term) | Q(summary__icontains=term)
+    tasks = VideoTask.objects.filter(condition).order_by('-created_at')
+    total = tasks.count()
+    hits = [
+        {'id': task_id, 'snippet': _python_snippet((summary, original_text, title), terms), 'score': None}
+        for task_id, summary, original_text, title in tasks.values_list(
+            'id', 'summary', 'original_text', 'title'
+        )[offset:offset + limit]
+    ]
+    return total, hits
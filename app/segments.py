@@ -0,0 +1,154 @@
+"""Timestamped transcript segments in a compact, array-backed binary form.
+
+A transcript of a long recording has thousands of segments, so they are not
+kept as per-segment dicts or JSON. ``SegmentTable`` holds start/end times as
+packed uint32 milliseconds plus one UTF-8 text blob with an offset array;
+stored, that is 12 bytes per segment on top of the text. Ends are kept
+non-decreasing, so a time window is found with two binary searches.
+"""
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from app.models import TranscriptSegments
+
+# Packed arrays are stored little-endian whatever the host byte order
+_SWAP = sys.byteorder != 'little'
+_TIMESTAMP = re.compile(r'(?:(\d+):)?(\d{1,2}):(\d{2})[.,](\d{3})')
+_CUE_TIMING = re.compile(rf'({_TIMESTAMP.pattern})\s*-->\s*({_TIMESTAMP.pattern})')
+_CUE_TAG = re.compile(r'<[^>]*>')
+
+
+def _uint32_array(values=()):
+    data = array('I', values)
+    if data.itemsize != 4:
+        data = array('L', values)
+    return data
+
+
+def _pack(data):
+    if _SWAP:
+        data = array(data.typecode, data)
+        data.byteswap()
+    return data.tobytes()
+
+
+def _unpack(blob):
+    data = _uint32_array()
+    data.frombytes(bytes(blob))
+    if _SWAP:
+        data.byteswap()
+    return data
+
+
+class SegmentTable:
+    """Segments as parallel packed arrays; append in start order"""
+
+    def __init__(self):
+        self.starts = _uint32_array()  # milliseconds
+        self.ends = _uint32_array()
+        self.text_offsets = _uint32_array([0])  # segment i is text[offsets[i]:offsets[i + 1]]
+        self.text = bytearray()
+
+    def __len__(self):
+        return len(self.starts)
+
+    def append(self, start, end, text):
+        start_ms = max(0, round(start * 1000))
+        end_ms = max(start_ms, round(end * 1000))
+        if self.ends:
+            # Non-decreasing ends keep window lookups a binary search
+            end_ms = max(end_ms, self.ends[-1])
+        self.starts.append(start_ms)
+        self.ends.append(end_ms)
+        self.text.extend(text.strip().encode('utf-8'))
+        self.text_offsets.append(len(self.text))
+
+    def extend(self, segments, offset=0.0, time_map=None):
+        """Append Whisper-style ``{'start', 'end', 'text'}`` segments shifted by ``offset`` seconds.
+
+        ``time_map`` converts the segment times first, e.g. from trimmed audio
+        back to the untrimmed window.
+        """
+        for segment in segments:
+            start, end = segment['start'], segment['end']
+            if time_map is not None:
+                start, end = time_map(start), time_map(end)
+            self.append(start + offset, end + offset, segment['text'])
+
+    def segment(self, index):
+        text = self.text[self.text_offsets[index]:self.text_offsets[index + 1]].decode('utf-8')
+        return {'start': self.starts[index] / 1000, 'end': self.ends[index] / 1000, 'text': text}
+
+    def window(self, start=None, end=None):
+        """Segments overlapping ``[start, end)`` seconds, in order"""
+        first = 0 if start is None else bisect_right(self.ends, round(start * 1000))
+        last = len(self) if end is None else bisect_left(self.starts, round(end * 1000))
+        return [self.segment(index) for index in range(first, max(first, last))]
+
+    def to_fields(self):
+        return {
+            'count': len(self),
+            'starts': _pack(self.starts),
+            'ends': _pack(self.ends),
+            'text_offsets': _pack(self.text_offsets),
+            'text': bytes(self.text),
+        }
+
+    @classmethod
+    def from_record(cls, record):
+        table = cls()
+        table.starts = _unpack(record.starts)
+        table.ends = _unpack(record.ends)
+        table.text_offsets = _unpack(record.text_offsets)
+        table.text = bytearray(record.text)
+        return table
+
+
+def _seconds(match):
+    hours, minutes, seconds, millis = match.groups()
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+
+def parse_subtitles(content):
+    """Build a table from WebVTT or SRT cues; inline tags and repeated lines are dropped"""
+    table = SegmentTable()
+    previous = None
+    for block in re.split(r'\n\s*\n', content.replace('\r\n', '\n')):
+        lines = block.strip().split('\n')
+        for index, line in enumerate(lines):
+            timing = _CUE_TIMING.search(line)
+            if timing is None:
+                continue
+            start = _seconds(_TIMESTAMP.match(timing.group(1)))
+            end = _seconds(_TIMESTAMP.match(timing.group(6)))
+            cue_lines = [_CUE_TAG.sub('', cue).strip() for cue in lines[index + 1:]]
+            # Auto captions repeat the previous line as the first line of the next cue
+            text = ' '.join(cue for cue in cue_lines if cue and cue != previous)
+            if cue_lines and cue_lines[-1]:
+                previous = cue_lines[-1]
+            if text:
+                table.append(start, end, text)
+            break
+    return table
+
+
+def store(task_id, table):
+    """Save ``table`` as the segments of ``task_id``, replacing any earlier ones"""
+    TranscriptSegments.objects.update_or_create(task_id=task_id, defaults=table.to_fields())
+
+
+def load(task_id):
+    """The segment table of ``task_id``, or None if it has none"""
+    record = TranscriptSegments.objects.filter(task_id=task_id).first()
+    return SegmentTable.from_record(record) if record is not None else None
+
+
+def copy(source_task_id, task_id):
+    """Give ``task_id`` the segments of ``source_task_id`` (for reused transcripts)"""
+    record = TranscriptSegments.objects.filter(task_id=source_task_id).first()
+    if record is not None:
+        record.pk = task_id
+        record.task_id = task_id
+        record.save(force_insert=True)
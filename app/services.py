@@ -1,18 +1,29 @@
 import os
 import re
 import gc
+import itertools
 import threading
 import queue
+import subprocess
+import time
+import uuid
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-import yt_dlp
-from openai import OpenAI
 from django.conf import settings
+from django.utils import timezone
 # Simplified imports
-from app.models import UserSettings, VideoTask
+from app.models import SummaryVersion, UserSettings, VideoTask
+from app.scheduler import PriorityTaskQueue
+from app.cancellation import CancellationToken, TaskCancelled
+from app import admission, execution, languages, metrics, retention, retries, segments, workspace
 
-# Lazy imports to avoid CUDA initialization on startup
+# Lazy imports to avoid CUDA initialization on startup, and to keep
+# manage.py commands and web workers from paying for yt-dlp and openai
 torch = None
 whisper = None
+yt_dlp = None
+OpenAI = None
 
 def _import_torch():
     global torch
@@ -28,6 +39,20 @@ def _import_whisper():
         whisper = _whisper
     return whisper
 
+def _import_yt_dlp():
+    global yt_dlp
+    if yt_dlp is None:
+        import yt_dlp as _yt_dlp
+        yt_dlp = _yt_dlp
+    return yt_dlp
+
+def _import_openai():
+    global OpenAI
+    if OpenAI is None:
+        from openai import OpenAI as _OpenAI
+        OpenAI = _OpenAI
+    return OpenAI
+
 
 class AudioSummarizer:
     _instance = None
@@ -49,52 +74,92 @@ class AudioSummarizer:
         self.client = None
         self.device = None
         self.is_cuda_available = None  # Will be checked lazily
+        self.execution_plan = execution.current_plan()
         self.whisper_processor_lock = threading.Lock()
         
-        # Task queue management
-        self.task_queue = queue.Queue()
+        # Task queue management (shortest-job-first with aging)
+        self.task_queue = PriorityTaskQueue(
+            default_duration=settings.TASK_QUEUE_DEFAULT_DURATION,
+            aging_rate=settings.TASK_QUEUE_AGING_RATE,
+            priority_weight=settings.TASK_QUEUE_PRIORITY_WEIGHT,
+        )
+        self.probe_executor = ThreadPoolExecutor(
+            max_workers=settings.DURATION_PROBE_WORKERS,
+            thread_name_prefix='duration-probe'
+        )
+        metrics.QUEUE_DEPTH.set_function(self.task_queue.qsize)
+        self.throughput = admission.Throughput(settings.ADMISSION_THROUGHPUT_WINDOW)
+        self.transcribed_seconds = 0  # audio decoded for Whisper by the running task
+        metrics.QUEUED_AUDIO_SECONDS.set_function(
+            lambda: sum(duration for _, duration in self.task_queue.backlog())
+        )
+        metrics.PIPELINE_THROUGHPUT.set_function(self.throughput.rate)
         self.current_task = None
+        self.current_cancel_token = None
+        self.retry_timers = {}  # task_id -> Timer that re-queues it after its backoff
+        self.housekeeping_thread = None
         self.worker_thread = None
+        self._worker_lock = threading.Lock()
         self.is_processing = False
         self.queue_lock = threading.Lock()
+        # Versions the queue/model status for ETags; the boot id keeps them unique across restarts
+        self.boot_id = uuid.uuid4().hex[:8]
+        self._state_versions = itertools.count(1)
+        self.state_version = 0
         
         # Auto-load model management
         self.auto_unload_timer = None
         self.auto_unload_delay = 10  # 10 seconds after last task completion
         
-        self._init_openai_client()
-        self._start_worker_thread()
+        # No database access or threads here: the OpenAI client is created by
+        # each task before it summarizes, and the worker starts with the first task
         self._initialized = True
     
     def _start_worker_thread(self):
         """Start the worker thread that processes tasks sequentially"""
-        if self.worker_thread is None or not self.worker_thread.is_alive():
-            self.worker_thread = threading.Thread(target=self._process_task_queue, daemon=True)
-            self.worker_thread.start()
+        with self._worker_lock:
+            if self.worker_thread is None or not self.worker_thread.is_alive():
+                self.worker_thread = threading.Thread(target=self._process_task_queue, daemon=True)
+                self.worker_thread.start()
     
     def _process_task_queue(self):
         """Process tasks from the queue one by one"""
+        execution.apply_process(self.execution_plan)
+        print(f"CPU 执行配置: {self.execution_plan}")
+        
         while True:
             try:
                 # Get next task from queue (blocks if empty)
                 task_data = self.task_queue.get(timeout=1)
+                started = time.monotonic()
+                self.transcribed_seconds = 0
+                cancel_token = CancellationToken()
                 
                 with self.queue_lock:
                     self.is_processing = True
                     self.current_task = task_data
+                    self.current_cancel_token = cancel_token
+                    self._bump_state_version()
+                metrics.QUEUE_WAIT.observe(time.monotonic() - task_data['enqueued_at'])
                 
                 # Cancel any pending auto-unload since we're about to process
                 self._cancel_auto_unload()
                 
-                # Auto-load model if needed
-                if self._should_auto_load_model():
+                # Auto-load model if needed (summary jobs never touch Whisper)
+                if task_data['type'] != 'summary' and self._should_auto_load_model():
                     self._auto_load_model_if_needed()
                 
                 # Process the task
                 if task_data['type'] == 'url':
-                    self._process_video_task_internal(task_data['task_id'])
+                    self._process_video_task_internal(task_data['task_id'], cancel_token)
                 elif task_data['type'] == 'file':
-                    self._process_file_task_internal(task_data['task_id'])
+                    self._process_file_task_internal(task_data['task_id'], cancel_token)
+                elif task_data['type'] == 'summary':
+                    self._process_summary_task_internal(
+                        task_data['task_id'], task_data['version_id'], cancel_token
+                    )
+                outcome = self._record_task_outcome(task_data)
+                self._record_throughput(outcome, time.monotonic() - started)
                 
                 # Mark task as done
                 self.task_queue.task_done()
@@ -102,6 +167,8 @@ class AudioSummarizer:
                 with self.queue_lock:
                     self.is_processing = False
                     self.current_task = None
+                    self.current_cancel_token = None
+                    self._bump_state_version()
                 
                 # Schedule auto-unload if no more tasks and auto-load is enabled
                 if self._should_auto_load_model() and self.task_queue.qsize() == 0:
@@ -121,18 +188,89 @@ class AudioSummarizer:
                 with self.queue_lock:
                     self.is_processing = False
                     self.current_task = None
+                    self.current_cancel_token = None
+                    self._bump_state_version()
     
-    def add_task_to_queue(self, task_id, task_type):
-        """Add a task to the processing queue"""
-        task_data = {
+    def _bump_state_version(self):
+        """Mark the queue/model status as changed, so clients' cached copies go stale"""
+        # next() on a count is atomic, unlike += from several threads
+        self.state_version = next(self._state_versions)
+    
+    def status_version(self):
+        """Opaque version of everything the queue and model status endpoints report"""
+        return f"{self.boot_id}.{self.task_queue.version}.{self.state_version}"
+    
+    def start_housekeeping(self):
+        """Start the thread that cleans up after a crash and expires old uploads.
+
+        Called by the server entry points (wsgi.py, asgi.py) rather than at
+        app setup, so manage.py commands and benchmarks never sweep media.
+        """
+        with self._worker_lock:
+            if self.housekeeping_thread is None:
+                self.housekeeping_thread = threading.Thread(target=self._housekeep, daemon=True)
+                self.housekeeping_thread.start()
+    
+    def _housekeep(self):
+        try:
+            # Leftovers of tasks that finished or crashed before a restart
+            workspace.sweep_orphans()
+        except Exception as e:
+            print(f"清理临时文件失败: {e}")
+        while True:
+            self._expire_uploads()
+            time.sleep(3600)
+    
+    def _expire_uploads(self):
+        """Enforce the upload age limit and drop abandoned chunked uploads"""
+        try:
+            files, freed = retention.expire_uploads()
+            if files:
+                print(f"已删除 {files} 个过期上传文件，释放 {freed / 1024 / 1024:.1f} MB")
+            sessions = retention.expire_upload_sessions()
+            if sessions:
+                print(f"已清理 {sessions} 个未完成的分片上传")
+        except Exception as e:
+            print(f"删除过期上传文件失败: {e}")
+    
+    @staticmethod
+    def _make_task_data(task_id, task_type, priority=0, duration=None):
+        return {
             'task_id': task_id,
             'type': task_type,
-            'added_at': threading.current_thread().ident
+            'added_at': threading.current_thread().ident,
+            'priority': priority,
+            'duration': duration,
         }
+    
+    @staticmethod
+    def _record_task_outcome(task_data):
+        if task_data['type'] == 'summary':
+            outcome = SummaryVersion.objects.filter(id=task_data['version_id']).values_list('status', flat=True).first()
+        else:
+            outcome = VideoTask.objects.filter(id=task_data['task_id']).values_list('status', flat=True).first()
+        metrics.TASKS_FINISHED.inc(type=task_data['type'], outcome=outcome or 'deleted')
+        return outcome
+    
+    def _record_throughput(self, outcome, wall_seconds):
+        """Feed the admission control estimate with the audio Whisper actually got through.
+
+        Failed and cancelled runs, subtitle-only tasks and summary jobs take
+        worker time but add no audio.
+        """
+        audio_seconds = self.transcribed_seconds if outcome == 'completed' else 0
+        self.throughput.record(audio_seconds, wall_seconds)
+    
+    def add_task_to_queue(self, task_id, task_type):
+        """Add a task to the processing queue"""
+        task_data = self._make_task_data(task_id, task_type)
         
         # Update task status to queued if not already processing
+        task = None
         try:
             task = VideoTask.objects.get(id=task_id)
+            task_data['priority'] = task.priority
+            task_data['duration'] = task.duration
             if not self.is_processing or self.task_queue.qsize() > 0:
                 task.status = 'pending'
                 task.progress = 0
@@ -142,9 +280,222 @@ class AudioSummarizer:
         
         self.task_queue.put(task_data)
         
+        # Probe the duration in the background so scheduling can favor short jobs
+        if task is not None and task.duration is None:
+            self.probe_executor.submit(self._probe_and_reschedule, task_id)
+        
         # Ensure worker thread is running
         self._start_worker_thread()
     
+    def add_summary_to_queue(self, version):
+        """Queue a summary-only job that fills ``version`` from its task's stored transcript"""
+        task_data = self._make_task_data(version.task_id, 'summary', version.task.priority)
+        task_data['version_id'] = version.id
+        # Only an LLM call, so it is scheduled like the shortest possible job
+        task_data['duration'] = 0
+        self.task_queue.put(task_data)
+        self._start_worker_thread()
+    
+    def cancel_task(self, task_id, reason='cancelled'):
+        """Cancel a pending or running task, returns True if it was still active"""
+        with self.queue_lock:
+            removed = self.task_queue.remove(task_id) is not None
+            retry_timer = self.retry_timers.pop(task_id, None)
+            if retry_timer is not None:
+                # Waiting out a retry backoff counts as queued
+                retry_timer.cancel()
+                removed = True
+            running = self.current_task is not None and self.current_task['task_id'] == task_id
+            if running:
+                # The worker notices at its next checkpoint and cleans up
+                self.current_cancel_token.cancel(reason)
+        
+        updated = VideoTask.objects.filter(
+            id=task_id, status__in=VideoTask.ACTIVE_STATUSES
+        ).update(status='cancelled', primary_task=None, updated_at=timezone.now())
+        if removed or running:
+            self._promote_follower(task_id)
+        return removed or running or updated > 0
+    
+    def _promote_follower(self, task_id):
+        """Hand the work of a cancelled primary task over to its oldest follower"""
+        follower = VideoTask.objects.filter(
+            primary_task_id=task_id, status__in=VideoTask.ACTIVE_STATUSES
+        ).order_by('created_at').first()
+        if follower is None:
+            return None
+        
+        VideoTask.objects.filter(primary_task_id=task_id).exclude(id=follower.id).update(
+            primary_task=follower, updated_at=timezone.now()
+        )
+        follower.primary_task = None
+        follower.status = 'pending'
+        follower.progress = 0
+        follower.save()
+        self.add_task_to_queue(follower.id, follower.task_type)
+        print(f"任务 {task_id} 已取消，由重复提交的任务 {follower.id} 接替处理")
+        return follower
+    
+    def retry_task(self, task):
+        """Re-queue a failed or cancelled task; it resumes from its checkpoints"""
+        task.status = 'pending'
+        task.progress = 0
+        task.error_message = ''
+        task.retry_stage = ''
+        task.retry_count = 0
+        task.save()
+        self.add_task_to_queue(task.id, task.task_type)
+    
+    def _fail_or_retry(self, task_id, error):
+        """Schedule another attempt of a failed stage after its backoff, or fail the task"""
+        task = VideoTask.objects.filter(id=task_id).first()
+        if task is None:
+            return
+        attempt = task.retry_count + 1 if task.retry_stage == error.stage else 1
+        if not error.transient or attempt > retries.retry_limit(error.stage):
+            task.mark_failed(str(error))
+            return
+        
+        delay = retries.backoff_seconds(error.stage, attempt)
+        task.status = 'pending'
+        task.retry_stage = error.stage
+        task.retry_count = attempt
+        task.error_message = f"{error}（{delay:.0f} 秒后第 {attempt} 次重试）"
+        task.save()
+        metrics.TASK_RETRIES.inc(stage=error.stage)
+        print(f"任务 {task_id} 的 {error.stage} 阶段失败，{delay:.0f} 秒后重试: {error}")
+        
+        timer = threading.Timer(delay, self._requeue_retry, args=(task_id, task.task_type))
+        timer.daemon = True
+        with self.queue_lock:
+            self.retry_timers[task_id] = timer
+        timer.start()
+    
+    def _requeue_retry(self, task_id, task_type):
+        with self.queue_lock:
+            if self.retry_timers.pop(task_id, None) is None:
+                return  # Cancelled while waiting
+        if VideoTask.objects.filter(id=task_id, status='pending').exists():
+            self.add_task_to_queue(task_id, task_type)
+    
+    def boost_priority(self, task_id, priority):
+        """Raise a task's priority, e.g. when a more urgent duplicate coalesces into it"""
+        VideoTask.objects.filter(id=task_id, priority__lt=priority).update(
+            priority=priority, updated_at=timezone.now()
+        )
+        self.task_queue.update(task_id, priority=priority)
+    
+    def _finish_cancelled_task(self, task_id, cancel_token):
+        """Record a cancellation once the worker has stopped working on the task"""
+        print(f"任务已取消: {task_id}")
+        tasks = VideoTask.objects.filter(id=task_id)
+        if cancel_token.reason == 'deleted':
+            # A stage save may have raced with the delete and re-inserted the row
+            tasks.delete()
+        else:
+            tasks.update(status='cancelled', updated_at=timezone.now())
+    
+    def add_tasks_to_queue(self, tasks):
+        """Queue freshly created (still pending) tasks without re-reading them"""
+        for task in tasks:
+            self.task_queue.put(self._make_task_data(
+                task.id, task.task_type, task.priority, task.duration
+            ))
+            if task.duration is None:
+                self.probe_executor.submit(self._probe_and_reschedule, task.id)
+        
+        self._start_worker_thread()
+    
+    def get_queue_position(self, task_id):
+        """Get the position a pending task will be processed at"""
+        return self.task_queue.position(task_id)
+    
+    def get_queue_positions(self):
+        """Get the processing position of every pending task"""
+        return self.task_queue.positions()
+    
+    def _probe_and_reschedule(self, task_id):
+        """Probe a queued task's duration, store it and re-score the task"""
+        try:
+            task = VideoTask.objects.get(id=task_id)
+            if task.task_type == 'url':
+                duration = AudioSummarizer.probe_url_duration(task.url)
+            else:
+                duration = AudioSummarizer.probe_file_duration(task.file_path)
+            if duration is None:
+                return
+            VideoTask.objects.filter(id=task_id, duration__isnull=True).update(
+                duration=duration, updated_at=timezone.now()
+            )
+            self.task_queue.update(task_id, duration=duration)
+        except Exception as e:
+            print(f"探测任务时长失败 ({task_id}): {e}")
+    
+    @staticmethod
+    def probe_url_duration(video_url):
+        """Read the duration (seconds) from yt-dlp metadata without downloading"""
+        yt_dlp = _import_yt_dlp()
+        with yt_dlp.YoutubeDL({'skip_download': True, 'quiet': True}) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+        duration = info.get('duration')
+        return int(duration) if duration else None
+    
+    @staticmethod
+    def expand_playlist(playlist_url, _nested=False):
+        """List the entries of a playlist/channel URL using flat extraction.
+
+        Returns dicts with ``url``, ``title`` and ``duration`` (when yt-dlp
+        reports it); a plain video URL expands to itself.
+        """
+        options = {'extract_flat': 'in_playlist', 'skip_download': True, 'quiet': True}
+        yt_dlp = _import_yt_dlp()
+        with yt_dlp.YoutubeDL(options) as ydl:
+            info = ydl.extract_info(playlist_url, download=False)
+        
+        if info.get('_type') not in ('playlist', 'multi_video'):
+            return [{
+                'url': info.get('webpage_url') or playlist_url,
+                'title': info.get('title'),
+                'duration': info.get('duration'),
+            }]
+        
+        entries = []
+        for entry in info.get('entries') or []:
+            if not entry:
+                continue
+            url = entry.get('webpage_url') or entry.get('url')
+            if not url:
+                continue
+            is_nested = entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab'
+            if is_nested:
+                # Channels list their tabs (videos, shorts, ...) as nested playlists
+                if not _nested:
+                    entries.extend(AudioSummarizer.expand_playlist(url, _nested=True))
+                continue
+            entries.append({
+                'url': url,
+                'title': entry.get('title'),
+                'duration': entry.get('duration'),
+            })
+        return entries
+    
+    @staticmethod
+    def probe_file_duration(file_path):
+        """Read the duration (seconds) of a local media file with ffprobe"""
+        result = subprocess.run(
+            [
+                'ffprobe', '-v', 'error',
+                '-show_entries', 'format=duration',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                file_path,
+            ],
+            capture_output=True, text=True, timeout=30
+        )
+        try:
+            return int(float(result.stdout.strip()))
+        except ValueError:
+            return None
+    
     def get_queue_status(self):
         """Get current queue status"""
         with self.queue_lock:
@@ -275,7 +626,7 @@ class AudioSummarizer:
     def _init_openai_client(self):
         user_settings = UserSettings.get_settings()
         if user_settings.openai_api_key:
-            self.client = OpenAI(
+            self.client = _import_openai()(
                 api_key=user_settings.openai_api_key,
                 base_url=user_settings.openai_base_url or "https://api.openai.com/v1"
             )
@@ -316,6 +667,7 @@ class AudioSummarizer:
             print(f"卸载现有模型: {self.model_name}")
             self.unload_whisper_model()
 
+        load_started = time.perf_counter()
         try:
             self.device = self._get_device(device_setting)
             self.model_name = model_name
@@ -324,15 +676,18 @@ class AudioSummarizer:
             if self.device == 'cuda' and not self._test_cuda_functionality():
                 print("CUDA test failed, falling back to CPU")
                 self.device = 'cpu'
+            self._bump_state_version()
             
             print(f"Loading Whisper model '{model_name}' on device '{self.device}'")
             
             # Import whisper only when needed
             whisper = _import_whisper()
             torch = _import_torch()
+            execution.apply_torch(self.execution_plan, torch)
             
             # Load model with explicit device specification
             self.whisper_model = whisper.load_model(model_name, device=self.device)
+            self._bump_state_version()
             
             # Verify the model is on the correct device
             if hasattr(self.whisper_model, 'device'):
@@ -347,6 +702,8 @@ class AudioSummarizer:
             
             result = f"{model_name} ({self.device.upper()})"
             print(f"Model loading completed: {result}")
+            metrics.MODEL_LOADS.inc(model=model_name, device=self.device)
+            metrics.MODEL_LOAD_DURATION.observe(time.perf_counter() - load_started)
             return result
         except Exception as e:
             self.unload_whisper_model()
@@ -354,6 +711,8 @@ class AudioSummarizer:
 
     def unload_whisper_model(self):
         """Properly unload Whisper model and free memory"""
+        was_loaded = self.whisper_model is not None
+        unload_started = time.perf_counter()
         if self.whisper_model is not None:
             # Move model to CPU before deletion if it was on CUDA
             if hasattr(self.whisper_model, 'to') and self.device == 'cuda':
@@ -369,6 +728,7 @@ class AudioSummarizer:
         self.whisper_model = None
         self.model_name = None
         self.device = None
+        self._bump_state_version()
         
         # Force memory cleanup
         gc.collect()
@@ -379,6 +739,10 @@ class AudioSummarizer:
             if torch.cuda.is_available():
                 torch.cuda.empty_cache()
                 torch.cuda.synchronize()
+        
+        if was_loaded:
+            metrics.MODEL_UNLOADS.inc()
+            metrics.MODEL_UNLOAD_DURATION.observe(time.perf_counter() - unload_started)
             
     def get_model_status(self):
         """Get current model status with device info"""
@@ -391,20 +755,28 @@ class AudioSummarizer:
         return f"{self.model_name} ({device_info}){cuda_info}"
 
     @staticmethod
-    def download_youtube_sub_or_audio(video_url, output_path="media/temp"):
-        os.makedirs(output_path, exist_ok=True)
+    def download_youtube_sub_or_audio(video_url, output_path, cancel_token=None):
+        """Download subtitles, or else the audio track, into the task workspace ``output_path``"""
+        yt_dlp = _import_yt_dlp()
+        cancel_token = cancel_token or CancellationToken()
+        # yt-dlp calls progress hooks for every downloaded fragment
+        progress_hooks = [lambda progress: cancel_token.raise_if_cancelled()]
         
         video_info = {
             "id": None,
             "title": None,
             "webpage_url": None,
+            "duration": None,
             "subtitles_path": None,
             "audio_path": None,
-            "error_info": None
+            "language": None,
+            "error_info": None,
+            "error_transient": False
         }
         
         try:
-            with yt_dlp.YoutubeDL({'skip_download': True}) as ydl:
+            with yt_dlp.YoutubeDL({'skip_download': True}) as ydl, \
+                    metrics.STAGE_DURATION.time(stage='metadata'):
                 info = ydl.extract_info(video_url, download=False)
                 subtitles = info.get('subtitles', {})
                 has_subs = len(subtitles) > 0 and "live_chat" not in subtitles
@@ -412,8 +784,14 @@ class AudioSummarizer:
                 video_info["id"] = info.get('id')
                 video_info["title"] = info.get('title')
                 video_info["webpage_url"] = info.get('webpage_url')
+                video_info["duration"] = info.get('duration')
+                video_info["language"] = languages.resolve(
+                    info.get('language'),
+                    languages.caption_language(info.get('automatic_captions'), subtitles)
+                )
 
-            options = {}
+            cancel_token.raise_if_cancelled()
+            options = {'progress_hooks': progress_hooks}
             if has_subs:
                 all_subs = {**subtitles}
                 first_lang = next(iter(all_subs.keys()), None)
@@ -422,64 +800,172 @@ class AudioSummarizer:
                         'writesubtitles': True,
                         'subtitleslangs': [first_lang],
                         'writeautomaticsub': True,
-                        'outtmpl': f'{output_path}/subtitles_{info.get("id")}.%(ext)s',
+                        'outtmpl': f'{output_path}/subtitles.%(ext)s',
                         'skip_download': True
                     })
-                    with yt_dlp.YoutubeDL(options) as ydl:
-                        video_info["subtitles_path"] = f'{output_path}/subtitles_{info.get("id")}.{first_lang}.vtt'
-                        ydl.download([video_url])
-                    return video_info
+                    with yt_dlp.YoutubeDL(options) as ydl, \
+                            metrics.STAGE_DURATION.time(stage='download'):
+                        result = ydl.extract_info(video_url, download=True)
+                    # yt-dlp reports where it wrote each file; no need to search for it
+                    subtitle = (result.get('requested_subtitles') or {}).get(first_lang) or {}
+                    if subtitle.get('filepath') and os.path.exists(subtitle['filepath']):
+                        video_info["subtitles_path"] = subtitle['filepath']
+                        return video_info
 
+            # Never let a single download push media/temp past its quota
+            budget = workspace.download_budget_bytes()
             options.update({
                 'format': 'bestaudio/best',
-                'outtmpl': f'{output_path}/audio_{info.get("id")}.%(ext)s'
+                'outtmpl': f'{output_path}/audio.%(ext)s',
+                'writesubtitles': False,
+                'writeautomaticsub': False,
+                'skip_download': False,
+                'max_filesize': max(budget, 1)
             })
-            with yt_dlp.YoutubeDL(options) as ydl:
-                ydl.download([video_url])
+            with yt_dlp.YoutubeDL(options) as ydl, \
+                    metrics.STAGE_DURATION.time(stage='download'):
+                result = ydl.extract_info(video_url, download=True)
 
-            for root, dirs, files in os.walk(output_path):
-                for file in files:
-                    if file.startswith(f"audio_{info.get('id')}"):
-                        video_info["audio_path"] = os.path.join(root, file)
-                        return video_info
+            downloads = result.get('requested_downloads') or [{}]
+            audio_path = downloads[0].get('filepath')
+            if audio_path and os.path.exists(audio_path):
+                video_info["audio_path"] = audio_path
+                return video_info
 
-            video_info["error_info"] = "音频或字幕下载失败"
+            size = result.get('filesize') or result.get('filesize_approx')
+            if size and size > budget:
+                video_info["error_info"] = "音频文件超出临时目录配额"
+            else:
+                video_info["error_info"] = "音频或字幕下载失败"
             return video_info
+        except TaskCancelled:
+            raise
         except Exception as e:
             video_info["error_info"] = str(e)
+            video_info["error_transient"] = retries.is_transient(e)
             return video_info
 
-    def extract_info_from_sub_or_audio(self, video_info):
+    def _detect_language(self, samples):
+        """Detect the spoken language from the first 30 seconds of ``samples``"""
+        whisper = _import_whisper()
+        if not getattr(self.whisper_model, 'is_multilingual', True):
+            return 'en'
+        with metrics.STAGE_DURATION.time(stage='detect_language'):
+            mel = whisper.log_mel_spectrogram(
+                whisper.pad_or_trim(samples), n_mels=self.whisper_model.dims.n_mels
+            ).to(self.whisper_model.device)
+            _, probs = self.whisper_model.detect_language(mel)
+        return max(probs, key=probs.get)
+
+    def _transcribe_in_windows(self, audio_path, cancel_token=None, language=None):
+        """Transcribe fixed-size windows so cancellation is honoured between them.
+
+        Windows are streamed from ffmpeg rather than decoded up front, so memory
+        stays bounded by the window size however long the input is.
+        ``language`` is a hint; without a usable one it is detected once, on the
+        first window with speech. With VAD enabled, silence is cut from each
+        window before Whisper sees it. Returns the text, a SegmentTable with
+        timestamps relative to the whole file, the language used and the
+        fraction of audio trimmed (None without VAD).
+        """
+        whisper = _import_whisper()
+        # Both need numpy, which nothing else here does
+        from app import audio, vad
+        sample_rate = audio.SAMPLE_RATE
+        window = settings.TRANSCRIBE_WINDOW_SECONDS * sample_rate
+        transcribe_started = time.perf_counter()
+        vad_enabled = UserSettings.get_settings().vad_enabled
+        
+        if language not in whisper.tokenizer.LANGUAGES:
+            language = None
+        texts = []
+        table = segments.SegmentTable()
+        total_samples = 0
+        kept_samples = 0
+        decode_seconds = 0.0
+        with closing(audio.iter_windows(audio_path, window, sample_rate)) as windows:
+            while True:
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+                decode_started = time.perf_counter()
+                chunk = next(windows, None)
+                decode_seconds += time.perf_counter() - decode_started
+                if chunk is None:
+                    break
+                start = total_samples
+                total_samples += len(chunk)
+                speech = None
+                if vad_enabled:
+                    with metrics.STAGE_DURATION.time(stage='vad'):
+                        speech = vad.detect_speech(chunk, sample_rate)
+                    kept_samples += speech.kept_samples
+                    if not speech.spans:
+                        continue  # Nothing but silence
+                    chunk = speech.apply(chunk)
+                if language is None:
+                    language = self._detect_language(chunk)
+                
+                result = self.whisper_model.transcribe(
+                    chunk,
+                    verbose=False,
+                    fp16=self.device == 'cuda',  # Use FP16 only on CUDA
+                    language=language,  # Resolved up front, so no window pays for detection
+                    # Carry context across the window boundary
+                    initial_prompt=texts[-1][-200:] if texts else None
+                )
+                texts.append(result["text"])
+                table.extend(
+                    result.get("segments") or [],
+                    offset=start / sample_rate,
+                    time_map=speech.to_original if speech is not None else None
+                )
+                del result, chunk
+        
+        audio_seconds = total_samples / sample_rate
+        trimmed_ratio = None
+        if vad_enabled and total_samples:
+            trimmed_ratio = 1 - kept_samples / total_samples
+            metrics.AUDIO_SECONDS_TRIMMED.inc((total_samples - kept_samples) / sample_rate)
+        # Decoding overlaps transcription now, so report the two apart
+        elapsed = time.perf_counter() - transcribe_started - decode_seconds
+        metrics.STAGE_DURATION.observe(decode_seconds, stage='decode')
+        metrics.TRANSCRIBE_LANGUAGE.inc(language=language or 'unknown')
+        metrics.STAGE_DURATION.observe(elapsed, stage='transcribe')
+        metrics.AUDIO_SECONDS_TRANSCRIBED.inc(audio_seconds)
+        self.transcribed_seconds += audio_seconds
+        metrics.TRANSCRIBE_WALL_SECONDS.inc(elapsed)
+        if elapsed > 0:
+            metrics.TRANSCRIBE_SPEED.set(audio_seconds / elapsed)
+        return "".join(texts), table, language, trimmed_ratio
+
+    def extract_info_from_sub_or_audio(self, video_info, cancel_token=None):
+        """Transcript of the downloaded audio or subtitles; ``video_info["language"]`` is a hint"""
         if self.whisper_model is None:
             return {"status": "error", "text": "Whisper模型尚未加载，请先加载模型"}
 
         if video_info["audio_path"]:
             try:
                 with self.whisper_processor_lock:
-                    # Transcribe with optimized settings
-                    result = self.whisper_model.transcribe(
-                        video_info["audio_path"], 
-                        verbose=False,
-                        fp16=self.device == 'cuda'  # Use FP16 only on CUDA
+                    transcribed_text, table, language, trimmed_ratio = self._transcribe_in_windows(
+                        video_info["audio_path"], cancel_token, video_info.get("language")
                     )
                     
-                    # Extract text and clean up result object
-                    transcribed_text = result["text"]
-                    
-                    # Delete segments and other large objects to save memory
-                    if "segments" in result:
-                        del result["segments"]
-                    if "language" in result:
-                        del result["language"]
-                    del result
-                    
                     # Force memory cleanup after transcription
                     gc.collect()
                     if self.device == 'cuda' and self._check_cuda_availability():
                         torch = _import_torch()
                         torch.cuda.empty_cache()
                     
-                return {"status": "success", "text": transcribed_text}
+                return {
+                    "status": "success",
+                    "text": transcribed_text,
+                    "segments": table,
+                    "language": language,
+                    "trimmed_ratio": trimmed_ratio
+                }
+            except TaskCancelled:
+                gc.collect()
+                raise
             except Exception as e:
                 # Clean up on error
                 gc.collect()
@@ -491,9 +977,14 @@ class AudioSummarizer:
         elif video_info["subtitles_path"]:
             try:
                 with open(video_info["subtitles_path"], "r", encoding="utf-8") as f:
-                    sub_info = f.read().split("\n")
-                sub_info = [line for line in sub_info if '-->' not in line]
-                return {"status": "success", "text": "\n".join(sub_info)}
+                    content = f.read()
+                sub_info = [line for line in content.split("\n") if '-->' not in line]
+                return {
+                    "status": "success",
+                    "text": "\n".join(sub_info),
+                    "segments": segments.parse_subtitles(content),
+                    "language": video_info.get("language")
+                }
             except Exception as e:
                 return {"status": "error", "text": f"读取字幕文件出错: {e}"}
 
@@ -502,47 +993,66 @@ class AudioSummarizer:
         else:
             return {"status": "error", "text": "未知错误"}
 
-    def summary_text_url(self, title, text):
+    def _chat_completion(self, model, messages):
+        """Call the chat completion API, recording latency and token usage"""
+        started = time.perf_counter()
+        try:
+            with metrics.STAGE_DURATION.time(stage='summarize'):
+                response = self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    stream=False
+                )
+        except Exception:
+            metrics.LLM_REQUESTS.inc(model=model, outcome='error')
+            raise
+        metrics.LLM_LATENCY.observe(time.perf_counter() - started, model=model)
+        metrics.LLM_REQUESTS.inc(model=model, outcome='success')
+        usage = getattr(response, 'usage', None)
+        if usage is not None:
+            metrics.LLM_TOKENS.inc(usage.prompt_tokens or 0, model=model, kind='prompt')
+            metrics.LLM_TOKENS.inc(usage.completion_tokens or 0, model=model, kind='completion')
+        return response.choices[0].message.content
+
+    def summary_text_url(self, title, text, prompt=None, model=None):
         if not self.llm_model_ready():
             return "error", "OpenAI模型尚未配置或出现错误"
 
         try:
             user_settings = UserSettings.get_settings()
-            response = self.client.chat.completions.create(
-                model=user_settings.openai_model,
-                messages=[
+            return "success", self._chat_completion(
+                model or user_settings.openai_model,
+                [
                     {
                         "role": "system",
-                        "content": user_settings.url_summary_prompt.format(title=title)
+                        "content": (prompt or user_settings.url_summary_prompt).format(title=title)
                     },
                     {
                         "role": "user",
                         "content": text
                     },
-                ],
-                stream=False
+                ]
             )
-            return "success", response.choices[0].message.content
         except Exception as e:
-            return "error", f"OpenAI 接口错误: {e}"
+            # "retry" marks errors that are likely to pass, e.g. timeouts and rate limits
+            return "retry" if retries.is_transient(e) else "error", f"OpenAI 接口错误: {e}"
 
-    def summary_text_audio(self, text):
+    def summary_text_audio(self, text, prompt=None, model=None):
         if not self.llm_model_ready():
             return "error", "OpenAI模型尚未配置或出现错误"
 
         try:
             user_settings = UserSettings.get_settings()
-            response = self.client.chat.completions.create(
-                model=user_settings.openai_model,
-                messages=[
-                    {"role": "system", "content": user_settings.summary_prompt},
+            return "success", self._chat_completion(
+                model or user_settings.openai_model,
+                [
+                    {"role": "system", "content": prompt or user_settings.summary_prompt},
                     {"role": "user", "content": text},
-                ],
-                stream=False
+                ]
             )
-            return "success", response.choices[0].message.content
         except Exception as e:
-            return "error", f"OpenAI 接口错误: {e}"
+            # "retry" marks errors that are likely to pass, e.g. timeouts and rate limits
+            return "retry" if retries.is_transient(e) else "error", f"OpenAI 接口错误: {e}"
 
     def llm_model_ready(self):
         user_settings = UserSettings.get_settings()
@@ -552,24 +1062,32 @@ class AudioSummarizer:
     def is_valid_url(url):
         valid_domains = ["youtube.com", "youtu.be", "bilibili.com", "b23.tv"]
         regex = re.compile(
-            r'^(https?://)?(www\.)?(' + '|'.join(re.escape(domain) for domain in valid_domains) + r')(/.*)?$'
+            r'^(https?://)?([\w-]+\.)*(' + '|'.join(re.escape(domain) for domain in valid_domains) + r')(/.*)?$'
         )
         return bool(regex.match(url))
 
     @staticmethod
-    def cleanup_temp_files(video_info):
-        try:
-            if video_info.get("audio_path") and os.path.exists(video_info["audio_path"]):
-                os.remove(video_info["audio_path"])
-            if video_info.get("subtitles_path") and os.path.exists(video_info["subtitles_path"]):
-                os.remove(video_info["subtitles_path"])
-        except Exception as e:
-            print(f"清理临时文件失败: {e}")
+    def _resume_download(task):
+        """video_info for media an earlier attempt already downloaded, or None"""
+        path = task.download_path
+        if not path or not os.path.exists(path) or Path(path).parent != workspace.workspace_path(task.id):
+            return None
+        print(f"任务 {task.id} 复用已下载的文件: {path}")
+        is_subtitles = Path(path).name.startswith('subtitles.')
+        return {
+            "audio_path": None if is_subtitles else path,
+            "subtitles_path": path if is_subtitles else None,
+            "error_info": None
+        }
 
-    def _process_video_task_internal(self, task_id):
+    def _process_video_task_internal(self, task_id, cancel_token=None):
         """Internal method to process video URL tasks"""
+        cancel_token = cancel_token or CancellationToken()
+        keep_workspace = False
         try:
             task = VideoTask.objects.get(id=task_id)
+            if task.status == 'cancelled':
+                return
             
             # Load or reload Whisper model if needed (skip if auto-load already handled it)
             user_settings = UserSettings.get_settings()
@@ -588,63 +1106,91 @@ class AudioSummarizer:
                     )
             self._init_openai_client()
             
-            # Update status: downloading
-            task.status = 'downloading'
-            task.progress = 10
-            task.save()
-            
-            # Download video/audio
-            video_info = AudioSummarizer.download_youtube_sub_or_audio(task.url)
-            
-            if video_info["error_info"]:
-                task.mark_failed(video_info["error_info"])
-                return
-            
-            # Update title if we got it from video info
-            if video_info["title"]:
-                task.title = video_info["title"]
-                task.video_id = video_info["id"]
-            
-            task.status = 'transcribing'
-            task.progress = 40
-            task.save()
-            
-            # Transcribe audio
-            text_result = self.extract_info_from_sub_or_audio(video_info)
-            
-            if text_result["status"] == "error":
-                task.mark_failed(text_result["text"])
-                AudioSummarizer.cleanup_temp_files(video_info)
-                return
+            # A retry resumes after the last checkpointed stage
+            if not task.original_text:
+                video_info = self._resume_download(task)
+                if video_info is None:
+                    # Update status: downloading
+                    cancel_token.raise_if_cancelled()
+                    task.status = 'downloading'
+                    task.progress = 10
+                    task.save()
+                    
+                    # Wait for temp space instead of filling the volume, then download
+                    workspace.wait_for_space(cancel_token, keep={task_id})
+                    video_info = AudioSummarizer.download_youtube_sub_or_audio(
+                        task.url, workspace.create_workspace(task_id), cancel_token=cancel_token
+                    )
+                    
+                    if video_info["error_info"]:
+                        raise retries.StageFailed(
+                            'download', video_info["error_info"], video_info["error_transient"]
+                        )
+                    
+                    # Update title if we got it from video info
+                    if video_info["title"]:
+                        task.title = video_info["title"]
+                        task.video_id = video_info["id"]
+                    if video_info["duration"] and not task.duration:
+                        task.duration = int(video_info["duration"])
+                    # A per-task override wins over what the site reports
+                    task.language = languages.resolve(task.language, video_info["language"]) or ''
+                    task.download_path = video_info["audio_path"] or video_info["subtitles_path"]
+                
+                cancel_token.raise_if_cancelled()
+                task.status = 'transcribing'
+                task.progress = 40
+                task.save()
+                
+                # Transcribe audio
+                video_info["language"] = languages.resolve(task.language, user_settings.default_language)
+                text_result = self.extract_info_from_sub_or_audio(video_info, cancel_token)
+                
+                if text_result["status"] == "error":
+                    raise retries.StageFailed('transcribe', text_result["text"])
+                task.original_text = text_result["text"]
+                task.language = text_result["language"] or ''
+                task.trimmed_ratio = text_result.get("trimmed_ratio")
+                segments.store(task_id, text_result["segments"])
             
-            task.original_text = text_result["text"]
+            cancel_token.raise_if_cancelled()
             task.status = 'summarizing'
             task.progress = 70
             task.save()
             
             # Generate summary
-            summary_result = self.summary_text_url(task.title, text_result["text"])
-            
-            if summary_result[0] == "error":
-                task.mark_failed(summary_result[1])
-            else:
-                task.summary = summary_result[1]
-                task.mark_completed()
+            summary_result = self.summary_text_url(task.title, task.original_text)
             
-            # Cleanup
-            AudioSummarizer.cleanup_temp_files(video_info)
+            cancel_token.raise_if_cancelled()
+            if summary_result[0] != "success":
+                raise retries.StageFailed('summarize', summary_result[1], summary_result[0] == "retry")
+            task.summary = summary_result[1]
+            task.mark_completed()
             
+        except retries.StageFailed as e:
+            # The download is what a retry of the transcription resumes from
+            keep_workspace = e.stage == 'transcribe'
+            self._fail_or_retry(task_id, e)
+        except TaskCancelled:
+            self._finish_cancelled_task(task_id, cancel_token)
         except Exception as e:
             try:
                 task = VideoTask.objects.get(id=task_id)
                 task.mark_failed(f"处理任务时出错: {str(e)}")
             except:
                 pass
+        finally:
+            # Cleanup
+            if not keep_workspace:
+                workspace.remove_workspace(task_id)
 
-    def _process_file_task_internal(self, task_id):
+    def _process_file_task_internal(self, task_id, cancel_token=None):
         """Internal method to process file upload tasks"""
+        cancel_token = cancel_token or CancellationToken()
         try:
             task = VideoTask.objects.get(id=task_id)
+            if task.status == 'cancelled':
+                return
             
             # Load or reload Whisper model if needed (skip if auto-load already handled it)
             user_settings = UserSettings.get_settings()
@@ -663,33 +1209,50 @@ class AudioSummarizer:
                     )
             self._init_openai_client()
             
-            task.status = 'transcribing'
-            task.progress = 30
-            task.save()
-            
-            # Transcribe audio file
-            text_result = self.extract_info_from_sub_or_audio(
-                {"audio_path": task.file_path}
-            )
-            
-            if text_result["status"] == "error":
-                task.mark_failed(text_result["text"])
-                return
+            # A retry with a saved transcript goes straight to summarizing
+            if not task.original_text:
+                cancel_token.raise_if_cancelled()
+                task.status = 'transcribing'
+                task.progress = 30
+                task.save()
+                
+                # Transcribe audio file
+                text_result = self.extract_info_from_sub_or_audio({
+                    "audio_path": task.file_path,
+                    "language": languages.resolve(task.language, user_settings.default_language)
+                }, cancel_token)
+                
+                if text_result["status"] == "error":
+                    raise retries.StageFailed('transcribe', text_result["text"])
+                task.original_text = text_result["text"]
+                task.language = text_result["language"] or ''
+                task.trimmed_ratio = text_result.get("trimmed_ratio")
+                segments.store(task_id, text_result["segments"])
             
-            task.original_text = text_result["text"]
+            cancel_token.raise_if_cancelled()
             task.status = 'summarizing'
             task.progress = 70
             task.save()
             
+            # The transcript is saved, so the upload can be deleted or compacted
+            try:
+                retention.release_upload(task)
+            except Exception as e:
+                print(f"处理上传文件保留策略失败: {e}")
+            
             # Generate summary
-            summary_result = self.summary_text_audio(text_result["text"])
+            summary_result = self.summary_text_audio(task.original_text)
             
-            if summary_result[0] == "error":
-                task.mark_failed(summary_result[1])
-            else:
-                task.summary = summary_result[1]
-                task.mark_completed()
+            cancel_token.raise_if_cancelled()
+            if summary_result[0] != "success":
+                raise retries.StageFailed('summarize', summary_result[1], summary_result[0] == "retry")
+            task.summary = summary_result[1]
+            task.mark_completed()
                 
+        except retries.StageFailed as e:
+            self._fail_or_retry(task_id, e)
+        except TaskCancelled:
+            self._finish_cancelled_task(task_id, cancel_token)
         except Exception as e:
             try:
                 task = VideoTask.objects.get(id=task_id)
@@ -697,4 +1260,54 @@ class AudioSummarizer:
             except:
                 pass
 
+    def _process_summary_task_internal(self, task_id, version_id, cancel_token=None):
+        """Internal method to re-summarize a stored transcript into a new summary version"""
+        cancel_token = cancel_token or CancellationToken()
+        try:
+            version = SummaryVersion.objects.select_related('task').get(id=version_id)
+        except SummaryVersion.DoesNotExist:
+            return  # The task was deleted while the job waited
+        task = version.task
+        try:
+            self._init_openai_client()
+            version.status = 'summarizing'
+            version.save(update_fields=['status'])
+            
+            if task.task_type == 'url':
+                summary_result = self.summary_text_url(
+                    task.title, task.original_text, version.prompt, version.model
+                )
+            else:
+                summary_result = self.summary_text_audio(task.original_text, version.prompt, version.model)
+            
+            cancel_token.raise_if_cancelled()
+            if summary_result[0] != "success":
+                version.status = 'failed'
+                version.error_message = summary_result[1]
+                version.save(update_fields=['status', 'error_message'])
+                return
+            
+            version.status = 'completed'
+            version.summary = summary_result[1]
+            version.completed_at = timezone.now()
+            version.save(update_fields=['status', 'summary', 'completed_at'])
+            
+            # The newest version becomes the task's summary
+            task.refresh_from_db()
+            task.summary = version.summary
+            if task.status == 'completed':
+                task.save(update_fields=['summary', 'updated_at'])
+            else:
+                # A task whose own summary failed is complete now
+                task.mark_completed()
+        
+        except TaskCancelled:
+            # Only this version is abandoned; the task keeps its status and current summary
+            print(f"重新总结已取消: {task_id} #{version_id}")
+            SummaryVersion.objects.filter(id=version_id).update(status='failed', error_message='已取消')
+        except Exception as e:
+            SummaryVersion.objects.filter(id=version_id).update(
+                status='failed', error_message=f"处理任务时出错: {str(e)}"
+            )
+
     # Removed WebSocket progress updates for simplicity
\ No newline at end of file
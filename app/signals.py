@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from app import changes
+from app.models import VideoTask
+
+
+@receiver(post_delete, sender=VideoTask)
+def record_deleted_task(sender, instance, **kwargs):
+    """Tell clients polling /api/tasks/changes/ that the task is gone"""
+    changes.record_deletion(instance.id)
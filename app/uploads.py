@@ -0,0 +1,124 @@
+"""Resumable chunked uploads, written in place under media/uploads and hashed as they arrive.
+
+Each chunk is written at its offset in the final file, so nothing is spooled
+or copied. The running sha256 stays in memory between chunks; after a restart
+(or a failed chunk) it is rebuilt by re-reading the bytes already on disk.
+"""
+import hashlib
+import os
+import threading
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from app.models import UploadSession
+
+READ_SIZE = 1024 * 1024
+
+# session id -> (offset, sha256 of the bytes before offset)
+_hashers = {}
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+class UploadOffsetMismatch(Exception):
+    """The chunk does not start where the upload currently ends"""
+
+    def __init__(self, offset):
+        super().__init__(f'expected offset {offset}')
+        self.offset = offset
+
+
+class UploadTooLarge(Exception):
+    """The chunk would grow the file past its declared size"""
+
+
+def _session_lock(session_id):
+    with _locks_guard:
+        return _locks.setdefault(session_id, threading.Lock())
+
+
+def start_session(filename, size, sha256='', priority=0, language=''):
+    """Reserve the final file name and open an upload session for it"""
+    # Saving an empty file reserves a unique name the same way create_file_task does
+    name = default_storage.save(f'uploads/{os.path.basename(filename)}', ContentFile(b''))
+    return UploadSession.objects.create(
+        filename=filename,
+        file_path=default_storage.path(name),
+        size=size,
+        sha256=sha256,
+        priority=priority,
+        language=language,
+    )
+
+
+def _hasher_at(session):
+    """sha256 state covering the first ``session.received`` bytes of the file"""
+    state = _hashers.get(session.id)
+    if state is not None and state[0] == session.received:
+        return state[1]
+
+    hasher = hashlib.sha256()
+    remaining = session.received
+    with open(session.file_path, 'rb') as f:
+        while remaining > 0:
+            block = f.read(min(READ_SIZE, remaining))
+            if not block:
+                raise OSError(f'上传文件比已接收的字节数短: {session.file_path}')
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def append_chunk(session_id, offset, stream):
+    """Write ``stream`` at ``offset`` and return the updated session.
+
+    Raises UploadOffsetMismatch when ``offset`` is not where the upload ends,
+    so clients resume from the offset the server actually has.
+    """
+    with _session_lock(session_id):
+        session = UploadSession.objects.get(id=session_id)
+        if offset != session.received:
+            raise UploadOffsetMismatch(session.received)
+
+        # Work on a copy so a broken chunk leaves the saved state untouched
+        hasher = _hasher_at(session).copy()
+        position = offset
+        with open(session.file_path, 'r+b') as f:
+            f.seek(offset)
+            while True:
+                block = stream.read(READ_SIZE) if stream is not None else b''
+                if not block:
+                    break
+                if position + len(block) > session.size:
+                    raise UploadTooLarge()
+                f.write(block)
+                hasher.update(block)
+                position += len(block)
+
+        session.received = position
+        session.save(update_fields=['received', 'updated_at'])
+        _hashers[session.id] = (position, hasher)
+        return session
+
+
+def finish_session(session):
+    """Return the sha256 hex digest of a fully received upload and drop its state"""
+    with _session_lock(session.id):
+        digest = _hasher_at(session).hexdigest()
+        _hashers.pop(session.id, None)
+    with _locks_guard:
+        _locks.pop(session.id, None)
+    return digest
+
+
+def discard_session(session):
+    """Delete an unfinished upload and its partial file"""
+    _hashers.pop(session.id, None)
+    with _locks_guard:
+        _locks.pop(session.id, None)
+    try:
+        os.remove(session.file_path)
+    except FileNotFoundError:
+        pass
+    session.delete()
@@ -0,0 +1,148 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from urllib.request import Request, urlopen
+
+# Share short links that have to be followed to learn the real video URL
+SHORT_LINK_HOSTS = {'b23.tv'}
+SHORT_LINK_CACHE_SIZE = 1024
+# A batch follows its short links concurrently, and gives up on the rest after the deadline
+SHORT_LINK_RESOLVE_WORKERS = 8
+SHORT_LINK_BATCH_DEADLINE = 15
+_resolved_short_links = {}
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = {
+    'feature', 'si', 'pp', 'ab_channel', 'spm_id_from', 'vd_source',
+    'share_source', 'share_medium', 'share_plat', 'share_session_id',
+    'share_tag', 'share_from', 'bbid', 'ts', 'from_source', 'from_spmid',
+    'unique_k', 'timestamp', 'buvid', 'is_story_h5', 'mid', 'plat_id',
+    'up_id', 'fbclid', 'gclid',
+}
+
+YOUTUBE_ID_PATH = re.compile(r'^/(?:shorts|live|embed|v)/([\w-]{11})')
+BILIBILI_VIDEO_PATH = re.compile(r'^/video/((?:BV[\w]{10})|(?:av\d+))', re.IGNORECASE)
+
+
+def _clean_query(query):
+    params = [
+        (key, value) for key, value in parse_qsl(query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith('utm_')
+    ]
+    return urlencode(sorted(params))
+
+
+def canonicalize_url(url):
+    """Normalize a video URL so equivalent links compare equal.
+
+    youtu.be / m.youtube.com / shorts links collapse to ``watch?v=<id>``,
+    Bilibili video links keep only the BV/av id and part number, and
+    tracking parameters and fragments are dropped everywhere else.
+    """
+    url = url.strip()
+    if '://' not in url:
+        url = f'https://{url}'
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    for prefix in ('www.', 'm.', 'music.'):
+        if host.startswith(prefix):
+            host = host[len(prefix):]
+    path = parts.path.rstrip('/') or '/'
+    query = dict(parse_qsl(parts.query))
+
+    if host == 'youtu.be':
+        video_id = path.lstrip('/').split('/')[0]
+        return f'https://www.youtube.com/watch?v={video_id}'
+    if host == 'youtube.com':
+        match = YOUTUBE_ID_PATH.match(path)
+        if match:
+            return f'https://www.youtube.com/watch?v={match.group(1)}'
+        if path == '/watch' and query.get('v'):
+            return f'https://www.youtube.com/watch?v={query["v"]}'
+        if path == '/playlist' and query.get('list'):
+            return f'https://www.youtube.com/playlist?list={query["list"]}'
+        return urlunsplit(('https', 'www.youtube.com', path, _clean_query(parts.query), ''))
+
+    if host == 'bilibili.com':
+        match = BILIBILI_VIDEO_PATH.match(path)
+        if match:
+            canonical = f'https://www.bilibili.com/video/{match.group(1)}'
+            if query.get('p', '1') != '1':
+                canonical += f'?p={query["p"]}'
+            return canonical
+        return urlunsplit(('https', 'www.bilibili.com', path, _clean_query(parts.query), ''))
+
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, _clean_query(parts.query), ''))
+
+
+def _short_link(url):
+    """``url`` with a scheme if it is a share short link, else None"""
+    full_url = url if '://' in url else f'https://{url}'
+    if (urlsplit(full_url).hostname or '').lower() not in SHORT_LINK_HOSTS:
+        return None
+    return full_url
+
+
+def resolve_short_url(url, timeout=5):
+    """Follow the redirect of a share short link (b23.tv) to the real video URL.
+
+    Other URLs, and short links that cannot be resolved, are returned as is.
+    Successful resolutions are cached since a shared link arrives many times.
+    """
+    full_url = _short_link(url)
+    if full_url is None:
+        return url
+    if full_url in _resolved_short_links:
+        return _resolved_short_links[full_url]
+    for method in ('HEAD', 'GET'):
+        request = Request(full_url, method=method, headers={'User-Agent': 'Mozilla/5.0'})
+        try:
+            with urlopen(request, timeout=timeout) as response:
+                resolved = response.geturl()
+        except (OSError, ValueError):
+            continue
+        if len(_resolved_short_links) >= SHORT_LINK_CACHE_SIZE:
+            _resolved_short_links.clear()
+        _resolved_short_links[full_url] = resolved
+        return resolved
+    return url
+
+
+def submission_key(url):
+    """Canonical URL used to coalesce and de-duplicate submissions"""
+    return canonicalize_url(resolve_short_url(url.strip()))
+
+
+def submission_keys(urls, deadline=SHORT_LINK_BATCH_DEADLINE):
+    """``submission_key`` of each of ``urls``, taking at most about ``deadline`` seconds in total.
+
+    Short links are followed concurrently; those not resolved in time keep
+    the canonical form of the short link itself.
+    """
+    urls = [url.strip() for url in urls]
+    pending = set()
+    for url in urls:
+        full_url = _short_link(url)
+        if full_url is not None and full_url not in _resolved_short_links:
+            pending.add(url)
+    resolved = {}
+    if pending:
+        executor = ThreadPoolExecutor(
+            max_workers=min(SHORT_LINK_RESOLVE_WORKERS, len(pending)), thread_name_prefix='short-link'
+        )
+        futures = {executor.submit(resolve_short_url, url): url for url in pending}
+        done, _ = wait(futures, timeout=deadline)
+        # Lookups still running finish in the background and fill the cache for next time
+        executor.shutdown(wait=False, cancel_futures=True)
+        resolved = {futures[future]: future.result() for future in done}
+
+    keys = {}
+    for url in urls:
+        if url in resolved:
+            target = resolved[url]
+        elif url in pending:
+            target = url  # Not resolved in time
+        else:
+            target = resolve_short_url(url)  # Not a short link, or already cached
+        keys[url] = canonicalize_url(target)
+    return keys
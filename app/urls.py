@@ -1,15 +1,32 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import async_views, views
+
+# Under ASGI the hot read endpoints are served by async views (see VideoSummarizer/asgi.py)
+read_views = async_views if settings.ASGI_MODE else views
 
 urlpatterns = [
-    path('tasks/', views.get_tasks, name='get_tasks'),
+    path('tasks/', read_views.get_tasks, name='get_tasks'),
+    path('tasks/changes/', read_views.get_task_changes, name='get_task_changes'),
     path('tasks/create-url/', views.create_url_task, name='create_url_task'),
     path('tasks/create-file/', views.create_file_task, name='create_file_task'),
-    path('tasks/<int:task_id>/', views.get_task_detail, name='get_task_detail'),
+    path('tasks/create-batch/', views.create_batch_tasks, name='create_batch_tasks'),
+    path('tasks/search/', views.search_tasks, name='search_tasks'),
+    path('tasks/export/', views.export_tasks, name='export_tasks'),
+    path('tasks/<int:task_id>/', read_views.get_task_detail, name='get_task_detail'),
     path('tasks/<int:task_id>/delete/', views.delete_task, name='delete_task'),
+    path('tasks/<int:task_id>/cancel/', views.cancel_task, name='cancel_task'),
+    path('tasks/<int:task_id>/retry/', views.retry_task, name='retry_task'),
+    path('tasks/<int:task_id>/resummarize/', views.resummarize_task, name='resummarize_task'),
+    path('tasks/<int:task_id>/segments/', views.get_task_segments, name='get_task_segments'),
+    path('tasks/<int:task_id>/summaries/', views.get_summary_versions, name='get_summary_versions'),
+    path('uploads/init/', views.init_upload, name='init_upload'),
+    path('uploads/<uuid:upload_id>/', views.get_upload_status, name='get_upload_status'),
+    path('uploads/<uuid:upload_id>/append/', views.append_upload, name='append_upload'),
+    path('uploads/<uuid:upload_id>/complete/', views.complete_upload, name='complete_upload'),
     path('settings/', views.get_settings, name='get_settings'),
     path('settings/update/', views.update_settings, name='update_settings'),
     path('model/manage/', views.manage_whisper_model, name='manage_whisper_model'),
-    path('model/status/', views.get_model_status, name='get_model_status'),
-    path('queue/status/', views.get_queue_status, name='get_queue_status'),
+    path('model/status/', read_views.get_model_status, name='get_model_status'),
+    path('queue/status/', read_views.get_queue_status, name='get_queue_status'),
 ]
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""Energy-based voice activity detection, used to trim silence before Whisper.
+
+Frames whose RMS level stays within VAD_THRESHOLD_DB of the chunk's noise
+floor count as non-speech, unless they are louder than VAD_SPEECH_DB. Runs
+of them longer than VAD_MIN_SILENCE_SECONDS are cut, keeping VAD_PAD_SECONDS
+on each side so word onsets and endings survive. A chunk whose level hardly
+varies (a music bed, speech over steady noise, a noisy room) has no pauses
+to find and is kept whole; only digital silence goes regardless. A
+``SpeechMap`` maps times in the trimmed audio back to the chunk.
+"""
+import math
+from bisect import bisect_right
+
+import numpy as np
+from django.conf import settings
+
+FRAME_SECONDS = 0.03
+# Frames quieter than this are silence whatever the noise floor
+SILENCE_DB = -60.0
+NOISE_FLOOR_PERCENTILE = 10
+# The chunk's loud level, compared with the floor to tell pauses from steady audio
+LOUD_PERCENTILE = 90
+
+
+class SpeechMap:
+    """The sample spans of a chunk that are kept, and how trimmed time maps back to it"""
+
+    def __init__(self, spans, total_samples, sample_rate):
+        self.spans = spans  # [(start, end)] sample indices, sorted and disjoint
+        self.total_samples = total_samples
+        self.sample_rate = sample_rate
+        self._trimmed_starts = []  # where each span starts in the trimmed audio
+        kept = 0
+        for start, end in spans:
+            self._trimmed_starts.append(kept)
+            kept += end - start
+        self.kept_samples = kept
+
+    @property
+    def trimmed_ratio(self):
+        if not self.total_samples:
+            return 0.0
+        return 1 - self.kept_samples / self.total_samples
+
+    def apply(self, audio):
+        """The kept parts of ``audio``, joined"""
+        if self.spans == [(0, len(audio))]:
+            return audio
+        if not self.spans:
+            return audio[:0]
+        return np.concatenate([audio[start:end] for start, end in self.spans])
+
+    def to_original(self, seconds):
+        """Map a time in the trimmed audio to the same moment in the chunk"""
+        if not self.spans:
+            return seconds
+        sample = seconds * self.sample_rate
+        index = max(0, bisect_right(self._trimmed_starts, sample) - 1)
+        start, end = self.spans[index]
+        return (start + min(sample - self._trimmed_starts[index], end - start)) / self.sample_rate
+
+
+def frame_levels(audio, frame):
+    """RMS level in dBFS of each whole ``frame``-sample frame"""
+    count = len(audio) // frame
+    frames = np.asarray(audio[:count * frame], dtype=np.float32).reshape(count, frame)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def detect_speech(audio, sample_rate):
+    """SpeechMap for a chunk of mono float32 audio in [-1, 1]"""
+    total = len(audio)
+    frame = int(FRAME_SECONDS * sample_rate)
+    levels = frame_levels(audio, frame)
+    if len(levels) == 0:
+        return SpeechMap([(0, total)] if total else [], total, sample_rate)
+
+    floor, loud = np.percentile(levels, [NOISE_FLOOR_PERCENTILE, LOUD_PERCENTILE])
+    if loud - floor < settings.VAD_THRESHOLD_DB:
+        # Too steady to hold pauses: keep it all, unless it is all silence
+        voiced = levels > SILENCE_DB
+    else:
+        threshold = min(floor + settings.VAD_THRESHOLD_DB, settings.VAD_SPEECH_DB)
+        voiced = levels > max(threshold, SILENCE_DB)
+    min_frames = math.ceil(settings.VAD_MIN_SILENCE_SECONDS / FRAME_SECONDS)
+    pad = int(settings.VAD_PAD_SECONDS * sample_rate)
+
+    # Runs of silent frames as [start, end) frame indices
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], (~voiced).astype(np.int8), [0]))))
+    spans = []
+    kept_from = 0
+    for run_start, run_end in zip(edges[0::2], edges[1::2]):
+        if run_end - run_start < min_frames:
+            continue
+        # Leading and trailing silence needs no pad on the outer side
+        cut_start = int(run_start) * frame + pad if run_start > 0 else 0
+        cut_end = int(run_end) * frame - pad if run_end < len(levels) else total
+        if cut_end <= cut_start:
+            continue
+        if cut_start > kept_from:
+            spans.append((kept_from, cut_start))
+        kept_from = cut_end
+    if kept_from < total:
+        spans.append((kept_from, total))
+    return SpeechMap(spans, total, sample_rate)
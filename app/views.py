@@ -1,68 +1,307 @@
 import os
+import re
 import threading
+from datetime import datetime, timedelta
+from django.conf import settings as django_settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.exceptions import SuspiciousFileOperation
 from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.utils._os import safe_join
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.http import http_date
+from django.views.decorators.http import require_GET
+from django.views.static import was_modified_since
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from app.models import VideoTask, UserSettings
+from app.models import SummaryVersion, VideoTask, UploadSession, UserSettings
+from app import admission, changes, conditional, export, languages, metrics, retention, search, segments, uploads, workspace
 from app.services import AudioSummarizer
+from app.url_utils import submission_key, submission_keys
+
+# Serializes duplicate lookup + creation so concurrent duplicates coalesce
+_submission_lock = threading.Lock()
+
+# Content-hashed static file names from the collectstatic manifest, read on first use
+_hashed_static_names = None
+
+
+def _serialize_task(task):
+    return {
+        'id': task.id,
+        'title': task.title,
+        'url': task.url,
+        'task_type': task.task_type,
+        'status': task.status,
+        'progress': task.progress,
+        'priority': task.priority,
+        'duration': task.duration,
+        'language': task.language,
+        'trimmed_ratio': task.trimmed_ratio,
+        'primary_task': task.primary_task_id,
+        'original_text': task.original_text,
+        'summary': task.summary,
+        'error_message': task.error_message,
+        'retry_count': task.retry_count,
+        'created_at': task.created_at,
+        'updated_at': task.updated_at,
+        'completed_at': task.completed_at,
+    }
+
+
+def _parse_priority(data):
+    """Read the optional integer priority from request data (higher runs sooner)"""
+    value = data.get('priority')
+    if value in (None, ''):
+        return 0
+    priority = int(value)
+    if abs(priority) > django_settings.TASK_QUEUE_MAX_PRIORITY:
+        raise ValueError(value)
+    return priority
+
+
+def _rejected(rejection):
+    """429 for a submission refused by admission control, with when to try again"""
+    response = Response(
+        {'error': str(rejection), 'retry_after': rejection.retry_after},
+        status=status.HTTP_429_TOO_MANY_REQUESTS
+    )
+    response['Retry-After'] = str(rejection.retry_after)
+    return response
+
+
+def _parse_language(data):
+    """Read the optional spoken-language override ('zh', 'en-US', ...) as a Whisper code"""
+    value = data.get('language')
+    if value in (None, ''):
+        return ''
+    code = languages.normalize(value)
+    if code is None:
+        raise ValueError(value)
+    return code
 
 
 @api_view(['GET'])
 def get_tasks(request):
     tasks = VideoTask.objects.all()
+    positions = AudioSummarizer().get_queue_positions()
     data = []
     for task in tasks:
-        data.append({
-            'id': task.id,
-            'title': task.title,
-            'url': task.url,
-            'task_type': task.task_type,
-            'status': task.status,
-            'progress': task.progress,
-            'original_text': task.original_text,
-            'summary': task.summary,
-            'error_message': task.error_message,
-            'created_at': task.created_at,
-            'completed_at': task.completed_at,
-        })
+        item = _serialize_task(task)
+        if task.id in positions:
+            item['queue_position'] = positions[task.id]
+        data.append(item)
     return Response(data)
 
 
+@api_view(['GET'])
+def get_task_changes(request):
+    """Tasks changed since the ``since`` cursor, ids deleted since then and the queue positions"""
+    try:
+        since = changes.parse_cursor(request.query_params.get('since'))
+    except ValueError:
+        return Response({'error': '无效的 since 参数'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Without a usable cursor the client gets everything and starts over
+    reset = since is None or changes.is_expired(since)
+    if reset:
+        # A snapshot is complete as of now, however long ago the last change was
+        since = timezone.now()
+    tasks = list(VideoTask.objects.all() if reset else changes.changed_tasks(since))
+    tombstones = [] if reset else list(changes.deleted_tasks(since))
+    return Response({
+        'cursor': changes.next_cursor(since, tasks, tombstones),
+        'reset': reset,
+        'tasks': [_serialize_task(task) for task in tasks],
+        'deleted': [tombstone.task_id for tombstone in tombstones],
+        'queue_positions': AudioSummarizer().get_queue_positions(),
+    })
+
+
 @api_view(['POST'])
 def create_url_task(request):
     url = request.data.get('url')
-    if not url:
+    url = url.strip() if isinstance(url, str) else ''
+    if not AudioSummarizer.is_valid_url(url):
         return Response({'error': '无效的URL'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        priority = _parse_priority(request.data)
+    except (TypeError, ValueError):
+        return Response({'error': '无效的优先级'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        language = _parse_language(request.data)
+    except ValueError:
+        return Response({'error': '无效的语言代码'}, status=status.HTTP_400_BAD_REQUEST)
     
-    task = VideoTask.objects.create(
-        title=url,
-        url=url,
-        task_type='url'
-    )
-    
-    # Add task to queue instead of creating new thread
+    canonical_url = submission_key(url)
+    client = admission.client_address(request)
     audio_summarizer = AudioSummarizer()
-    audio_summarizer.add_task_to_queue(task.id, 'url')
+    
+    with _submission_lock:
+        # Coalesce onto an identical submission that is still pending or running
+        primary = VideoTask.objects.filter(
+            canonical_url=canonical_url,
+            status__in=VideoTask.ACTIVE_STATUSES,
+            primary_task__isnull=True
+        ).order_by('created_at').first()
+        if primary is None:
+            # Only new work is limited; following an in-flight task costs nothing
+            try:
+                admission.admit(audio_summarizer, client)
+            except admission.AdmissionRejected as e:
+                return _rejected(e)
+        task = VideoTask.objects.create(
+            title=primary.title if primary else url,
+            url=url,
+            canonical_url=canonical_url,
+            task_type='url',
+            priority=priority,
+            language=language,
+            client_address=client,
+            primary_task=primary,
+            status=primary.status if primary else 'pending',
+            progress=primary.progress if primary else 0,
+            duration=primary.duration if primary else None
+        )
+    
+    if primary is None:
+        # Add task to queue instead of creating new thread
+        audio_summarizer.add_task_to_queue(task.id, 'url')
+    else:
+        metrics.TASKS_COALESCED.inc()
+        if priority > primary.priority:
+            audio_summarizer.boost_priority(primary.id, priority)
     
     # Get queue status for response
     queue_status = audio_summarizer.get_queue_status()
+    queued_id = primary.id if primary else task.id
     
     return Response({
         'id': task.id,
         'title': task.title,
         'status': task.status,
         'progress': task.progress,
-        'queue_position': queue_status['queue_size'],
+        'priority': task.priority,
+        'coalesced_with': primary.id if primary else None,
+        'queue_position': audio_summarizer.get_queue_position(queued_id) or queue_status['queue_size'],
         'is_processing': queue_status['is_processing']
     })
 
 
+@api_view(['POST'])
+def create_batch_tasks(request):
+    """Create URL tasks for a list of URLs and/or a playlist/channel URL"""
+    urls = request.data.get('urls') or []
+    playlist_url = request.data.get('playlist_url')
+    if not isinstance(urls, list) or (not urls and not playlist_url):
+        return Response({'error': '请提供URL列表或播放列表链接'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        priority = _parse_priority(request.data)
+    except (TypeError, ValueError):
+        return Response({'error': '无效的优先级'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        language = _parse_language(request.data)
+    except ValueError:
+        return Response({'error': '无效的语言代码'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    candidates = [{'url': url, 'title': None, 'duration': None} for url in urls if isinstance(url, str)]
+    if playlist_url:
+        if not AudioSummarizer.is_valid_url(playlist_url):
+            return Response({'error': '无效的播放列表链接'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            candidates.extend(AudioSummarizer.expand_playlist(playlist_url))
+        except Exception as e:
+            return Response({'error': f'播放列表解析失败: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Validate and drop verbatim repeats
+    invalid = []
+    valid = {}
+    for candidate in candidates:
+        url = candidate['url'].strip()
+        if not AudioSummarizer.is_valid_url(url):
+            invalid.append(url)
+            continue
+        valid.setdefault(url, {**candidate, 'url': url})
+    
+    # Checked before any short link is followed, so an oversized request costs nothing.
+    # Larger batches could never be admitted, however idle the queue
+    max_tasks = min(django_settings.BATCH_MAX_TASKS, admission.max_submission() or django_settings.BATCH_MAX_TASKS)
+    if len(valid) > max_tasks:
+        return Response({'error': f'单次最多提交 {max_tasks} 个任务'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Canonicalize and de-duplicate within the batch
+    entries = {}
+    for url, canonical_url in submission_keys(valid).items():
+        entries.setdefault(canonical_url, valid[url])
+    
+    # Skip anything already completed or in flight
+    known = set(
+        VideoTask.objects.filter(
+            canonical_url__in=list(entries),
+            status__in=VideoTask.ACTIVE_STATUSES + ['completed']
+        ).values_list('canonical_url', flat=True)
+    )
+    client = admission.client_address(request)
+    new_tasks = [
+        VideoTask(
+            title=(entry['title'] or entry['url'])[:500],
+            url=entry['url'],
+            canonical_url=canonical_url,
+            task_type='url',
+            priority=priority,
+            language=language,
+            client_address=client,
+            duration=int(entry['duration']) if entry['duration'] else None
+        )
+        for canonical_url, entry in entries.items()
+        if canonical_url not in known
+    ]
+    audio_summarizer = AudioSummarizer()
+    with _submission_lock:
+        if new_tasks:
+            # The whole batch must fit, or a single request could queue past every limit
+            try:
+                admission.admit(audio_summarizer, client, count=len(new_tasks))
+            except admission.AdmissionRejected as e:
+                return _rejected(e)
+        created = VideoTask.objects.bulk_create(new_tasks)
+    
+    audio_summarizer.add_tasks_to_queue(created)
+    
+    return Response({
+        'created': [{'id': task.id, 'title': task.title, 'url': task.url} for task in created],
+        'skipped': sorted(known),
+        'invalid': invalid,
+    }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+
+
 @api_view(['POST'])
 def create_file_task(request):
     uploaded_file = request.FILES.get('file')
     if not uploaded_file:
         return Response({'error': '未上传文件'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        priority = _parse_priority(request.data)
+    except (TypeError, ValueError):
+        return Response({'error': '无效的优先级'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        language = _parse_language(request.data)
+    except ValueError:
+        return Response({'error': '无效的语言代码'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    client = admission.client_address(request)
+    audio_summarizer = AudioSummarizer()
+    try:
+        admission.admit(audio_summarizer, client)
+    except admission.AdmissionRejected as e:
+        return _rejected(e)
+    
+    # Refuse uploads that would eat into the space kept free on the media volume
+    if not workspace.has_space_for(uploaded_file.size):
+        return Response({'error': '磁盘空间不足，请稍后再试'}, status=status.HTTP_507_INSUFFICIENT_STORAGE)
     
     # Save file
     file_path = default_storage.save(f'uploads/{uploaded_file.name}', uploaded_file)
@@ -71,45 +310,306 @@ def create_file_task(request):
     task = VideoTask.objects.create(
         title=uploaded_file.name,
         file_path=full_path,
-        task_type='file'
+        task_type='file',
+        priority=priority,
+        language=language,
+        client_address=client
     )
     
     # Add task to queue instead of creating new thread
-    audio_summarizer = AudioSummarizer()
     audio_summarizer.add_task_to_queue(task.id, 'file')
     
-    # Get queue status for response
+    return Response(_file_task_response(task, audio_summarizer))
+
+
+def _file_task_response(task, audio_summarizer, duplicate_of=None):
     queue_status = audio_summarizer.get_queue_status()
-    
-    return Response({
+    queued_id = task.primary_task_id or task.id
+    data = {
         'id': task.id,
         'title': task.title,
         'status': task.status,
         'progress': task.progress,
-        'queue_position': queue_status['queue_size'],
+        'priority': task.priority,
+        'queue_position': (
+            audio_summarizer.get_queue_position(queued_id) or queue_status['queue_size']
+            if task.status in VideoTask.ACTIVE_STATUSES else None
+        ),
         'is_processing': queue_status['is_processing']
+    }
+    if duplicate_of is not None:
+        data['duplicate_of'] = duplicate_of
+    return data
+
+
+def _find_transcript(content_hash):
+    """Latest completed task with a transcript for this content, if any"""
+    return VideoTask.objects.filter(
+        content_hash=content_hash, status='completed'
+    ).exclude(original_text='').order_by('-completed_at').first()
+
+
+def _reuse_transcript(content_hash, title, priority, file_path=None):
+    """Reuse the work of an earlier upload with identical content.
+
+    A finished transcript is copied into a new completed task; an identical
+    upload still in flight gets a follower, like duplicate URL submissions.
+    Returns ``(task, source_task_id)``, or ``(None, None)`` for new content.
+    Callers hold ``_submission_lock``.
+    """
+    candidates = VideoTask.objects.filter(content_hash=content_hash, primary_task__isnull=True)
+    done = _find_transcript(content_hash)
+    if done is not None:
+        task = VideoTask.objects.create(
+            title=title,
+            task_type='file',
+            content_hash=content_hash,
+            priority=priority,
+            status='completed',
+            progress=100,
+            original_text=done.original_text,
+            summary=done.summary,
+            duration=done.duration,
+            language=done.language,
+            completed_at=timezone.now()
+        )
+        segments.copy(done.id, task.id)
+        return task, done.id
+    
+    primary = candidates.filter(status__in=VideoTask.ACTIVE_STATUSES).order_by('created_at').first()
+    if primary is not None:
+        task = VideoTask.objects.create(
+            title=title,
+            task_type='file',
+            # Kept so the follower can take over if the primary is cancelled before its transcript
+            file_path=None if primary.original_text else file_path,
+            content_hash=content_hash,
+            priority=priority,
+            primary_task=primary,
+            status=primary.status,
+            progress=primary.progress,
+            duration=primary.duration
+        )
+        metrics.TASKS_COALESCED.inc()
+        if priority > primary.priority:
+            AudioSummarizer().boost_priority(primary.id, priority)
+        return task, primary.id
+    return None, None
+
+
+def _serialize_upload(session):
+    return {
+        'id': session.id,
+        'filename': session.filename,
+        'size': session.size,
+        'offset': session.received,
+        'status': session.status,
+        'task': session.task_id,
+        'chunk_size': django_settings.UPLOAD_CHUNK_SIZE_MB * 1024 * 1024,
+    }
+
+
+@api_view(['POST'])
+def init_upload(request):
+    """Start a chunked upload; short-circuits when the client's sha256 matches a known transcript"""
+    filename = request.data.get('filename')
+    if not filename or not isinstance(filename, str):
+        return Response({'error': '无效的文件名'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        size = int(request.data.get('size'))
+        priority = _parse_priority(request.data)
+    except (TypeError, ValueError):
+        return Response({'error': '无效的文件大小或优先级'}, status=status.HTTP_400_BAD_REQUEST)
+    if size <= 0:
+        return Response({'error': '无效的文件大小'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        language = _parse_language(request.data)
+    except ValueError:
+        return Response({'error': '无效的语言代码'}, status=status.HTTP_400_BAD_REQUEST)
+    sha256 = (request.data.get('sha256') or '').lower()
+    if sha256 and not re.fullmatch(r'[0-9a-f]{64}', sha256):
+        return Response({'error': '无效的 sha256'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Known content needs no upload at all; in-flight duplicates still upload their copy
+    if sha256 and _find_transcript(sha256) is not None:
+        with _submission_lock:
+            task, source_id = _reuse_transcript(sha256, filename, priority)
+        return Response(
+            {'task': _file_task_response(task, AudioSummarizer(), duplicate_of=source_id)},
+            status=status.HTTP_201_CREATED
+        )
+    
+    # Admitted here rather than on completion, so a refused client never sends the file
+    try:
+        admission.admit(AudioSummarizer(), admission.client_address(request))
+    except admission.AdmissionRejected as e:
+        return _rejected(e)
+    
+    if not workspace.has_space_for(size):
+        return Response({'error': '磁盘空间不足，请稍后再试'}, status=status.HTTP_507_INSUFFICIENT_STORAGE)
+    
+    session = uploads.start_session(filename, size, sha256=sha256, priority=priority, language=language)
+    return Response(_serialize_upload(session), status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+def get_upload_status(request, upload_id):
+    try:
+        session = UploadSession.objects.get(id=upload_id)
+    except UploadSession.DoesNotExist:
+        return Response({'error': '上传不存在'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(_serialize_upload(session))
+
+
+@api_view(['PUT'])
+def append_upload(request, upload_id):
+    """Write the raw request body at ``?offset=``; a wrong offset gets 409 with the server's offset"""
+    try:
+        offset = int(request.query_params.get('offset', ''))
+    except ValueError:
+        return Response({'error': '无效的偏移量'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        session = UploadSession.objects.get(id=upload_id)
+    except UploadSession.DoesNotExist:
+        return Response({'error': '上传不存在'}, status=status.HTTP_404_NOT_FOUND)
+    if session.status != 'uploading':
+        return Response({'error': '上传已完成'}, status=status.HTTP_409_CONFLICT)
+    
+    try:
+        # Read the body straight from the socket instead of buffering it
+        session = uploads.append_chunk(session.id, offset, request.stream)
+    except uploads.UploadOffsetMismatch as e:
+        return Response({'error': '偏移量不匹配', 'offset': e.offset}, status=status.HTTP_409_CONFLICT)
+    except uploads.UploadTooLarge:
+        return Response({'error': '超出声明的文件大小'}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(_serialize_upload(session))
+
+
+@api_view(['POST'])
+def complete_upload(request, upload_id):
+    """Finish a chunked upload and create its task (idempotent)"""
+    try:
+        session = UploadSession.objects.get(id=upload_id)
+    except UploadSession.DoesNotExist:
+        return Response({'error': '上传不存在'}, status=status.HTTP_404_NOT_FOUND)
+    audio_summarizer = AudioSummarizer()
+    if session.status == 'completed':
+        if session.task is None:
+            return Response({'error': '任务已删除'}, status=status.HTTP_410_GONE)
+        return Response(_file_task_response(session.task, audio_summarizer))
+    if session.received != session.size:
+        return Response(
+            {'error': '文件尚未上传完成', 'offset': session.received}, status=status.HTTP_409_CONFLICT
+        )
+    
+    content_hash = uploads.finish_session(session)
+    if session.sha256 and session.sha256 != content_hash:
+        uploads.discard_session(session)
+        return Response({'error': '文件校验失败，请重新上传'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    with _submission_lock:
+        task, source_id = _reuse_transcript(
+            content_hash, session.filename, session.priority, file_path=session.file_path
+        )
+        if task is None:
+            task = VideoTask.objects.create(
+                title=session.filename,
+                file_path=session.file_path,
+                content_hash=content_hash,
+                task_type='file',
+                priority=session.priority,
+                language=session.language,
+                client_address=admission.client_address(request)
+            )
+        session.status = 'completed'
+        session.task = task
+        session.save()
+    
+    if source_id is None:
+        audio_summarizer.add_task_to_queue(task.id, 'file')
+    elif task.file_path is None:
+        # The transcript already exists, so the copy just uploaded is not needed
+        retention.delete_upload(session.file_path)
+    
+    return Response(
+        _file_task_response(task, audio_summarizer, duplicate_of=source_id), status=status.HTTP_201_CREATED
+    )
+
+
+@api_view(['GET'])
+def search_tasks(request):
+    """Ranked full-text search over titles, transcripts and summaries (``?q=&page=&page_size=``)"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({'error': '请输入搜索内容'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        page = int(request.query_params.get('page', 1))
+        page_size = int(request.query_params.get('page_size', 20))
+    except ValueError:
+        return Response({'error': '无效的分页参数'}, status=status.HTTP_400_BAD_REQUEST)
+    if page < 1 or not 1 <= page_size <= 100:
+        return Response({'error': '无效的分页参数'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    total, hits = search.search(query, page=page, page_size=page_size)
+    tasks = {
+        task['id']: task for task in VideoTask.objects.filter(id__in=[hit['id'] for hit in hits]).values(
+            'id', 'title', 'task_type', 'status', 'created_at', 'completed_at'
+        )
+    }
+    results = [dict(tasks[hit['id']], snippet=hit['snippet'], score=hit['score']) for hit in hits if hit['id'] in tasks]
+    return Response({
+        'query': query,
+        'page': page,
+        'page_size': page_size,
+        'total': total,
+        'results': results,
     })
 
 
 @api_view(['GET'])
 def get_task_detail(request, task_id):
+    # Check the client's copy before loading the transcript and summary
+    updated_at = VideoTask.objects.filter(id=task_id).values_list('updated_at', flat=True).first()
+    if updated_at is not None:
+        response = conditional.not_modified(request, conditional.make_etag('task', task_id, updated_at), updated_at)
+        if response is not None:
+            return response
+    try:
+        task = VideoTask.objects.get(id=task_id)
+    except VideoTask.DoesNotExist:
+        return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    return conditional.set_validators(
+        Response(_serialize_task(task)),
+        conditional.make_etag('task', task.id, task.updated_at), task.updated_at
+    )
+
+
+@api_view(['GET'])
+def get_task_segments(request, task_id):
+    """Timestamped transcript segments, optionally only those overlapping ?start=&end= (seconds)"""
     try:
         task = VideoTask.objects.get(id=task_id)
-        return Response({
-            'id': task.id,
-            'title': task.title,
-            'url': task.url,
-            'task_type': task.task_type,
-            'status': task.status,
-            'progress': task.progress,
-            'original_text': task.original_text,
-            'summary': task.summary,
-            'error_message': task.error_message,
-            'created_at': task.created_at,
-            'completed_at': task.completed_at,
-        })
     except VideoTask.DoesNotExist:
         return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    try:
+        start = float(request.query_params['start']) if request.query_params.get('start') else None
+        end = float(request.query_params['end']) if request.query_params.get('end') else None
+    except ValueError:
+        return Response({'error': 'start 和 end 必须是秒数'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    # Duplicates that followed another task share its transcript
+    table = segments.load(task.id)
+    if table is None and task.primary_task_id:
+        table = segments.load(task.primary_task_id)
+    if table is None:
+        return Response({'error': '任务没有分段时间轴'}, status=status.HTTP_404_NOT_FOUND)
+    
+    return Response({
+        'id': task.id,
+        'count': len(table),
+        'segments': table.window(start, end),
+    })
 
 
 @api_view(['GET'])
@@ -121,6 +621,8 @@ def get_settings(request):
         'openai_model': settings.openai_model,
         'whisper_model': settings.whisper_model,
         'whisper_device': settings.whisper_device,
+        'default_language': settings.default_language,
+        'vad_enabled': settings.vad_enabled,
         'auto_load_model': settings.auto_load_model,
         'summary_prompt': settings.summary_prompt,
         'url_summary_prompt': settings.url_summary_prompt,
@@ -141,6 +643,13 @@ def update_settings(request):
         settings.whisper_model = request.data['whisper_model']
     if 'whisper_device' in request.data:
         settings.whisper_device = request.data['whisper_device']
+    if 'default_language' in request.data:
+        default_language = languages.normalize(request.data['default_language'])
+        if request.data['default_language'] and default_language is None:
+            return Response({'error': '无效的语言代码'}, status=status.HTTP_400_BAD_REQUEST)
+        settings.default_language = default_language or ''
+    if 'vad_enabled' in request.data:
+        settings.vad_enabled = request.data['vad_enabled']
     if 'auto_load_model' in request.data:
         settings.auto_load_model = request.data['auto_load_model']
     if 'summary_prompt' in request.data:
@@ -157,12 +666,122 @@ def update_settings(request):
 def delete_task(request, task_id):
     try:
         task = VideoTask.objects.get(id=task_id)
+        # Stop the worker first so it does not keep processing a deleted task
+        AudioSummarizer().cancel_task(task.id, reason='deleted')
         task.delete()
+        retention.delete_upload(task.file_path)
+        if task.status not in VideoTask.ACTIVE_STATUSES:
+            # A failed task may keep its download for a retry
+            workspace.remove_workspace(task.id)
         return Response({'message': '任务已删除'})
     except VideoTask.DoesNotExist:
         return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
 
 
+@api_view(['POST'])
+def cancel_task(request, task_id):
+    try:
+        task = VideoTask.objects.get(id=task_id)
+    except VideoTask.DoesNotExist:
+        return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if task.status not in VideoTask.ACTIVE_STATUSES:
+        return Response({'error': '任务已结束，无法取消'}, status=status.HTTP_409_CONFLICT)
+    
+    AudioSummarizer().cancel_task(task.id)
+    return Response({'message': '任务已取消', 'id': task.id, 'status': 'cancelled'})
+
+
+@api_view(['POST'])
+def retry_task(request, task_id):
+    try:
+        task = VideoTask.objects.get(id=task_id)
+    except VideoTask.DoesNotExist:
+        return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if task.status not in ('failed', 'cancelled'):
+        return Response({'error': '只能重试失败或已取消的任务'}, status=status.HTTP_409_CONFLICT)
+    if task.summary_versions.filter(status__in=SummaryVersion.ACTIVE_STATUSES).exists():
+        return Response({'error': '任务正在重新总结，请稍后再试'}, status=status.HTTP_409_CONFLICT)
+    
+    # A failed duplicate is retried on its own; it carries the primary's checkpoints
+    task.primary_task = None
+    audio_summarizer = AudioSummarizer()
+    audio_summarizer.retry_task(task)
+    return Response({
+        'message': '任务已重新加入队列，将直接重新生成总结' if task.original_text else '任务已重新加入队列',
+        'id': task.id,
+        'status': 'pending',
+        'queue_position': audio_summarizer.get_queue_position(task.id)
+    })
+
+
+def _serialize_summary_version(version):
+    return {
+        'id': version.id,
+        'task': version.task_id,
+        'status': version.status,
+        'model': version.model,
+        'prompt': version.prompt,
+        'summary': version.summary,
+        'error_message': version.error_message,
+        'created_at': version.created_at,
+        'completed_at': version.completed_at,
+    }
+
+
+@api_view(['POST'])
+def resummarize_task(request, task_id):
+    """Summarize the stored transcript again, optionally with another prompt or model"""
+    try:
+        task = VideoTask.objects.get(id=task_id)
+    except VideoTask.DoesNotExist:
+        return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    
+    if task.status in VideoTask.ACTIVE_STATUSES:
+        return Response({'error': '任务仍在处理中'}, status=status.HTTP_409_CONFLICT)
+    if not task.original_text:
+        return Response({'error': '任务没有转录文本，请先重试任务'}, status=status.HTTP_409_CONFLICT)
+    if task.summary_versions.filter(status__in=SummaryVersion.ACTIVE_STATUSES).exists():
+        return Response({'error': '任务已有进行中的重新总结'}, status=status.HTTP_409_CONFLICT)
+    
+    user_settings = UserSettings.get_settings()
+    if task.task_type == 'url':
+        prompt = request.data.get('prompt') or user_settings.url_summary_prompt
+    else:
+        prompt = request.data.get('prompt') or user_settings.summary_prompt
+    model = (request.data.get('model') or user_settings.openai_model).strip()
+    if not model or len(model) > 100:
+        return Response({'error': '模型名称无效'}, status=status.HTTP_400_BAD_REQUEST)
+    if task.task_type == 'url':
+        # URL prompts are formatted with the title, like url_summary_prompt
+        try:
+            prompt.format(title=task.title)
+        except (KeyError, IndexError, ValueError):
+            return Response({'error': '提示词格式错误，只能使用 {title} 占位符'}, status=status.HTTP_400_BAD_REQUEST)
+    
+    if task.summary and not task.summary_versions.exists():
+        # Keep the pipeline's summary as the first version
+        SummaryVersion.objects.create(
+            task=task, status='completed', summary=task.summary, completed_at=task.completed_at
+        )
+    version = SummaryVersion.objects.create(task=task, prompt=prompt, model=model)
+    
+    audio_summarizer = AudioSummarizer()
+    audio_summarizer.add_summary_to_queue(version)
+    data = _serialize_summary_version(version)
+    data['queue_position'] = audio_summarizer.get_queue_position(task.id)
+    return Response(data, status=status.HTTP_202_ACCEPTED)
+
+
+@api_view(['GET'])
+def get_summary_versions(request, task_id):
+    if not VideoTask.objects.filter(id=task_id).exists():
+        return Response({'error': '任务不存在'}, status=status.HTTP_404_NOT_FOUND)
+    versions = SummaryVersion.objects.filter(task_id=task_id)
+    return Response([_serialize_summary_version(version) for version in versions])
+
+
 @api_view(['POST'])
 def manage_whisper_model(request):
     """Load or unload Whisper model"""
@@ -206,8 +825,12 @@ def get_model_status(request):
     """Get current Whisper model status"""
     audio_summarizer = AudioSummarizer()
     user_settings = UserSettings.get_settings()
+    etag = conditional.make_etag('model', audio_summarizer.status_version(), user_settings.updated_at)
+    response = conditional.not_modified(request, etag)
+    if response is not None:
+        return response
     
-    return Response({
+    return conditional.set_validators(Response({
         'status': audio_summarizer.get_model_status(),
         'cuda_available': audio_summarizer._check_cuda_availability(),
         'loaded': audio_summarizer.whisper_model is not None,
@@ -215,16 +838,145 @@ def get_model_status(request):
         'auto_load_enabled': user_settings.auto_load_model,
         'queue_size': audio_summarizer.get_queue_status()['queue_size'],
         'is_processing': audio_summarizer.get_queue_status()['is_processing']
-    })
+    }), etag)
 
 
 @api_view(['GET'])
 def get_queue_status(request):
     """Get current processing queue status"""
     audio_summarizer = AudioSummarizer()
+    etag = conditional.make_etag('queue', audio_summarizer.status_version())
+    response = conditional.not_modified(request, etag)
+    if response is not None:
+        return response
     queue_status = audio_summarizer.get_queue_status()
-    return Response({
+    return conditional.set_validators(Response({
         'queue_size': queue_status['queue_size'],
         'is_processing': queue_status['is_processing'],
         'current_task': queue_status['current_task']
-    })
+    }), etag)
+
+
+def _parse_export_time(value):
+    """Parse an ISO datetime or date; returns ``(moment, is_date)``"""
+    parsed = parse_datetime(value)
+    is_date = parsed is None
+    if is_date:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError
+        parsed = datetime.combine(day, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed, is_date
+
+
+def _export_queryset(params):
+    """Tasks matching the export filters, oldest id first so ranges can be resumed"""
+    tasks = VideoTask.objects.order_by('id')
+    statuses = [value for value in params.get('status', '').split(',') if value]
+    if statuses:
+        if not set(statuses) <= {choice for choice, _ in VideoTask.STATUS_CHOICES}:
+            raise ValueError('无效的状态')
+        tasks = tasks.filter(status__in=statuses)
+    try:
+        if params.get('since'):
+            tasks = tasks.filter(created_at__gte=_parse_export_time(params['since'])[0])
+        if params.get('until'):
+            until, is_date = _parse_export_time(params['until'])
+            # A bare date includes the whole day
+            if is_date:
+                tasks = tasks.filter(created_at__lt=until + timedelta(days=1))
+            else:
+                tasks = tasks.filter(created_at__lte=until)
+    except ValueError:
+        raise ValueError('无效的日期')
+    try:
+        if params.get('id_min'):
+            tasks = tasks.filter(id__gte=int(params['id_min']))
+        if params.get('id_max'):
+            tasks = tasks.filter(id__lte=int(params['id_max']))
+    except ValueError:
+        raise ValueError('无效的ID范围')
+    return tasks
+
+
+@require_GET
+def export_tasks(request):
+    """Stream results as NDJSON (``?format=ndjson``, default) or a ZIP of Markdown files (``?format=zip``)"""
+    export_format = request.GET.get('format', 'ndjson')
+    if export_format not in ('ndjson', 'zip'):
+        return JsonResponse({'error': '不支持的导出格式'}, status=400, json_dumps_params={'ensure_ascii': False})
+    try:
+        tasks = _export_queryset(request.GET)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400, json_dumps_params={'ensure_ascii': False})
+    
+    filename = f"videosummarizer-export-{timezone.now().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    if export_format == 'zip':
+        chunks, content_type = export.zip_chunks(tasks), 'application/zip'
+    else:
+        chunks, content_type = export.ndjson_lines(tasks), 'application/x-ndjson; charset=utf-8'
+    if django_settings.ASGI_MODE:
+        chunks = export.async_chunks(chunks)
+    response = StreamingHttpResponse(chunks, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def metrics_view(request):
+    """Expose pipeline metrics in the Prometheus text format"""
+    return HttpResponse(
+        metrics.REGISTRY.render(),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
+@require_GET
+def healthz(request):
+    """Liveness: the process answers and its worker thread, once started, is still running"""
+    worker = AudioSummarizer().worker_thread
+    alive = worker is None or worker.is_alive()
+    return JsonResponse({'status': 'ok' if alive else 'worker stopped'}, status=200 if alive else 503)
+
+
+@require_GET
+def readyz(request):
+    """Readiness: 503 while admission control refuses new work, so load balancers route around us"""
+    data = admission.saturation(AudioSummarizer())
+    ready = data['retry_after'] is None
+    response = JsonResponse({'ready': ready, **data}, status=200 if ready else 503)
+    if not ready:
+        response['Retry-After'] = str(data['retry_after'])
+    return response
+
+
+def _hashed_static_files():
+    global _hashed_static_names
+    if _hashed_static_names is None:
+        _hashed_static_names = frozenset(staticfiles_storage.hashed_files.values())
+    return _hashed_static_names
+
+
+@require_GET
+def serve_static(request, path):
+    """Serve collected static files when DEBUG is off; content-hashed names never go stale"""
+    try:
+        full_path = safe_join(django_settings.STATIC_ROOT, path)
+        stat = os.stat(full_path)
+    except (OSError, SuspiciousFileOperation):
+        raise Http404('文件不存在')
+    if not os.path.isfile(full_path):
+        raise Http404('文件不存在')
+    if not was_modified_since(request.headers.get('If-Modified-Since'), stat.st_mtime):
+        return HttpResponseNotModified()
+    # Streamed from disk in blocks rather than read into memory
+    response = FileResponse(open(full_path, 'rb'))
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if path in _hashed_static_files():
+        patch_cache_control(
+            response, public=True, max_age=django_settings.STATIC_HASHED_MAX_AGE, immutable=True
+        )
+    else:
+        patch_cache_control(response, no_cache=True)
+    return response
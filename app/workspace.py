@@ -0,0 +1,165 @@
+"""Per-task temporary workspaces under ``MEDIA_ROOT/temp`` and the disk quota guarding them.
+
+Every URL task downloads into its own ``task_<id>`` directory, which the
+worker removes as a whole when the task leaves it. Whatever a crash leaves
+behind is swept when the worker starts and whenever space runs short.
+"""
+import shutil
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.db.models import Q
+
+from app.models import VideoTask
+
+MB = 1024 * 1024
+WORKSPACE_PREFIX = 'task_'
+
+
+class DiskQuotaExceeded(Exception):
+    """Raised when temp space does not free up within TEMP_SPACE_WAIT_SECONDS"""
+
+
+def temp_root():
+    return Path(settings.MEDIA_ROOT) / 'temp'
+
+
+def workspace_path(task_id):
+    return temp_root() / f'{WORKSPACE_PREFIX}{task_id}'
+
+
+def _remove(path):
+    try:
+        if path.is_dir() and not path.is_symlink():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"清理临时文件失败: {e}")
+
+
+def create_workspace(task_id):
+    """Create an empty workspace for ``task_id`` and return its path"""
+    path = workspace_path(task_id)
+    _remove(path)
+    path.mkdir(parents=True)
+    return path
+
+
+def remove_workspace(task_id):
+    """Remove the workspace of ``task_id`` with everything in it"""
+    _remove(workspace_path(task_id))
+
+
+def _tree_size(path):
+    if not path.is_dir():
+        return path.stat().st_size
+    return sum(entry.stat().st_size for entry in path.rglob('*') if entry.is_file())
+
+
+def temp_usage_bytes():
+    """Bytes currently held under the temp root"""
+    root = temp_root()
+    if not root.exists():
+        return 0
+    total = 0
+    for entry in root.iterdir():
+        try:
+            total += _tree_size(entry)
+        except FileNotFoundError:
+            continue
+    return total
+
+
+def free_bytes():
+    """Free bytes on the volume holding MEDIA_ROOT"""
+    path = Path(settings.MEDIA_ROOT)
+    while not path.exists():
+        path = path.parent
+    return shutil.disk_usage(path).free
+
+
+def download_budget_bytes():
+    """Bytes a new download may use without breaking the quota or the free-space floor"""
+    return min(
+        settings.TEMP_QUOTA_MB * MB - temp_usage_bytes(),
+        free_bytes() - settings.TEMP_MIN_FREE_MB * MB,
+    )
+
+
+def has_space_for(size_bytes=0):
+    """Whether the volume keeps TEMP_MIN_FREE_MB free after storing ``size_bytes`` more"""
+    return free_bytes() - size_bytes >= settings.TEMP_MIN_FREE_MB * MB
+
+
+def sweep_orphans(keep=()):
+    """Remove workspaces of finished or deleted tasks and anything older than the max age.
+
+    Workspaces of active tasks are left alone (unless stale) since the task
+    may still be running. Failed tasks holding a downloaded checkpoint keep
+    theirs until they are retried or deleted, so a manual retry can resume
+    from it. ``keep`` lists task ids that must survive anyway.
+    Returns the number of bytes freed.
+    """
+    root = temp_root()
+    if not root.exists():
+        return 0
+    max_age = settings.TEMP_ORPHAN_MAX_AGE_HOURS * 3600
+    now = time.time()
+    entries = {}
+    for entry in root.iterdir():
+        task_id = None
+        if entry.is_dir() and entry.name.startswith(WORKSPACE_PREFIX):
+            task_id = entry.name[len(WORKSPACE_PREFIX):]
+            task_id = int(task_id) if task_id.isdigit() else None
+        entries[entry] = task_id
+
+    task_ids = {task_id for task_id in entries.values() if task_id is not None}
+    active = set(VideoTask.objects.filter(
+        id__in=task_ids, status__in=VideoTask.ACTIVE_STATUSES
+    ).values_list('id', flat=True))
+    resumable = set(VideoTask.objects.filter(
+        ~Q(download_path=''), id__in=task_ids, status='failed'
+    ).values_list('id', flat=True))
+
+    freed = 0
+    for entry, task_id in entries.items():
+        if task_id in keep or task_id in resumable:
+            continue
+        try:
+            stale = now - entry.stat().st_mtime > max_age
+            # Loose files predate per-task workspaces and only go once stale
+            if stale or (task_id is not None and task_id not in active):
+                size = _tree_size(entry)
+                _remove(entry)
+                freed += size
+        except FileNotFoundError:
+            continue
+    if freed:
+        print(f"已清理孤立临时文件 {freed / MB:.1f} MB")
+    return freed
+
+
+def wait_for_space(cancel_token, keep=()):
+    """Block until a download fits in the temp quota, sweeping orphans while waiting.
+
+    This is the worker's backpressure: queued tasks stay queued instead of
+    filling the volume. Raises DiskQuotaExceeded after TEMP_SPACE_WAIT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.TEMP_SPACE_WAIT_SECONDS
+    swept = False
+    while download_budget_bytes() <= 0:
+        if not swept:
+            sweep_orphans(keep)
+            swept = True
+            continue
+        if time.monotonic() >= deadline:
+            raise DiskQuotaExceeded("磁盘空间不足，临时目录已超出配额")
+        print("磁盘空间不足，等待临时文件释放...")
+        # Returns early (and the caller raises) if the task gets cancelled
+        cancel_token.wait(10)
+        cancel_token.raise_if_cancelled()
+        swept = False
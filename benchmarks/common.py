@@ -0,0 +1,140 @@
+"""Shared helpers for the offline benchmarks: Django bootstrap, stats and result files."""
+import collections
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = REPO_ROOT / 'benchmarks' / 'results'
+
+
+def setup_django(workdir):
+    """Point Django at a throwaway database and media root inside ``workdir`` and migrate"""
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VideoSummarizer.settings')
+
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = str(Path(workdir) / 'bench.sqlite3')
+    settings.MEDIA_ROOT = Path(workdir) / 'media'
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+
+class DBWriteCounter:
+    """Count INSERT/UPDATE/DELETE statements on every connection opened after install()"""
+
+    WRITE_VERBS = ('INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+    def __init__(self):
+        self.counts = collections.Counter()
+        self._lock = threading.Lock()
+
+    def install(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        connection_created.connect(self._on_connection_created, weak=False)
+        for connection in connections.all(initialized_only=True):
+            connection.execute_wrappers.append(self)
+
+    def reset(self):
+        with self._lock:
+            self.counts.clear()
+
+    @property
+    def total(self):
+        with self._lock:
+            return sum(self.counts.values())
+
+    def _on_connection_created(self, sender, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def __call__(self, execute, sql, params, many, context):
+        verb = sql.lstrip().split(None, 1)[0].upper() if sql else ''
+        if verb in self.WRITE_VERBS:
+            with self._lock:
+                self.counts[verb] += 1
+        return execute(sql, params, many, context)
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of ``values`` (``pct`` in 0-100)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux but bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def write_results(name, config, results, output=None):
+    """Write a benchmark run as JSON and return the path it was written to"""
+    payload = {
+        'benchmark': name,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'git_revision': _git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'config': config,
+        'results': results,
+    }
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        output = RESULTS_DIR / f'{name}-{time.strftime("%Y%m%d-%H%M%S")}.json'
+    output = Path(output)
+    output.write_text(json.dumps(payload, indent=2, ensure_ascii=False))
+    return output
+
+
+def print_comparison(baseline_path, results):
+    """Print numeric results next to those of a previous run"""
+    baseline = json.loads(Path(baseline_path).read_text())['results']
+    print(f'\n对比基线 {baseline_path}:')
+    for key, value in _flatten(results).items():
+        previous = _flatten(baseline).get(key)
+        if not isinstance(value, (int, float)) or not isinstance(previous, (int, float)):
+            continue
+        change = f'{(value - previous) / previous * 100:+.1f}%' if previous else 'n/a'
+        print(f'  {key:<40} {previous:>12.3f} -> {value:>12.3f}  ({change})')
+
+
+def _flatten(data, prefix=''):
+    flat = {}
+    for key, value in data.items():
+        name = f'{prefix}{key}'
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f'{name}.'))
+        else:
+            flat[name] = value
+    return flat
@@ -0,0 +1,190 @@
+"""CPU execution profile benchmark: the best workers x threads split for this machine.
+
+Usage:
+    python -m benchmarks.cpu_profiles --whisper tiny --clip-seconds 60
+    python -m benchmarks.cpu_profiles --whisper stand-in --splits 1x8,2x4,4x2,8x1
+
+Each split runs ``workers`` child processes side by side, every one pinned
+to its own slice of the cores with ``threads`` torch intra-op threads,
+exactly as app/execution.py sets up instances sharing a host
+(VIDEOSUMMARIZER_WORKER_INDEX / _COUNT). The children load their model,
+wait until all are ready, then transcribe the same synthetic clip
+``--rounds`` times; throughput is the audio seconds of all workers over the
+slowest one's wall time. ``--whisper stand-in`` replaces Whisper with a
+BLAS matmul loop (one 1024x1024 product per audio second), which only shows
+how the machine scales, not real transcription speed. No ffmpeg needed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import wave
+from pathlib import Path
+
+from benchmarks.common import REPO_ROOT, print_comparison, write_results
+from benchmarks.fakes import write_speech_like_wav
+
+STAND_IN_MATRIX = 1024
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--whisper', default='stand-in',
+                        help="'stand-in' or a Whisper model name such as 'tiny'")
+    parser.add_argument('--clip-seconds', type=int, default=60, help='length of the synthetic clip')
+    parser.add_argument('--rounds', type=int, default=2, help='times each worker transcribes the clip')
+    parser.add_argument('--splits', help='comma-separated WORKERSxTHREADS to try (default: all that fit)')
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    parser.add_argument('--worker', nargs=4, metavar=('INDEX', 'COUNT', 'THREADS', 'CLIP'),
+                        help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def candidate_splits(cores):
+    """Every workers x threads split filling at most ``cores``, threads as powers of two plus the rest"""
+    splits = []
+    for workers in range(1, cores + 1):
+        most = cores // workers
+        threads = {most}
+        power = 1
+        while power < most:
+            threads.add(power)
+            power *= 2
+        splits.extend((workers, count) for count in sorted(threads))
+    return splits
+
+
+def parse_splits(text):
+    splits = []
+    for item in text.split(','):
+        workers, threads = item.lower().split('x')
+        splits.append((int(workers), int(threads)))
+    return splits
+
+
+def read_wav(path):
+    import numpy as np
+
+    with wave.open(str(path), 'rb') as wav:
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    return pcm.astype(np.float32) / 32768.0
+
+
+def run_worker(args):
+    """Child process entry point: pin, load, report ready, wait for the go line, transcribe"""
+    from app import execution
+
+    index, count, threads, clip = args.worker
+    plan = execution.make_plan(
+        {'intra_op_threads': int(threads), 'inter_op_threads': 1, 'pin': True}, int(index), int(count)
+    )
+    # Before numpy or torch load, so their thread pools start at the planned size
+    execution.apply_process(plan)
+
+    if args.whisper == 'stand-in':
+        import numpy as np
+
+        matrix = np.random.default_rng(int(index)).standard_normal(
+            (STAND_IN_MATRIX, STAND_IN_MATRIX), dtype=np.float32
+        )
+
+        def transcribe():
+            for _ in range(args.clip_seconds):
+                matrix @ matrix
+    else:
+        import torch
+        import whisper
+
+        execution.apply_torch(plan, torch)
+        model = whisper.load_model(args.whisper, device='cpu')
+        audio = read_wav(clip)
+
+        def transcribe():
+            model.transcribe(audio, fp16=False, language='en', verbose=None)
+
+    print('ready', flush=True)
+    sys.stdin.readline()
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        transcribe()
+    print(json.dumps({'seconds': time.perf_counter() - started, 'cores': plan.cores}), flush=True)
+
+
+def run_split(args, workers, threads, clip):
+    command = [
+        sys.executable, '-m', 'benchmarks.cpu_profiles',
+        '--whisper', args.whisper, '--clip-seconds', str(args.clip_seconds), '--rounds', str(args.rounds),
+    ]
+    processes = [
+        subprocess.Popen(
+            command + ['--worker', str(index), str(workers), str(threads), str(clip)],
+            cwd=REPO_ROOT, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True,
+        )
+        for index in range(workers)
+    ]
+    try:
+        for process in processes:
+            if process.stdout.readline().strip() != 'ready':
+                raise RuntimeError('基准测试子进程启动失败')
+        for process in processes:
+            process.stdin.write('go\n')
+            process.stdin.flush()
+        reports = [json.loads(process.stdout.readline()) for process in processes]
+    finally:
+        for process in processes:
+            process.stdin.close()
+            process.wait()
+
+    slowest = max(report['seconds'] for report in reports)
+    audio_seconds = workers * args.clip_seconds * args.rounds
+    return {
+        'workers': workers,
+        'threads': threads,
+        'slowest_worker_seconds': slowest,
+        'audio_seconds_per_wall_second': audio_seconds / slowest if slowest else None,
+        'cores': [report['cores'] for report in reports],
+    }
+
+
+def main():
+    args = parse_args()
+    if args.worker:
+        run_worker(args)
+        return
+
+    output = os.path.abspath(args.output) if args.output else None
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    splits = parse_splits(args.splits) if args.splits else candidate_splits(cores)
+
+    runs = {}
+    with tempfile.TemporaryDirectory(prefix='videosummarizer-cpu-') as workdir:
+        clip = Path(workdir) / 'clip.wav'
+        write_speech_like_wav(clip, args.clip_seconds)
+        for workers, threads in splits:
+            print(f'{workers} 个 worker x {threads} 线程...')
+            run = run_split(args, workers, threads, clip)
+            runs[f'{workers}x{threads}'] = run
+            print(f"  {run['audio_seconds_per_wall_second']:.1f} 音频秒/秒")
+
+    best = max(runs, key=lambda key: runs[key]['audio_seconds_per_wall_second'] or 0)
+    results = {'cores': cores, 'best': best, 'splits': runs}
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'worker')}
+    path = write_results('cpu_profiles', config, results, output)
+
+    workers, threads = runs[best]['workers'], runs[best]['threads']
+    print(f"\n最佳组合: {workers} 个 worker x {threads} 线程, "
+          f"{runs[best]['audio_seconds_per_wall_second']:.1f} 音频秒/秒")
+    print(f"对应配置: VIDEOSUMMARIZER_WORKER_COUNT={workers}, "
+          f"CPU_PROFILES 中 'intra_op_threads': {threads}")
+    print(f'结果已写入 {path}')
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+"""Memory benchmark of the streaming export under ASGI.
+
+Usage:
+    python -m benchmarks.export_memory --sizes 500,5000
+    python -m benchmarks.export_memory --server asgi --sizes 500,5000 --formats ndjson,zip
+    python -m benchmarks.export_memory --server asgi --buffered --compare benchmarks/results/export_memory-<run>.json
+
+For every size a throwaway database is seeded with that many finished tasks
+(``--text-chars`` of transcript each) and ``/api/tasks/export/`` is
+downloaded once per format from a fresh server process in ASGI mode. The
+server's peak RSS growth over its idle RSS should stay flat as the export
+grows; with ``--buffered`` Django 4.2 collects the whole export in memory
+first, which shows up as growth proportional to the export size.
+
+``--server uvicorn`` (default) serves over HTTP with uvicorn and reads the
+server's peak RSS from /proc (Linux). ``--server asgi`` drives the ASGI
+application in-process instead, for machines without uvicorn.
+"""
+import argparse
+import asyncio
+import http.client
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import REPO_ROOT, peak_rss_mb, print_comparison, setup_django, write_results
+
+EXPORT_ENDPOINT = '/api/tasks/export/'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='500,5000', help='comma-separated task counts to export')
+    parser.add_argument('--formats', default='ndjson,zip', help='comma-separated export formats')
+    parser.add_argument('--text-chars', type=int, default=20000, help='transcript length of each seeded task')
+    parser.add_argument('--server', choices=('uvicorn', 'asgi'), default='uvicorn')
+    parser.add_argument('--buffered', action='store_true',
+                        help='baseline: hand Django the sync iterator, as before async_chunks')
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    parser.add_argument('--serve', nargs=2, metavar=('WORKDIR', 'PORT'), help=argparse.SUPPRESS)
+    parser.add_argument('--export', nargs=2, metavar=('WORKDIR', 'FORMAT'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def seed_database(count, text_chars):
+    from django.utils import timezone
+    from app.models import VideoTask
+
+    original_text = ('这是一段用于导出测试的转录文本。' * (text_chars // 16 + 1))[:text_chars]
+    now = timezone.now()
+    batch = []
+    for index in range(count):
+        batch.append(VideoTask(
+            title=f'导出测试任务 {index}',
+            url=f'https://www.youtube.com/watch?v=export{index:07d}',
+            task_type='url',
+            status='completed',
+            progress=100,
+            duration=600,
+            original_text=original_text,
+            summary='> 导出测试总结\n\n- 要点\n',
+            completed_at=now,
+        ))
+        if len(batch) == 500:
+            VideoTask.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        VideoTask.objects.bulk_create(batch)
+
+
+def _asgi_application(workdir, buffered):
+    """The project's ASGI application on the seeded database, as asgi.py builds it"""
+    os.environ['VIDEOSUMMARIZER_ASGI'] = '1'
+    setup_django(workdir)
+    from django.conf import settings
+    from django.core.asgi import get_asgi_application
+
+    application = get_asgi_application()
+    if buffered:
+        # The URLconf keeps its async views; only the export falls back to the sync iterator
+        settings.ASGI_MODE = False
+    return application
+
+
+def serve(args):
+    """Child process entry point: serve the seeded database with uvicorn"""
+    import uvicorn
+
+    workdir, port = args.serve
+    application = _asgi_application(workdir, args.buffered)
+    uvicorn.run(application, host='127.0.0.1', port=int(port), log_level='warning', lifespan='off')
+
+
+def export_in_process(args):
+    """Child process entry point: run one export through the ASGI application, report peak RSS"""
+    workdir, export_format = args.export
+    application = _asgi_application(workdir, args.buffered)
+    idle_mb = peak_rss_mb()
+    received = 0
+
+    async def run():
+        scope = {
+            'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'GET',
+            'scheme': 'http', 'path': EXPORT_ENDPOINT, 'raw_path': EXPORT_ENDPOINT.encode(),
+            'query_string': f'format={export_format}'.encode(), 'root_path': '',
+            'headers': [(b'host', b'127.0.0.1')], 'client': ('127.0.0.1', 0), 'server': ('127.0.0.1', 80),
+        }
+        requested = False
+
+        async def receive():
+            nonlocal requested
+            if not requested:
+                requested = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()  # The client never disconnects
+
+        async def send(message):
+            nonlocal received
+            if message['type'] == 'http.response.start' and message['status'] != 200:
+                raise RuntimeError(f"导出失败: HTTP {message['status']}")
+            if message['type'] == 'http.response.body':
+                received += len(message.get('body', b''))
+
+        await application(scope, receive, send)
+
+    asyncio.run(run())
+    print(json.dumps({'bytes': received, 'idle_rss_mb': idle_mb, 'peak_rss_mb': peak_rss_mb()}))
+
+
+def _proc_rss_mb(pid, field):
+    with open(f'/proc/{pid}/status') as status:
+        for line in status:
+            if line.startswith(field + ':'):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def _free_port():
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        return probe.getsockname()[1]
+
+
+def _child_command(args, *extra):
+    command = [sys.executable, '-m', 'benchmarks.export_memory', '--text-chars', str(args.text_chars)]
+    if args.buffered:
+        command.append('--buffered')
+    return command + list(extra)
+
+
+def export_over_http(args, workdir, export_format):
+    port = _free_port()
+    process = subprocess.Popen(
+        _child_command(args, '--serve', str(workdir), str(port)),
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)), stdout=subprocess.DEVNULL,
+    )
+    try:
+        deadline = time.monotonic() + 60
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError('uvicorn 启动失败 (需要安装 uvicorn)')
+            try:
+                with socket.create_connection(('127.0.0.1', port), timeout=1):
+                    break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise RuntimeError('uvicorn 启动超时')
+                time.sleep(0.2)
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=600)
+        connection.request('GET', '/api/queue/status/')
+        connection.getresponse().read()
+        idle_mb = _proc_rss_mb(process.pid, 'VmRSS')
+        connection.request('GET', f'{EXPORT_ENDPOINT}?format={export_format}')
+        response = connection.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f'导出失败: HTTP {response.status}')
+        received = 0
+        while True:
+            chunk = response.read(64 * 1024)
+            if not chunk:
+                break
+            received += len(chunk)
+        return {'bytes': received, 'idle_rss_mb': idle_mb, 'peak_rss_mb': _proc_rss_mb(process.pid, 'VmHWM')}
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def export_in_child(args, workdir, export_format):
+    completed = subprocess.run(
+        _child_command(args, '--export', str(workdir), export_format),
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)), capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f'导出子进程失败:\n{completed.stderr}')
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def seed_child(workdir, count, text_chars):
+    """Seed in a child so the parent never imports Django or holds the rows"""
+    code = (
+        'import sys; from benchmarks.common import setup_django; setup_django(sys.argv[1]); '
+        'from benchmarks.export_memory import seed_database; seed_database(int(sys.argv[2]), int(sys.argv[3]))'
+    )
+    subprocess.run(
+        [sys.executable, '-c', code, str(workdir), str(count), str(text_chars)],
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)), check=True,
+    )
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args)
+        return
+    if args.export:
+        export_in_process(args)
+        return
+
+    output = os.path.abspath(args.output) if args.output else None
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    formats = [name.strip() for name in args.formats.split(',') if name.strip()]
+    run_export = export_over_http if args.server == 'uvicorn' else export_in_child
+
+    results = {}
+    for size in sizes:
+        with tempfile.TemporaryDirectory(prefix='videosummarizer-export-') as workdir:
+            seed_child(workdir, size, args.text_chars)
+            for export_format in formats:
+                run = run_export(args, workdir, export_format)
+                run['growth_mb'] = run['peak_rss_mb'] - run['idle_rss_mb']
+                results[f'{export_format}_{size}'] = run
+                print(f"{export_format:<7} {size:>6} 个任务: 导出 {run['bytes'] / 1024 / 1024:.1f} MiB, "
+                      f"峰值 RSS 增长 {run['growth_mb']:.1f} MiB")
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'serve', 'export')}
+    path = write_results('export_memory', config, results, output)
+    print(f'\n结果已写入 {path}')
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
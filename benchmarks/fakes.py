@@ -0,0 +1,174 @@
+"""Offline stand-ins for the pipeline's external services.
+
+* ``write_speech_like_wav`` generates synthetic audio fixtures (tone bursts
+  separated by silence, so silence-sensitive code paths see realistic input);
+* ``MediaServer`` serves fixtures over local HTTP, which yt-dlp's generic
+  extractor downloads exactly like a direct media link;
+* ``OpenAIStub`` is an OpenAI-compatible ``/v1/chat/completions`` endpoint
+  with configurable latency;
+* ``FakeWhisperModel`` replaces Whisper with a model that costs wall time
+  proportional to the audio it is given.
+"""
+import functools
+import json
+import math
+import threading
+import time
+import wave
+from array import array
+from http.server import SimpleHTTPRequestHandler, BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+SAMPLE_RATE = 16000
+
+
+def write_speech_like_wav(path, seconds, sample_rate=SAMPLE_RATE, speech_seconds=4, silence_seconds=1.5):
+    """Write a mono 16-bit WAV of alternating tone bursts and silence"""
+    tone = array('h', (
+        int(8000 * math.sin(2 * math.pi * 220 * i / sample_rate) * (0.6 + 0.4 * math.sin(2 * math.pi * 3 * i / sample_rate)))
+        for i in range(int(speech_seconds * sample_rate))
+    ))
+    silence = array('h', bytes(2 * int(silence_seconds * sample_rate)))
+
+    remaining = int(seconds * sample_rate)
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        while remaining > 0:
+            for block in (tone, silence):
+                chunk = block[:remaining]
+                wav.writeframes(chunk.tobytes())
+                remaining -= len(chunk)
+                if remaining <= 0:
+                    break
+
+
+class _QuietFileHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # yt-dlp probes media URLs and hangs up early; that is not an error here
+        pass
+
+
+class _BackgroundServer:
+    def __init__(self, handler):
+        self.httpd = _Server(('127.0.0.1', 0), handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class MediaServer(_BackgroundServer):
+    """Serve a directory of fixtures over HTTP for yt-dlp to download"""
+
+    def __init__(self, directory):
+        super().__init__(functools.partial(_QuietFileHandler, directory=str(directory)))
+
+    def url(self, name):
+        return f'{self.base_url}/{name}'
+
+
+class OpenAIStub(_BackgroundServer):
+    """OpenAI-compatible chat completion endpoint answering after ``latency`` seconds"""
+
+    def __init__(self, latency=0.5, completion_tokens=300):
+        self.latency = latency
+        self.completion_tokens = completion_tokens
+        self.requests = 0
+        self._lock = threading.Lock()
+        super().__init__(self._make_handler())
+
+    @property
+    def api_base(self):
+        return f'{self.base_url}/v1'
+
+    def _make_handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                with stub._lock:
+                    stub.requests += 1
+                time.sleep(stub.latency)
+
+                prompt_chars = sum(len(message.get('content') or '') for message in body.get('messages', []))
+                payload = json.dumps({
+                    'id': f'chatcmpl-bench-{stub.requests}',
+                    'object': 'chat.completion',
+                    'created': int(time.time()),
+                    'model': body.get('model', 'bench'),
+                    'choices': [{
+                        'index': 0,
+                        'message': {'role': 'assistant', 'content': '> 基准测试总结\n\n- 要点一\n- 要点二'},
+                        'finish_reason': 'stop',
+                    }],
+                    'usage': {
+                        'prompt_tokens': prompt_chars // 4,
+                        'completion_tokens': stub.completion_tokens,
+                        'total_tokens': prompt_chars // 4 + stub.completion_tokens,
+                    },
+                }).encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+        return Handler
+
+
+class FakeWhisperModel:
+    """Whisper stand-in whose cost is ``audio_seconds / realtime_factor`` wall seconds"""
+
+    device = 'cpu'
+    dims = SimpleNamespace(n_mels=80)
+
+    def __init__(self, realtime_factor=40.0, segment_seconds=5.0):
+        self.realtime_factor = realtime_factor
+        self.segment_seconds = segment_seconds
+
+    def detect_language(self, mel):
+        return None, {'zh': 1.0}
+
+    def transcribe(self, audio, **options):
+        seconds = len(audio) / SAMPLE_RATE
+        time.sleep(seconds / self.realtime_factor)
+
+        segments = []
+        start = 0.0
+        while start < seconds:
+            end = min(start + self.segment_seconds, seconds)
+            segments.append({
+                'id': len(segments),
+                'start': start,
+                'end': end,
+                'text': f' 第{len(segments) + 1}段合成语音。',
+            })
+            start = end
+        return {
+            'text': ''.join(segment['text'] for segment in segments),
+            'segments': segments,
+            'language': options.get('language') or 'zh',
+        }
@@ -0,0 +1,372 @@
+"""HTTP load test of the web tier under many open dashboards.
+
+Usage:
+    python -m benchmarks.http_load --clients 50 --seed-tasks 5000 --duration 60
+    python -m benchmarks.http_load --clients 200 --submit-interval 1 --compare benchmarks/results/http_load-<run>.json
+    python -m benchmarks.http_load --base-url http://127.0.0.1:8000 --clients 20
+
+By default the database is seeded with finished tasks in a throwaway
+directory and served by Django's threaded WSGI server in a child process, so
+the load generator does not share the server's GIL. Each simulated client
+follows the polling pattern of static/js/app.js: ``/api/tasks/changes/``
+with the cursor of its last answer (none on the first poll, or after an
+error) and ``/api/queue/status/`` fired together every ``--poll-interval``
+seconds, plus ``/api/model/status/`` now and then. Like app.js's
+fetchConditional, the queue and model status requests send the ETag of the
+last answer as If-None-Match; the share answered 304 Not Modified is
+reported per endpoint. Optional submitters POST YouTube links to videos
+that do not exist, so their downloads fail quickly and the worker writes to
+the database while the dashboards read from it.
+
+With ``--base-url`` the clients target an already running server instead;
+nothing is seeded, and submitters create real tasks there.
+"""
+import argparse
+import collections
+import heapq
+import http.client
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import quote, urlsplit
+
+from benchmarks.common import REPO_ROOT, percentile, print_comparison, setup_django, write_results
+
+CHANGES_ENDPOINT = '/api/tasks/changes/'
+QUEUE_STATUS_ENDPOINT = '/api/queue/status/'
+MODEL_STATUS_ENDPOINT = '/api/model/status/'
+SUBMIT_ENDPOINT = '/api/tasks/create-url/'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--clients', type=int, default=50, help='number of simulated open dashboards')
+    parser.add_argument('--duration', type=float, default=60, help='seconds of measured load')
+    parser.add_argument('--warmup', type=float, default=5, help='seconds of load excluded from the results')
+    parser.add_argument('--poll-interval', type=float, default=2.0, help='dashboard polling interval (app.js: 2s)')
+    parser.add_argument('--model-status-interval', type=float, default=30.0,
+                        help='seconds between model status requests per client (0 disables)')
+    parser.add_argument('--submitters', type=int, default=0, help='clients submitting URL tasks')
+    parser.add_argument('--submit-interval', type=float, default=2.0, help='seconds between submissions per submitter')
+    parser.add_argument('--seed-tasks', type=int, default=5000, help='finished tasks to seed the database with')
+    parser.add_argument('--text-chars', type=int, default=8000, help='transcript length of each seeded task')
+    parser.add_argument('--summary-chars', type=int, default=1500, help='summary length of each seeded task')
+    parser.add_argument('--request-timeout', type=float, default=30.0)
+    parser.add_argument('--base-url', help='load an already running server instead of a seeded child process')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    parser.add_argument('--serve', nargs=2, metavar=('WORKDIR', 'PORT'), help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def seed_database(args):
+    from django.utils import timezone
+    from app.models import UserSettings, VideoTask
+
+    user_settings = UserSettings.get_settings()
+    # Submitted tasks must fail fast instead of loading Whisper in the server
+    user_settings.auto_load_model = False
+    user_settings.save()
+
+    rng = random.Random(args.seed)
+    original_text = ('这是一段用于压力测试的转录文本。' * (args.text_chars // 16 + 1))[:args.text_chars]
+    summary = ('> 压力测试总结\n\n- 要点\n' * (args.summary_chars // 12 + 1))[:args.summary_chars]
+    now = timezone.now()
+    batch = []
+    for index in range(args.seed_tasks):
+        is_url = rng.random() < 0.7
+        failed = rng.random() < 0.05
+        batch.append(VideoTask(
+            title=f'压力测试任务 {index}',
+            url=f'https://www.youtube.com/watch?v=load{index:07d}' if is_url else None,
+            canonical_url=f'https://www.youtube.com/watch?v=load{index:07d}' if is_url else '',
+            task_type='url' if is_url else 'file',
+            file_path=None if is_url else f'uploads/load_{index}.mp3',
+            status='failed' if failed else 'completed',
+            progress=100,
+            duration=rng.randint(60, 3600),
+            original_text='' if failed else original_text,
+            summary='' if failed else summary,
+            error_message='下载失败' if failed else '',
+            completed_at=now,
+        ))
+        if len(batch) == 500:
+            VideoTask.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        VideoTask.objects.bulk_create(batch)
+    # A history, not changes the change feed would keep reporting for the first polls
+    VideoTask.objects.update(updated_at=now - timedelta(days=1), completed_at=now - timedelta(days=1))
+
+
+def serve(workdir, port):
+    """Child process entry point: serve the seeded database like ``manage.py runserver``"""
+    import socketserver
+    setup_django(workdir)
+
+    from django.core.servers.basehttp import WSGIRequestHandler, WSGIServer
+    from django.core.wsgi import get_wsgi_application
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+    class ThreadedServer(socketserver.ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    httpd = ThreadedServer(('127.0.0.1', port), QuietHandler)
+    httpd.set_app(get_wsgi_application())
+    httpd.serve_forever()
+
+
+def start_server(workdir, port):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.http_load', '--serve', str(workdir), str(port)],
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError('服务进程启动失败')
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError('服务进程启动超时')
+
+
+class Recorder:
+    """Per-endpoint latency, response size and error samples"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = collections.defaultdict(list)
+        self.sizes = collections.defaultdict(list)
+        self.errors = collections.defaultdict(collections.Counter)
+        self.requests = collections.Counter()
+        self.not_modified = collections.Counter()
+
+    def record(self, endpoint, latency, size, error=None, status=None):
+        with self._lock:
+            self.requests[endpoint] += 1
+            self.latencies[endpoint].append(latency)
+            self.sizes[endpoint].append(size)
+            if error:
+                self.errors[endpoint][error] += 1
+            if status == 304:
+                self.not_modified[endpoint] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint in sorted(self.requests):
+            latencies = self.latencies[endpoint]
+            sizes = self.sizes[endpoint]
+            failures = sum(self.errors[endpoint].values())
+            endpoints[endpoint] = {
+                'requests': self.requests[endpoint],
+                'requests_per_second': self.requests[endpoint] / elapsed,
+                'latency_ms': {
+                    'p50': percentile(latencies, 50) * 1000,
+                    'p99': percentile(latencies, 99) * 1000,
+                    'mean': sum(latencies) / len(latencies) * 1000,
+                    'max': max(latencies) * 1000,
+                },
+                'bytes_per_request': sum(sizes) / len(sizes),
+                'not_modified_rate': self.not_modified[endpoint] / self.requests[endpoint],
+                'error_rate': failures / self.requests[endpoint],
+                'errors': dict(self.errors[endpoint]),
+            }
+        total = sum(self.requests.values())
+        failures = sum(sum(counter.values()) for counter in self.errors.values())
+        return {
+            'requests': total,
+            'requests_per_second': total / elapsed,
+            'error_rate': failures / total if total else None,
+            'database_locked_errors': sum(counter['database is locked'] for counter in self.errors.values()),
+            'endpoints': endpoints,
+        }
+
+
+def classify_error(status, body):
+    if status < 400:
+        return None
+    if b'database is locked' in body:
+        return 'database is locked'
+    return f'HTTP {status}'
+
+
+def send(base, recorder, method, path, measured, timeout, body=None, headers=None):
+    """Make one request, recorded under its path without the query; returns ``(response, payload)`` or None"""
+    connection = http.client.HTTPConnection(base.hostname, base.port, timeout=timeout)
+    headers = dict(headers or {})
+    if body is not None:
+        headers['Content-Type'] = 'application/json'
+    started = time.perf_counter()
+    result = None
+    try:
+        connection.request(method, path, body=body, headers=headers)
+        response = connection.getresponse()
+        result = response, response.read()
+        error = classify_error(response.status, result[1])
+    except (OSError, http.client.HTTPException) as e:
+        error = 'timeout' if isinstance(e, socket.timeout) else type(e).__name__
+    finally:
+        connection.close()
+    latency = time.perf_counter() - started
+    if measured():
+        status = result[0].status if result else None
+        size = len(result[1]) if result else 0
+        recorder.record(f"{method} {path.split('?')[0]}", latency, size, error, status)
+    return result
+
+
+class Dashboard:
+    """What one open page remembers between polls: the change-feed cursor and the last ETags"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cursor = None
+        self.etags = {}
+
+    def poll_changes(self, base, recorder, measured, timeout):
+        with self._lock:
+            cursor = self.cursor
+        path = f'{CHANGES_ENDPOINT}?since={quote(cursor)}' if cursor else CHANGES_ENDPOINT
+        result = send(base, recorder, 'GET', path, measured, timeout)
+        if result is None:
+            return  # A network error leaves app.js's cursor alone
+        response, payload = result
+        with self._lock:
+            # An error answer makes app.js start over
+            self.cursor = json.loads(payload)['cursor'] if response.status == 200 else None
+
+    def fetch_conditional(self, base, recorder, path, measured, timeout):
+        with self._lock:
+            etag = self.etags.get(path)
+        result = send(base, recorder, 'GET', path, measured, timeout,
+                      headers={'If-None-Match': etag} if etag else None)
+        if result is None:
+            return
+        response = result[0]
+        etag = response.getheader('ETag')
+        if response.status == 200 and etag:
+            with self._lock:
+                self.etags[path] = etag
+
+
+def run_load(args, base_url):
+    """Replay every client's request schedule until the measurement window closes"""
+    base = urlsplit(base_url)
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    submissions = iter(range(1, 1 << 30))
+
+    started = time.monotonic()
+    measure_from = started + args.warmup
+    stop_at = measure_from + args.duration
+
+    def measured():
+        return measure_from <= time.monotonic() <= stop_at
+
+    dashboards = [Dashboard() for _ in range(args.clients)]
+    # (due time, client, kind); browsers open the page at different moments
+    events = []
+    for client in range(args.clients):
+        events.append((started + rng.uniform(0, args.poll_interval), client, 'poll'))
+        events.append((started + rng.uniform(0, args.poll_interval), client, 'model'))
+    for submitter in range(args.submitters):
+        events.append((started + rng.uniform(0, args.submit_interval), submitter, 'submit'))
+    heapq.heapify(events)
+
+    workers = (2 * args.clients + args.submitters) * 2 + 4
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='load-client') as executor:
+        while events:
+            due, client, kind = heapq.heappop(events)
+            if due >= stop_at:
+                break
+            time.sleep(max(0.0, due - time.monotonic()))
+            # Like setInterval, a slow response does not delay the next tick
+            if kind == 'poll':
+                dashboard = dashboards[client]
+                executor.submit(dashboard.poll_changes, base, recorder, measured, args.request_timeout)
+                executor.submit(dashboard.fetch_conditional, base, recorder, QUEUE_STATUS_ENDPOINT,
+                                measured, args.request_timeout)
+                heapq.heappush(events, (due + args.poll_interval, client, kind))
+            elif kind == 'model':
+                executor.submit(dashboards[client].fetch_conditional, base, recorder, MODEL_STATUS_ENDPOINT,
+                                measured, args.request_timeout)
+                if args.model_status_interval > 0:
+                    heapq.heappush(events, (due + args.model_status_interval, client, kind))
+            else:
+                # Only supported sites are accepted; 11 characters like a real video id
+                body = json.dumps({'url': f'https://www.youtube.com/watch?v=ld{next(submissions):09d}'})
+                executor.submit(send, base, recorder, 'POST', SUBMIT_ENDPOINT, measured,
+                                args.request_timeout, body)
+                heapq.heappush(events, (due + args.submit_interval, client, kind))
+    return recorder.summary(args.duration)
+
+
+def print_summary(results):
+    print(f"\n{results['requests']} 个请求, {results['requests_per_second']:.1f} 请求/秒, "
+          f"错误率 {results['error_rate'] or 0:.2%} (database is locked: {results['database_locked_errors']})")
+    for endpoint, stats in results['endpoints'].items():
+        latency = stats['latency_ms']
+        print(f"  {endpoint:<28} p50 {latency['p50']:8.1f}ms  p99 {latency['p99']:8.1f}ms  "
+              f"{stats['bytes_per_request'] / 1024:9.1f} KiB/请求  304 {stats['not_modified_rate']:6.1%}  "
+              f"错误率 {stats['error_rate']:.2%}")
+        for error, count in stats['errors'].items():
+            print(f'      {error}: {count}')
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args.serve[0], int(args.serve[1]))
+        return
+
+    output = os.path.abspath(args.output) if args.output else None
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare', 'serve')}
+    if args.base_url:
+        print(f'对 {args.base_url} 施加负载: {args.clients} 个客户端, {args.duration:.0f} 秒...')
+        results = run_load(args, args.base_url)
+    else:
+        with tempfile.TemporaryDirectory(prefix='videosummarizer-load-') as workdir:
+            setup_django(workdir)
+            print(f'写入 {args.seed_tasks} 个任务...')
+            seed_database(args)
+            port = free_port()
+            server = start_server(workdir, port)
+            try:
+                print(f'施加负载: {args.clients} 个客户端, {args.duration:.0f} 秒...')
+                results = run_load(args, f'http://127.0.0.1:{port}')
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+
+    path = write_results('http_load', config, results, output)
+    print_summary(results)
+    print(f'结果已保存: {path}')
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
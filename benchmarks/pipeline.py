@@ -0,0 +1,207 @@
+"""End-to-end pipeline benchmark driving AudioSummarizer against offline fakes.
+
+Usage:
+    python -m benchmarks.pipeline --tasks 20 --whisper stand-in
+    python -m benchmarks.pipeline --whisper tiny --compare benchmarks/results/pipeline-<run>.json
+
+URL tasks are downloaded by yt-dlp from a local HTTP server, summaries come
+from a local OpenAI-compatible stub, and transcription uses either a real
+(tiny) Whisper model or a stand-in with a configurable real-time factor.
+Requires ffmpeg, which the pipeline itself needs to decode audio.
+"""
+import argparse
+import os
+import random
+import shutil
+import tempfile
+import time
+from pathlib import Path
+
+from benchmarks.common import (
+    DBWriteCounter, peak_rss_mb, percentile, print_comparison, setup_django, write_results,
+)
+from benchmarks.fakes import FakeWhisperModel, MediaServer, OpenAIStub, write_speech_like_wav
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tasks', type=int, default=12, help='number of tasks to submit')
+    parser.add_argument('--url-ratio', type=float, default=0.5, help='share of URL tasks (rest are uploads)')
+    parser.add_argument('--min-seconds', type=int, default=30, help='shortest synthetic recording')
+    parser.add_argument('--max-seconds', type=int, default=600, help='longest synthetic recording')
+    parser.add_argument('--whisper', default='stand-in',
+                        help="'stand-in' or a Whisper model name such as 'tiny'")
+    parser.add_argument('--realtime-factor', type=float, default=40.0,
+                        help='audio seconds the stand-in transcribes per wall second')
+    parser.add_argument('--llm-latency', type=float, default=0.5, help='seconds the LLM stub takes to answer')
+    parser.add_argument('--arrival-interval', type=float, default=0.0,
+                        help='seconds between submissions (0 submits everything at once)')
+    parser.add_argument('--timeout', type=float, default=3600, help='give up after this many seconds')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    return parser.parse_args()
+
+
+def build_fixtures(directory, args):
+    rng = random.Random(args.seed)
+    fixtures = []
+    for index in range(args.tasks):
+        seconds = rng.randint(args.min_seconds, args.max_seconds)
+        path = Path(directory) / f'clip_{index:03d}.wav'
+        write_speech_like_wav(path, seconds)
+        fixtures.append((path, seconds, rng.random() < args.url_ratio))
+    return fixtures
+
+
+def configure_pipeline(args, llm_stub):
+    from app.models import UserSettings
+    from app.services import AudioSummarizer
+
+    user_settings = UserSettings.get_settings()
+    user_settings.openai_api_key = 'benchmark'
+    user_settings.openai_base_url = llm_stub.api_base
+    user_settings.openai_model = 'bench-model'
+    user_settings.whisper_device = 'cpu'
+    user_settings.auto_load_model = False
+    if args.whisper != 'stand-in':
+        user_settings.whisper_model = args.whisper
+    user_settings.save()
+
+    summarizer = AudioSummarizer()
+    if args.whisper == 'stand-in':
+        # Pretend the configured model is already resident so the worker never loads Whisper
+        summarizer.is_cuda_available = False
+        summarizer.whisper_model = FakeWhisperModel(args.realtime_factor)
+        summarizer.model_name = user_settings.whisper_model
+        summarizer.device = 'cpu'
+    return summarizer
+
+
+def submit(summarizer, fixture, media_server, uploads_dir):
+    from app.models import VideoTask
+    from app.url_utils import submission_key
+
+    path, seconds, as_url = fixture
+    if as_url:
+        url = media_server.url(path.name)
+        task = VideoTask.objects.create(
+            title=url, url=url, canonical_url=submission_key(url), task_type='url'
+        )
+    else:
+        upload = Path(uploads_dir) / path.name
+        shutil.copyfile(path, upload)
+        task = VideoTask.objects.create(title=path.name, file_path=str(upload), task_type='file')
+    summarizer.add_task_to_queue(task.id, task.task_type)
+    return task.id
+
+
+def wait_for_tasks(task_ids, timeout):
+    from app.models import VideoTask
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        active = VideoTask.objects.filter(id__in=task_ids, status__in=VideoTask.ACTIVE_STATUSES).count()
+        if active == 0:
+            return True
+        time.sleep(0.5)
+    return False
+
+
+def collect_results(task_ids, fixtures, started, finished, db_writes):
+    from app import metrics
+    from app.models import VideoTask
+
+    tasks = list(VideoTask.objects.filter(id__in=task_ids))
+    completed = [task for task in tasks if task.status == 'completed']
+    turnarounds = [(task.completed_at - task.created_at).total_seconds() for task in completed]
+    makespan = finished - started
+    seconds_by_task = {task_id: seconds for task_id, (_, seconds, _) in zip(task_ids, fixtures)}
+    audio_seconds = sum(seconds_by_task[task.id] for task in completed)
+
+    stages = {
+        stage: {'count': count, 'mean_seconds': total / count if count else None, 'total_seconds': total}
+        for (stage,), (count, total) in metrics.STAGE_DURATION.totals().items()
+    }
+    return {
+        'tasks_submitted': len(task_ids),
+        'tasks_completed': len(completed),
+        'tasks_failed': sum(task.status == 'failed' for task in tasks),
+        'errors': sorted({task.error_message for task in tasks if task.error_message})[:5],
+        'makespan_seconds': makespan,
+        'tasks_per_hour': len(completed) / makespan * 3600 if makespan else None,
+        'audio_seconds_per_wall_second': audio_seconds / makespan if makespan else None,
+        'turnaround_seconds': {
+            'p50': percentile(turnarounds, 50),
+            'p95': percentile(turnarounds, 95),
+            'mean': sum(turnarounds) / len(turnarounds) if turnarounds else None,
+        },
+        'peak_rss_mb': peak_rss_mb(),
+        'db_writes': dict(db_writes.counts, total=db_writes.total),
+        'db_writes_per_task': db_writes.total / len(task_ids) if task_ids else None,
+        'stages': stages,
+    }
+
+
+def main():
+    args = parse_args()
+    original_cwd = os.getcwd()
+    output = Path(original_cwd, args.output) if args.output else None
+    compare = Path(original_cwd, args.compare) if args.compare else None
+
+    with tempfile.TemporaryDirectory(prefix='videosummarizer-bench-') as workdir:
+        # Keep anything written relative to the working directory inside the throwaway tree
+        os.chdir(workdir)
+        setup_django(workdir)
+
+        fixtures_dir = Path(workdir) / 'fixtures'
+        uploads_dir = Path(workdir) / 'media' / 'uploads'
+        fixtures_dir.mkdir()
+        uploads_dir.mkdir(parents=True)
+        print(f'生成 {args.tasks} 个合成音频...')
+        fixtures = build_fixtures(fixtures_dir, args)
+
+        media_server = MediaServer(fixtures_dir).start()
+        llm_stub = OpenAIStub(latency=args.llm_latency).start()
+        try:
+            summarizer = configure_pipeline(args, llm_stub)
+            db_writes = DBWriteCounter()
+            db_writes.install()
+            db_writes.reset()
+
+            print('提交任务并等待完成...')
+            started = time.monotonic()
+            task_ids = []
+            for fixture in fixtures:
+                task_ids.append(submit(summarizer, fixture, media_server, uploads_dir))
+                if args.arrival_interval:
+                    time.sleep(args.arrival_interval)
+            if not wait_for_tasks(task_ids, args.timeout):
+                print('⚠️ 超时，部分任务未完成')
+            finished = time.monotonic()
+
+            results = collect_results(task_ids, fixtures, started, finished, db_writes)
+        finally:
+            media_server.stop()
+            llm_stub.stop()
+            os.chdir(original_cwd)
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    path = write_results('pipeline', config, results, output)
+
+    print(f"\n完成 {results['tasks_completed']}/{results['tasks_submitted']} 个任务, "
+          f"失败 {results['tasks_failed']}")
+    if results['tasks_per_hour'] is not None:
+        print(f"吞吐量: {results['tasks_per_hour']:.1f} 任务/小时, "
+              f"{results['audio_seconds_per_wall_second']:.1f} 音频秒/秒")
+    if results['turnaround_seconds']['p50'] is not None:
+        print(f"周转时间: p50 {results['turnaround_seconds']['p50']:.2f}s, "
+              f"p95 {results['turnaround_seconds']['p95']:.2f}s")
+    print(f"峰值 RSS: {results['peak_rss_mb']:.1f} MiB, 数据库写入: {results['db_writes']['total']} 次")
+    print(f'结果已保存: {path}')
+    if compare:
+        print_comparison(compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""Cold-start benchmark: how long a fresh process takes to become useful.
+
+Usage:
+    python -m benchmarks.startup --repeat 5
+    python -m benchmarks.startup --compare benchmarks/results/startup-<run>.json
+
+Every scenario runs ``--repeat`` times in a new interpreter against a
+throwaway, already migrated database, and is timed from process start:
+
+* ``setup``: ``django.setup()``, what every manage.py command pays;
+* ``migrate``: a no-op ``migrate``, as run during deploys;
+* ``web_boot``: the WSGI application with the URLconf (and so every view) loaded;
+* ``first_request``: ``web_boot`` plus the first task list and queue status polls.
+
+Each scenario also reports which heavy libraries (yt-dlp, openai, numpy,
+torch, whisper) ended up imported; none of them is needed to boot.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import REPO_ROOT, percentile, print_comparison, setup_django, write_results
+
+HEAVY_MODULES = ('yt_dlp', 'openai', 'numpy', 'torch', 'whisper')
+
+_PRELUDE = '''
+import os, sys
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VideoSummarizer.settings')
+from django.conf import settings
+settings.DATABASES['default']['NAME'] = sys.argv[1]
+import django
+django.setup()
+'''
+
+SCENARIOS = {
+    'setup': '',
+    'migrate': '''
+from django.core.management import call_command
+call_command('migrate', verbosity=0)
+''',
+    'web_boot': '''
+from django.core.wsgi import get_wsgi_application
+from django.urls import get_resolver
+application = get_wsgi_application()
+get_resolver().url_patterns
+''',
+    'first_request': '''
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+application = get_wsgi_application()
+client = Client()
+for url in ('/api/tasks/', '/api/queue/status/'):
+    assert client.get(url).status_code == 200, url
+''',
+}
+
+_REPORT = '''
+import json
+print(json.dumps({'heavy_modules': [name for name in %r if name in sys.modules]}))
+''' % (HEAVY_MODULES,)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per scenario')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help='comma-separated scenarios to run')
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    return parser.parse_args()
+
+
+def run_once(scenario, database):
+    """Wall seconds from spawning the interpreter to the scenario finishing, and its report"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, '-c', _PRELUDE + SCENARIOS[scenario] + _REPORT, str(database)],
+        cwd=REPO_ROOT, env=dict(os.environ, PYTHONPATH=str(REPO_ROOT)),
+        capture_output=True, text=True,
+    )
+    elapsed = time.perf_counter() - started
+    if completed.returncode != 0:
+        raise RuntimeError(f'{scenario} 运行失败:\n{completed.stderr}')
+    return elapsed, json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def main():
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix='videosummarizer-startup-') as workdir:
+        setup_django(workdir)
+        database = os.path.join(workdir, 'bench.sqlite3')
+        # Warm the OS file cache so the first run is not an outlier
+        run_once('setup', database)
+        for scenario in scenarios:
+            timings = []
+            report = None
+            for _ in range(args.repeat):
+                elapsed, report = run_once(scenario, database)
+                timings.append(elapsed)
+            results[scenario] = {
+                'min_seconds': min(timings),
+                'median_seconds': percentile(timings, 50),
+                'max_seconds': max(timings),
+                'heavy_modules': report['heavy_modules'],
+            }
+            loaded = ', '.join(report['heavy_modules']) or '无'
+            print(f"{scenario:<14} 中位数 {results[scenario]['median_seconds']:.3f}s, "
+                  f"最快 {results[scenario]['min_seconds']:.3f}s, 已加载的重量级模块: {loaded}")
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    path = write_results('startup', config, results, output)
+    print(f'\n结果已写入 {path}')
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
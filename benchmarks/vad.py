@@ -0,0 +1,151 @@
+"""Silence-trimming check: what app/vad.py keeps of synthetic audio with a known answer.
+
+Usage:
+    python -m benchmarks.vad
+    python -m benchmarks.vad --window-seconds 300 --compare benchmarks/results/vad-<run>.json
+
+Every case is one transcription window of generated 16 kHz audio whose
+content is known, so the share the VAD keeps can be checked against it:
+
+* ``music_bed``: a steady chord at -20 dBFS, nothing to trim;
+* ``speech_over_noise``: continuous speech over -35 dBFS background noise,
+  nothing to trim;
+* ``speech_over_music``: speech with pauses over a -30 dBFS music bed, which
+  carries on through the pauses and must be kept;
+* ``room_noise``: plain -50 dBFS noise, kept rather than risk dropping a
+  quiet speaker;
+* ``speech_with_pauses``: 4 s of speech, 4 s of near silence, repeated,
+  where a bit over half should go;
+* ``digital_silence``: all zeros, all of it goes.
+
+Exits non-zero if a case keeps a share outside its expected range, so it
+can run after any change to the VAD or its settings.
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.common import REPO_ROOT, print_comparison, write_results
+
+SAMPLE_RATE = 16000
+
+
+def _db(level_dbfs):
+    return 10 ** (level_dbfs / 20)
+
+
+def _noise(rng, samples, level_dbfs):
+    return rng.standard_normal(samples).astype(np.float32) * _db(level_dbfs)
+
+
+def _speech(rng, samples, level_dbfs, depth=1.0):
+    """Noise-excited 'syllables' at about 4 per second, dipping by ``depth`` between them"""
+    t = np.arange(samples) / SAMPLE_RATE
+    envelope = 1 - depth + depth * np.abs(np.sin(2 * np.pi * 2 * t))
+    voice = np.sin(2 * np.pi * 180 * t) + 0.5 * rng.standard_normal(samples)
+    voice *= envelope
+    rms = np.sqrt(np.mean(np.square(voice))) or 1
+    return (voice / rms * _db(level_dbfs)).astype(np.float32)
+
+
+def _music(samples, level_dbfs):
+    t = np.arange(samples) / SAMPLE_RATE
+    chord = sum(np.sin(2 * np.pi * freq * t) for freq in (220, 277.2, 329.6))
+    chord *= 1 + 0.1 * np.sin(2 * np.pi * 0.5 * t)
+    return (chord / np.sqrt(np.mean(np.square(chord))) * _db(level_dbfs)).astype(np.float32)
+
+
+def _with_pauses(rng, audio, level_dbfs):
+    """Add 4 s of speech every 8 s"""
+    period = 8 * SAMPLE_RATE
+    for start in range(0, len(audio), period):
+        end = min(start + period // 2, len(audio))
+        audio[start:end] += _speech(rng, end - start, level_dbfs)
+    return audio
+
+
+def music_bed(rng, samples):
+    return _music(samples, -20)
+
+
+def speech_over_noise(rng, samples):
+    return _speech(rng, samples, -22, depth=0.6) + _noise(rng, samples, -35)
+
+
+def speech_over_music(rng, samples):
+    return _with_pauses(rng, _music(samples, -30), -15)
+
+
+def room_noise(rng, samples):
+    return _noise(rng, samples, -50)
+
+
+def speech_with_pauses(rng, samples):
+    return _with_pauses(rng, _noise(rng, samples, -70), -25)
+
+
+def digital_silence(rng, samples):
+    return np.zeros(samples, dtype=np.float32)
+
+
+# name -> (generator, lowest and highest share of the window that should be kept)
+CASES = {
+    'music_bed': (music_bed, 0.99, 1.0),
+    'speech_over_noise': (speech_over_noise, 0.99, 1.0),
+    'speech_over_music': (speech_over_music, 0.99, 1.0),
+    'room_noise': (room_noise, 0.99, 1.0),
+    'speech_with_pauses': (speech_with_pauses, 0.5, 0.75),
+    'digital_silence': (digital_silence, 0.0, 0.0),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--window-seconds', type=int, default=60, help='length of each generated window')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='result JSON path (default: benchmarks/results/)')
+    parser.add_argument('--compare', help='previous result JSON to compare against')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if str(REPO_ROOT) not in sys.path:
+        sys.path.insert(0, str(REPO_ROOT))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'VideoSummarizer.settings')
+    import django
+    django.setup()
+    from app import vad
+
+    rng = np.random.default_rng(args.seed)
+    samples = args.window_seconds * SAMPLE_RATE
+    results = {}
+    failures = []
+    for name, (generate, lowest, highest) in CASES.items():
+        audio = generate(rng, samples)
+        started = time.perf_counter()
+        speech = vad.detect_speech(audio, SAMPLE_RATE)
+        elapsed = time.perf_counter() - started
+        kept = 1 - speech.trimmed_ratio
+        ok = lowest <= kept <= highest
+        if not ok:
+            failures.append(name)
+        results[name] = {'kept_ratio': round(kept, 4), 'expected': [lowest, highest], 'ok': ok,
+                         'vad_ms': round(elapsed * 1000, 2)}
+        print(f"{name:<20} 保留 {kept * 100:5.1f}% (预期 {lowest * 100:.0f}%-{highest * 100:.0f}%)  "
+              f"{elapsed * 1000:6.1f} ms  {'OK' if ok else '不符合预期'}")
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'compare')}
+    path = write_results('vad', config, results, os.path.abspath(args.output) if args.output else None)
+    print(f'\n结果已写入 {path}')
+    if args.compare:
+        print_comparison(args.compare, results)
+    if failures:
+        sys.exit(f"保留比例不符合预期: {', '.join(failures)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,14 +7,33 @@ echo "启动 Django 视频总结器..."
 echo "更新 yt-dlp..."
 uv tool upgrade yt-dlp || uv tool install yt-dlp
 
+# 用法: ./start_services.sh [asgi]  (默认使用开发服务器)
+MODE=${1:-dev}
+
 echo "同步依赖..."
-uv sync
+if [ "$MODE" = "asgi" ]; then
+    uv sync --extra asgi
+else
+    uv sync
+fi
 
 echo "运行数据库迁移..."
 uv run python manage.py makemigrations app
 uv run python manage.py migrate
 
-echo "启动 Django 开发服务器..."
+if [ "$MODE" = "asgi" ]; then
+    # 生产模式使用带内容哈希的静态文件名 (可长期缓存)，需要先收集
+    echo "收集静态文件..."
+    DJANGO_DEBUG=0 uv run python manage.py collectstatic --noinput
+fi
+
 echo "访问 http://localhost:18000 使用应用"
 echo "按 Ctrl+C 停止服务器"
-uv run python manage.py runserver 0.0.0.0:18000
\ No newline at end of file
+if [ "$MODE" = "asgi" ]; then
+    # 任务队列在进程内，只能运行一个 worker 进程
+    echo "启动 ASGI 服务器 (uvicorn)..."
+    DJANGO_DEBUG=0 uv run uvicorn VideoSummarizer.asgi:application --host 0.0.0.0 --port 18000
+else
+    echo "启动 Django 开发服务器..."
+    uv run python manage.py runserver 0.0.0.0:18000
+fi
\ No newline at end of file
@@ -2,8 +2,15 @@ class VideoSummarizerApp {
     constructor() {
         this.currentTask = null;
         this.tasks = [];
+        this.taskStore = new Map();
+        this.taskCursor = null;
+        this.queuePositions = {};
+        this.conditionalCache = new Map();
         this.settings = null;
         this.pollInterval = null;
+        this.searchQuery = '';
+        this.searchResults = null;
+        this.searchTimer = null;
         this.init();
     }
 
@@ -27,6 +34,12 @@ class VideoSummarizerApp {
             }
         });
 
+        // Full-text search over the task list
+        document.getElementById('taskSearch').addEventListener('input', (e) => {
+            clearTimeout(this.searchTimer);
+            this.searchTimer = setTimeout(() => this.searchTasks(e.target.value.trim()), 300);
+        });
+
         // File upload
         const fileInput = document.getElementById('audioFile');
         fileInput.addEventListener('change', (e) => {
@@ -229,25 +242,96 @@ class VideoSummarizerApp {
         }
     }
 
-    async handleFileUpload(file) {
-        if (!file) return;
+    // Upload in chunks so a large file resumes where it stopped after a network error
+    async uploadFile(file) {
+        const headers = { 'X-CSRFToken': this.getCSRFToken() };
+        const resumeKey = `upload:${file.name}:${file.size}:${file.lastModified}`;
+        let session = null;
 
-        const formData = new FormData();
-        formData.append('file', file);
+        const savedId = localStorage.getItem(resumeKey);
+        if (savedId) {
+            const response = await fetch(`/api/uploads/${savedId}/`);
+            if (response.ok) {
+                session = await response.json();
+                if (session.status !== 'uploading') {
+                    session = null;
+                }
+            }
+        }
 
-        try {
-            this.showLoading(true);
-            const response = await fetch('/api/tasks/create-file/', {
+        if (!session) {
+            const response = await fetch('/api/uploads/init/', {
                 method: 'POST',
-                headers: {
-                    'X-CSRFToken': this.getCSRFToken()
-                },
-                body: formData
+                headers: { ...headers, 'Content-Type': 'application/json' },
+                body: JSON.stringify({ filename: file.name, size: file.size })
             });
+            const data = await response.json();
+            if (!response.ok) {
+                return { ok: false, data };
+            }
+            if (data.task) {
+                return { ok: true, data: data.task };
+            }
+            session = data;
+            localStorage.setItem(resumeKey, session.id);
+        }
+
+        let offset = session.offset;
+        let failures = 0;
+        while (offset < file.size) {
+            const chunk = file.slice(offset, offset + session.chunk_size);
+            let response;
+            try {
+                response = await fetch(`/api/uploads/${session.id}/append/?offset=${offset}`, {
+                    method: 'PUT',
+                    headers: { ...headers, 'Content-Type': 'application/octet-stream' },
+                    body: chunk
+                });
+            } catch (error) {
+                if (++failures > 5) {
+                    throw error;
+                }
+                // Ask the server how far it got, then continue from there
+                await new Promise(resolve => setTimeout(resolve, 1000 * failures));
+                const status = await fetch(`/api/uploads/${session.id}/`);
+                if (status.ok) {
+                    offset = (await status.json()).offset;
+                }
+                continue;
+            }
 
             const data = await response.json();
+            if (response.status === 409 && data.offset !== undefined) {
+                offset = data.offset;
+                continue;
+            }
+            if (!response.ok) {
+                return { ok: false, data };
+            }
+            offset = data.offset;
+            failures = 0;
+        }
 
-            if (response.ok) {
+        const response = await fetch(`/api/uploads/${session.id}/complete/`, {
+            method: 'POST',
+            headers
+        });
+        const data = await response.json();
+        if (response.ok || response.status === 400) {
+            // A failed checksum discards the upload; start afresh next time
+            localStorage.removeItem(resumeKey);
+        }
+        return { ok: response.ok, data };
+    }
+
+    async handleFileUpload(file) {
+        if (!file) return;
+
+        try {
+            this.showLoading(true);
+            const { ok, data } = await this.uploadFile(file);
+
+            if (ok) {
                 document.getElementById('audioFile').value = '';
                 document.querySelector('.file-input-status').textContent = '未选择文件';
                 this.showNotification('文件上传成功', 'success');
@@ -265,41 +349,187 @@ class VideoSummarizerApp {
 
     async loadTasks() {
         try {
-            const [tasksResponse, queueResponse] = await Promise.all([
-                fetch('/api/tasks/'),
-                fetch('/api/queue/status/')
+            // Only changes since the last answer are fetched; the first call gets everything
+            const since = this.taskCursor ? `?since=${encodeURIComponent(this.taskCursor)}` : '';
+            const [changesResponse, queueStatus] = await Promise.all([
+                fetch(`/api/tasks/changes/${since}`),
+                this.fetchConditional('/api/queue/status/')
             ]);
             
-            const tasksData = await tasksResponse.json();
-            const queueData = await queueResponse.json();
-
-            if (tasksResponse.ok) {
-                // Add queue information to tasks
-                this.tasks = tasksData.map((task, index) => {
-                    if (task.status === 'pending') {
-                        task.queue_position = index + 1;
-                    }
-                    return task;
-                });
-                
-                this.queueStatus = queueData;
-                this.renderTasks();
-                
-                // Update mobile tasks if on mobile
-                if (this.isMobile() && this.currentMobilePage === 'tasks') {
-                    this.renderMobileTasks();
-                }
+            const changesData = await changesResponse.json();
+
+            if (changesResponse.ok) {
+                this.queueStatus = queueStatus.data;
+                this.applyTaskChanges(changesData);
             } else {
-                console.error('Failed to load tasks:', tasksData);
+                console.error('Failed to load tasks:', changesData);
+                this.taskCursor = null;
             }
         } catch (error) {
             console.error('Error loading tasks:', error);
         }
     }
 
+    applyTaskChanges(changes) {
+        if (changes.reset) {
+            this.taskStore = new Map(changes.tasks.map(task => [task.id, task]));
+            this.taskStore.forEach(task => { task.queue_position = changes.queue_positions[task.id]; });
+            this.queuePositions = changes.queue_positions;
+            this.taskCursor = changes.cursor;
+            this.refreshTaskOrder();
+            this.renderTasks();
+            if (this.isMobile() && this.currentMobilePage === 'tasks') {
+                this.renderMobileTasks();
+            }
+            return;
+        }
+
+        const changedIds = new Set();
+        const removedIds = [];
+        changes.tasks.forEach(task => {
+            const known = this.taskStore.get(task.id);
+            // Answers overlap a little, so rows seen before come again
+            if (known && known.updated_at === task.updated_at) return;
+            task.queue_position = known?.queue_position;
+            this.taskStore.set(task.id, task);
+            changedIds.add(task.id);
+        });
+        changes.deleted.forEach(id => {
+            if (this.taskStore.delete(id)) removedIds.push(id);
+        });
+
+        // Queue positions move without the tasks themselves changing
+        const positions = changes.queue_positions;
+        new Set([...Object.keys(this.queuePositions), ...Object.keys(positions)]).forEach(key => {
+            const task = this.taskStore.get(Number(key));
+            if (task && task.queue_position !== positions[key]) {
+                task.queue_position = positions[key];
+                changedIds.add(task.id);
+            }
+        });
+        this.queuePositions = positions;
+        this.taskCursor = changes.cursor;
+
+        if (changedIds.size === 0 && removedIds.length === 0) return;
+        this.refreshTaskOrder();
+        if (this.currentTask && this.taskStore.has(this.currentTask.id)) {
+            this.currentTask = this.taskStore.get(this.currentTask.id);
+        }
+        this.patchTaskList(changedIds, removedIds);
+        if (this.isMobile() && this.currentMobilePage === 'tasks') {
+            this.patchMobileTaskList(changedIds, removedIds);
+        }
+    }
+
+    refreshTaskOrder() {
+        // Newest first, as the server orders them
+        this.tasks = [...this.taskStore.values()].sort(
+            (a, b) => b.created_at.localeCompare(a.created_at) || b.id - a.id
+        );
+    }
+
+    patchTaskCards(container, emptySelector, renderItem, changedIds, removedIds) {
+        // Re-render only the cards that changed; returns false when the whole list must be rendered
+        if (this.tasks.length === 0 || container.querySelector(emptySelector)) return false;
+
+        removedIds.forEach(id => container.querySelector(`[data-task-id="${id}"]`)?.remove());
+        const template = document.createElement('template');
+        // Back to front, so the card a new one goes before is always in place
+        for (let index = this.tasks.length - 1; index >= 0; index--) {
+            const task = this.tasks[index];
+            if (!changedIds.has(task.id)) continue;
+            template.innerHTML = renderItem(task).trim();
+            const card = template.content.firstElementChild;
+            const existing = container.querySelector(`[data-task-id="${task.id}"]`);
+            if (existing) {
+                existing.replaceWith(card);
+            } else {
+                const next = this.tasks[index + 1];
+                container.insertBefore(card, next ? container.querySelector(`[data-task-id="${next.id}"]`) : null);
+            }
+        }
+        return true;
+    }
+
+    patchTaskList(changedIds, removedIds) {
+        // Search results are the server's answer to a query and stay as they are
+        if (this.searchResults) return;
+        const taskList = document.getElementById('taskList');
+        if (!this.patchTaskCards(taskList, '.empty-state', task => this.renderTaskItem(task), changedIds, removedIds)) {
+            this.renderTasks();
+        }
+    }
+
+    patchMobileTaskList(changedIds, removedIds) {
+        const tasksList = document.getElementById('mobileTasksList');
+        if (!this.patchTaskCards(tasksList, '.mobile-empty-state', task => this.renderMobileTaskItem(task), changedIds, removedIds)) {
+            this.renderMobileTasks();
+        }
+    }
+
+    async searchTasks(query) {
+        this.searchQuery = query;
+        if (!query) {
+            this.searchResults = null;
+            this.renderTasks();
+            return;
+        }
+
+        try {
+            const response = await fetch(`/api/tasks/search/?q=${encodeURIComponent(query)}&page_size=50`);
+            const data = await response.json();
+            // Ignore answers to queries the user has typed past
+            if (query !== this.searchQuery) return;
+            if (response.ok) {
+                this.searchResults = data;
+                this.renderTasks();
+            } else {
+                console.error('Search failed:', data);
+            }
+        } catch (error) {
+            console.error('Error searching tasks:', error);
+        }
+    }
+
+    renderSearchResults() {
+        const taskList = document.getElementById('taskList');
+        const results = this.searchResults.results;
+
+        if (results.length === 0) {
+            taskList.innerHTML = `
+                <div class="empty-state">
+                    <div class="empty-icon">🔍</div>
+                    <p>没有匹配的任务</p>
+                </div>
+            `;
+            return;
+        }
+
+        // Snippets come HTML-escaped from the server with matches in <mark>
+        taskList.innerHTML = results.map(task => `
+            <div class="task-item ${task.id === this.currentTask?.id ? 'active' : ''} ${task.status}"
+                 data-task-id="${task.id}" onclick="app.selectTask(${task.id})">
+                <div class="task-title">${task.title}</div>
+                <div class="task-snippet">${task.snippet}</div>
+                <div class="task-meta">
+                    <div class="task-status">
+                        <div class="status-indicator ${task.status}"></div>
+                        <span>${this.getStatusText(task.status)}</span>
+                    </div>
+                    <div class="task-time">${this.formatTime(task.created_at)}</div>
+                </div>
+            </div>
+        `).join('');
+    }
+
     renderTasks() {
         const taskList = document.getElementById('taskList');
         
+        if (this.searchResults) {
+            this.renderSearchResults();
+            return;
+        }
+        
         if (this.tasks.length === 0) {
             taskList.innerHTML = `
                 <div class="empty-state">
@@ -310,29 +540,37 @@ class VideoSummarizerApp {
             return;
         }
 
-        taskList.innerHTML = this.tasks.map(task => {
-            const queueInfo = task.queue_position > 1 ? `<div class="queue-info">队列位置: ${task.queue_position}</div>` : '';
-            return `
-                <div class="task-item ${task.id === this.currentTask?.id ? 'active' : ''} ${task.status}" 
-                     data-task-id="${task.id}" onclick="app.selectTask(${task.id})">
-                    <div class="task-title">${task.title}</div>
-                    <div class="task-meta">
-                        <div class="task-status">
-                            <div class="status-indicator ${task.status}"></div>
-                            <span>${this.getStatusText(task.status)}</span>
-                        </div>
-                        <div class="task-time">${this.formatTime(task.created_at)}</div>
+        taskList.innerHTML = this.tasks.map(task => this.renderTaskItem(task)).join('');
+    }
+
+    renderTaskItem(task) {
+        const queueInfo = task.queue_position > 1 ? `<div class="queue-info">队列位置: ${task.queue_position}</div>` : '';
+        return `
+            <div class="task-item ${task.id === this.currentTask?.id ? 'active' : ''} ${task.status}" 
+                 data-task-id="${task.id}" onclick="app.selectTask(${task.id})">
+                <div class="task-title">${task.title}</div>
+                <div class="task-meta">
+                    <div class="task-status">
+                        <div class="status-indicator ${task.status}"></div>
+                        <span>${this.getStatusText(task.status)}</span>
                     </div>
-                    ${queueInfo}
-                    ${task.status !== 'completed' && task.progress !== undefined ? `
-                        <div class="task-progress">
-                            <div class="progress-bar" style="width: ${task.progress}%"></div>
-                        </div>
-                    ` : ''}
-                    <button class="task-delete" onclick="event.stopPropagation(); app.deleteTask(${task.id})">&times;</button>
+                    <div class="task-time">${this.formatTime(task.created_at)}</div>
                 </div>
-            `;
-        }).join('');
+                ${queueInfo}
+                ${this.isActiveStatus(task.status) && task.progress !== undefined ? `
+                    <div class="task-progress">
+                        <div class="progress-bar" style="width: ${task.progress}%"></div>
+                    </div>
+                ` : ''}
+                ${this.isActiveStatus(task.status) ? `
+                    <button class="task-cancel" title="取消任务" onclick="event.stopPropagation(); app.cancelTask(${task.id})">&#9632;</button>
+                ` : ''}
+                ${task.status === 'failed' || task.status === 'cancelled' ? `
+                    <button class="task-retry" title="重试任务" onclick="event.stopPropagation(); app.retryTask(${task.id})">&#8635;</button>
+                ` : ''}
+                <button class="task-delete" onclick="event.stopPropagation(); app.deleteTask(${task.id})">&times;</button>
+            </div>
+        `;
     }
 
     async selectTask(taskId) {
@@ -421,6 +659,52 @@ class VideoSummarizerApp {
         }
     }
 
+    async cancelTask(taskId) {
+        try {
+            const response = await fetch(`/api/tasks/${taskId}/cancel/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': this.getCSRFToken()
+                }
+            });
+
+            const data = await response.json();
+
+            if (response.ok) {
+                this.showNotification('任务已取消', 'success');
+                await this.loadTasks();
+            } else {
+                this.showNotification(data.error || '取消任务失败', 'error');
+            }
+        } catch (error) {
+            console.error('Error cancelling task:', error);
+            this.showNotification('网络错误，请稍后重试', 'error');
+        }
+    }
+
+    async retryTask(taskId) {
+        try {
+            const response = await fetch(`/api/tasks/${taskId}/retry/`, {
+                method: 'POST',
+                headers: {
+                    'X-CSRFToken': this.getCSRFToken()
+                }
+            });
+
+            const data = await response.json();
+
+            if (response.ok) {
+                this.showNotification(data.message || '任务已重新加入队列', 'success');
+                await this.loadTasks();
+            } else {
+                this.showNotification(data.error || '重试任务失败', 'error');
+            }
+        } catch (error) {
+            console.error('Error retrying task:', error);
+            this.showNotification('网络错误，请稍后重试', 'error');
+        }
+    }
+
     async loadSettings() {
         try {
             const response = await fetch('/api/settings/');
@@ -443,6 +727,8 @@ class VideoSummarizerApp {
         document.getElementById('openaiModel').value = this.settings.openai_model || 'gpt-4o-mini';
         document.getElementById('whisperModel').value = this.settings.whisper_model || 'base';
         document.getElementById('whisperDevice').value = this.settings.whisper_device || 'auto';
+        document.getElementById('defaultLanguage').value = this.settings.default_language || '';
+        document.getElementById('vadEnabled').checked = this.settings.vad_enabled ?? true;
         document.getElementById('autoLoadModel').checked = this.settings.auto_load_model || false;
         document.getElementById('summaryPrompt').value = this.settings.summary_prompt || '总结录音，简体中文回答';
         document.getElementById('urlSummaryPrompt').value = this.settings.url_summary_prompt || '本次录音的标题是{title}，简要回答标题的问题，并且总结录音，简体中文回答';
@@ -455,6 +741,8 @@ class VideoSummarizerApp {
             openai_model: document.getElementById('openaiModel').value,
             whisper_model: document.getElementById('whisperModel').value,
             whisper_device: document.getElementById('whisperDevice').value,
+            default_language: document.getElementById('defaultLanguage').value,
+            vad_enabled: document.getElementById('vadEnabled').checked,
             auto_load_model: document.getElementById('autoLoadModel').checked,
             summary_prompt: document.getElementById('summaryPrompt').value,
             url_summary_prompt: document.getElementById('urlSummaryPrompt').value
@@ -553,10 +841,29 @@ class VideoSummarizerApp {
         }
     }
 
+    async fetchConditional(url) {
+        // Sends the ETag of the last answer; on 304 that answer is reused instead of a new body
+        const cached = this.conditionalCache.get(url);
+        const response = await fetch(url, {
+            cache: 'no-store',
+            headers: cached ? { 'If-None-Match': cached.etag } : {}
+        });
+        if (response.status === 304 && cached) {
+            return { ok: true, status: 200, data: cached.data };
+        }
+
+        const data = await response.json();
+        const etag = response.headers.get('ETag');
+        if (response.ok && etag) {
+            this.conditionalCache.set(url, { etag, data });
+        }
+        return { ok: response.ok, status: response.status, data };
+    }
+
     async updateModelStatus() {
         try {
-            const response = await fetch('/api/model/status/');
-            const data = await response.json();
+            const response = await this.fetchConditional('/api/model/status/');
+            const data = response.data;
 
             if (response.ok) {
                 if (data.loaded) {
@@ -723,11 +1030,16 @@ class VideoSummarizerApp {
             'transcribing': '转录中',
             'summarizing': '总结中',
             'completed': '已完成',
-            'failed': '失败'
+            'failed': '失败',
+            'cancelled': '已取消'
         };
         return statusMap[status] || status;
     }
 
+    isActiveStatus(status) {
+        return ['pending', 'downloading', 'transcribing', 'summarizing'].includes(status);
+    }
+
     formatTime(timestamp) {
         const date = new Date(timestamp);
         const now = new Date();
@@ -807,22 +1119,11 @@ class VideoSummarizerApp {
     async handleMobileFileUpload(file) {
         if (!file) return;
 
-        const formData = new FormData();
-        formData.append('file', file);
-
         try {
             this.showLoading(true);
-            const response = await fetch('/api/tasks/create-file/', {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': this.getCSRFToken()
-                },
-                body: formData
-            });
-
-            const data = await response.json();
+            const { ok, data } = await this.uploadFile(file);
 
-            if (response.ok) {
+            if (ok) {
                 document.getElementById('mobileAudioFile').value = '';
                 document.querySelector('#mobileTaskOverlay .file-input-status').textContent = '未选择文件';
                 this.showNotification('文件上传成功', 'success');
@@ -953,22 +1254,11 @@ class VideoSummarizerApp {
     async handleMobileNewFileUpload(file) {
         if (!file) return;
 
-        const formData = new FormData();
-        formData.append('file', file);
-
         try {
             this.showLoading(true);
-            const response = await fetch('/api/tasks/create-file/', {
-                method: 'POST',
-                headers: {
-                    'X-CSRFToken': this.getCSRFToken()
-                },
-                body: formData
-            });
+            const { ok, data } = await this.uploadFile(file);
 
-            const data = await response.json();
-
-            if (response.ok) {
+            if (ok) {
                 document.getElementById('mobileAudioFileInput').value = '';
                 document.querySelector('#mobileAddPage .file-input-status').textContent = '未选择文件';
                 this.showNotification('文件上传成功', 'success');
@@ -1003,29 +1293,31 @@ class VideoSummarizerApp {
             return;
         }
 
-        tasksList.innerHTML = this.tasks.map(task => {
-            const queueInfo = task.queue_position > 1 ? 
-                `<div class="mobile-queue-info">队列位置: ${task.queue_position}</div>` : '';
-            return `
-                <div class="mobile-task-item ${task.id === this.currentTask?.id ? 'active' : ''} ${task.status}" 
-                     data-task-id="${task.id}" onclick="app.selectMobileTask(${task.id})">
-                    <div class="mobile-task-title">${task.title}</div>
-                    <div class="mobile-task-meta">
-                        <div class="task-status">
-                            <div class="status-indicator ${task.status}"></div>
-                            <span>${this.getStatusText(task.status)}</span>
-                        </div>
-                        <div class="task-time">${this.formatTime(task.created_at)}</div>
+        tasksList.innerHTML = this.tasks.map(task => this.renderMobileTaskItem(task)).join('');
+    }
+
+    renderMobileTaskItem(task) {
+        const queueInfo = task.queue_position > 1 ? 
+            `<div class="mobile-queue-info">队列位置: ${task.queue_position}</div>` : '';
+        return `
+            <div class="mobile-task-item ${task.id === this.currentTask?.id ? 'active' : ''} ${task.status}" 
+                 data-task-id="${task.id}" onclick="app.selectMobileTask(${task.id})">
+                <div class="mobile-task-title">${task.title}</div>
+                <div class="mobile-task-meta">
+                    <div class="task-status">
+                        <div class="status-indicator ${task.status}"></div>
+                        <span>${this.getStatusText(task.status)}</span>
                     </div>
-                    ${queueInfo}
-                    ${task.status !== 'completed' && task.progress !== undefined ? `
-                        <div class="mobile-task-progress">
-                            <div class="mobile-progress-bar" style="width: ${task.progress}%"></div>
-                        </div>
-                    ` : ''}
+                    <div class="task-time">${this.formatTime(task.created_at)}</div>
                 </div>
-            `;
-        }).join('');
+                ${queueInfo}
+                ${task.status !== 'completed' && task.progress !== undefined ? `
+                    <div class="mobile-task-progress">
+                        <div class="mobile-progress-bar" style="width: ${task.progress}%"></div>
+                    </div>
+                ` : ''}
+            </div>
+        `;
     }
 
     async selectMobileTask(taskId) {